@@ -0,0 +1,156 @@
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+from benchmarks import corpora
+from chempy import Equation, Molecule, dedup, molecule, util
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+
+def _bench_tokenize(items: List[str]):
+    return lambda: [util.tokenize(item) for item in items]
+
+
+def _bench_parse(items: List[str]):
+    toks = [util.tokenize(item) for item in items]
+    return lambda: [molecule._parse(tok) for tok in toks]
+
+
+def _bench_complete_formula(items: List[str], cached: bool):
+    def run():
+        if not cached:
+            molecule.cache_clear()
+        return [Molecule.complete_formula(item) for item in items]
+    return run
+
+
+def _bench_from_str(items: List[str], cached: bool):
+    def run():
+        if not cached:
+            molecule.cache_clear()
+        return [Equation.from_str(item) for item in items]
+    return run
+
+
+def _bench_simplify(items: List[str]):
+    eqs = [Equation.from_str(item) * 2 for item in items]
+    return lambda: [eq.simplify() for eq in eqs]
+
+
+def _bench_balance(items: List[str], method: str):
+    eqs = [Equation.from_str(item) for item in items]
+    return lambda: [eq.balance(method) for eq in eqs]
+
+
+def _bench_dedup(items: List[str]):
+    # Each equation also appears reordered and scaled, so two thirds of the stream are duplicates
+    eqs = [Equation.from_str(item) for item in items]
+    eqs += [Equation(eq.reactants[::-1], eq.products[::-1]) for eq in eqs] + [eq * 2 for eq in eqs]
+    return lambda: dedup.EquivalenceIndex().extend(eqs)
+
+
+# name -> (number of items per run, run factory)
+def benchmarks() -> Dict[str, Tuple[int, Callable[[], Callable]]]:
+    combustions = corpora.ORGANIC_COMBUSTIONS
+    many = corpora.MANY_SPECIES
+    nested = corpora.NESTED_FORMULAS
+    inorganic = corpora.SIMPLE_INORGANIC
+    return {
+        'tokenize/inorganic': (len(inorganic), lambda: _bench_tokenize(inorganic)),
+        'tokenize/many_species': (len(many), lambda: _bench_tokenize(many)),
+        'parse/nested': (len(nested), lambda: _bench_parse(nested)),
+        'parse/formulas': (len(corpora.FORMULAS), lambda: _bench_parse(corpora.FORMULAS)),
+        'complete_formula/uncached': (len(corpora.MOLECULES),
+                                      lambda: _bench_complete_formula(corpora.MOLECULES, cached=False)),
+        'complete_formula/cached': (len(corpora.MOLECULES),
+                                    lambda: _bench_complete_formula(corpora.MOLECULES, cached=True)),
+        'from_str/inorganic': (len(inorganic), lambda: _bench_from_str(inorganic, cached=True)),
+        'from_str/inorganic_uncached': (len(inorganic), lambda: _bench_from_str(inorganic, cached=False)),
+        'from_str/many_species': (len(many), lambda: _bench_from_str(many, cached=True)),
+        'simplify/inorganic': (len(inorganic), lambda: _bench_simplify(inorganic)),
+        'simplify/many_species': (len(many), lambda: _bench_simplify(many)),
+        'dedup/inorganic': (3 * len(inorganic), lambda: _bench_dedup(inorganic)),
+        'balance/inorganic': (len(inorganic), lambda: _bench_balance(inorganic, 'integer')),
+        'balance/combustion': (len(combustions), lambda: _bench_balance(combustions, 'integer')),
+        'balance/many_species': (len(many), lambda: _bench_balance(many, 'integer')),
+        'balance/many_species_sparse': (len(many), lambda: _bench_balance(many, 'sparse')),
+        'balance/inorganic_sympy': (len(inorganic), lambda: _bench_balance(inorganic, 'sympy')),
+    }
+
+
+def measure(items: int, factory: Callable[[], Callable], min_time: float):
+    run = factory()
+    run()  # warm up
+
+    gc.collect()
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    runs, best, spent = 0, float('inf'), 0.0
+    while spent < min_time or runs < 3:
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        best = min(best, elapsed)
+        spent += elapsed
+        runs += 1
+
+    return {'items_per_sec': items / best, 'peak_bytes': peak, 'runs': runs}
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks',
+                                     description='Benchmark chempy parsing, simplification and balancing.')
+    parser.add_argument('-k', '--filter', default='', help='only run benchmarks whose name contains this text')
+    parser.add_argument('--min-time', type=float, default=0.2, help='seconds to spend timing each benchmark')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='baseline file to compare against or save to')
+    parser.add_argument('--save', action='store_true', help='save the results as the new baseline')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='relative slowdown or memory growth reported as a regression (default 0.2)')
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    results = {}
+    regressions = []
+    print('%-32s %14s %12s %10s %10s' % ('benchmark', 'items/s', 'peak KiB', 'speed', 'memory'))
+    for name, (items, factory) in benchmarks().items():
+        if args.filter not in name:
+            continue
+        result = results[name] = measure(items, factory, args.min_time)
+
+        speed = memory = ''
+        if name in baseline:
+            ratio = result['items_per_sec'] / baseline[name]['items_per_sec']
+            growth = result['peak_bytes'] / max(baseline[name]['peak_bytes'], 1)
+            speed = '%+.0f%%' % ((ratio - 1) * 100)
+            memory = '%+.0f%%' % ((growth - 1) * 100)
+            if ratio < 1 - args.threshold or growth > 1 + args.threshold:
+                regressions.append(name)
+        print('%-32s %14.0f %12.1f %10s %10s' % (name, result['items_per_sec'], result['peak_bytes'] / 1024,
+                                                 speed, memory))
+
+    if args.save:
+        with open(args.baseline, 'w') as f:
+            json.dump({**baseline, **results}, f, indent=2, sort_keys=True)
+        print('Saved baseline to ' + args.baseline)
+
+    if regressions:
+        print('Regressions beyond ' + str(int(args.threshold * 100)) + '%: ' + ', '.join(regressions))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
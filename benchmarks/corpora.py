@@ -0,0 +1,66 @@
+from typing import List
+
+SIMPLE_INORGANIC = [
+    'H2 + O2 = H2O',
+    'Fe + O2 = Fe2O3',
+    'Na + Cl2 = NaCl',
+    'Al + O2 = Al2O3',
+    'N2 + H2 = NH3',
+    'KClO3 = KCl + O2',
+    'CaCO3 = CaO + CO2',
+    'Zn + HCl = ZnCl2 + H2',
+    'Al + H2SO4 = Al2(SO4)3 + H2',
+    'Ca(OH)2 + H3PO4 = Ca3(PO4)2 + H2O',
+    'KMnO4 + HCl = KCl + MnCl2 + H2O + Cl2',
+    'Cu + HNO3 = Cu(NO3)2 + NO + H2O',
+    'FeS2 + O2 = Fe2O3 + SO2',
+    'NH3 + O2 = NO + H2O',
+    'Fe2O3 + CO = Fe + CO2',
+    'Na+(aq) + Cl-(aq) = NaCl(s)',
+    'SO4-2(aq) + Ba+2(aq) = BaSO4(s)',
+    'Cu+2(aq) + e- = Cu(s)',
+    'MnO4-(aq) + Fe+2(aq) + H+(aq) = Mn+2(aq) + Fe+3(aq) + H2O(l)',
+    'K4Fe(CN)6 + KMnO4 + H2SO4 = KHSO4 + Fe2(SO4)3 + MnSO4 + HNO3 + CO2 + H2O',
+]
+
+
+def nested_formula(depth: int):
+    # ((((CH3)2N)3C)2(SO4)3)... nested depth levels deep
+    formula = 'CH3'
+    for level in range(depth):
+        formula = '(' + formula + ')' + str(level % 3 + 2) + ['N', 'C', 'P', 'Si'][level % 4]
+    return formula
+
+
+NESTED_FORMULAS = [nested_formula(depth) for depth in (4, 8, 16, 32)] + \
+                  ['(C2H4)50000', 'C100000H200002', '(' * 20 + 'CH2' + ')2' * 20]
+
+
+def alkane_combustion(n: int):
+    return 'C' + str(n) + 'H' + str(2 * n + 2) + ' + O2 = CO2 + H2O'
+
+
+ORGANIC_COMBUSTIONS = [alkane_combustion(n) for n in (8, 16, 24, 40, 60, 100)] + \
+                      ['C6H12O6 + O2 = CO2 + H2O',
+                       'C57H110O6 + O2 = CO2 + H2O',
+                       'C27H46O + O2 = CO2 + H2O',
+                       'C10H15N5O10P2 + O2 = CO2 + H2O + N2 + P4O10']
+
+
+def element_symbols(count: int) -> List[str]:
+    # Made up two letter symbols, the parser does not check them against the periodic table
+    return ['Q' + chr(ord('a') + i // 26) + chr(ord('a') + i % 26) for i in range(count)]
+
+
+def many_species(count: int):
+    # count diatomic reactants combining into one product, which has a unique balance
+    symbols = element_symbols(count)
+    return ' + '.join(symbol + '2' for symbol in symbols) + ' = ' + ''.join(symbols)
+
+
+MANY_SPECIES = [many_species(n) for n in (10, 25, 50, 100)]
+
+FORMULAS = ['H2O', 'SO4', 'HgS', 'Fe2O3', 'Ca(NO3)2', '(NH4)2SO4', '(CH2)2(NH2)2H', 'C6H12O6', 'K4Fe(CN)6', 'e']
+
+MOLECULES = ['H2O(l)', 'SO4-2(aq)', 'HgS(s, red)', 'Fe2O3(s)', 'Ca(NO3)2(s)', '(NH4)2SO4(s)',
+             '(CH2)2(NH2)2H+(aq)', 'C6H12O6(s)', 'K4Fe(CN)6(s)', 'e-']
@@ -0,0 +1,145 @@
+import argparse
+import gzip
+import io
+import json
+import sys
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from typing import Deque, Iterator, List, NamedTuple, Optional, TextIO
+
+from chempy.balance_cache import BalanceCache
+from chempy.batch import BalanceResult, balance_many
+from chempy.util import ParseError
+
+_GZIP_MAGIC = b'\x1f\x8b'
+
+
+class _Line(NamedTuple):
+    source: str
+    number: int
+    equation: str
+    id: object
+    error: Optional[Exception]  # set when the line itself could not be read as an equation
+
+
+@contextmanager
+def _text(raw: io.BufferedReader) -> Iterator[TextIO]:
+    # Text stream over a binary one, decompressed when the content is gzip whatever the file is called. The
+    # decompressor is closed on exit, raw itself is left open.
+    gzipped = raw.peek(2)[:2] == _GZIP_MAGIC
+    with gzip.GzipFile(fileobj=raw, mode='rb') if gzipped else nullcontext(raw) as binary:
+        stream = io.TextIOWrapper(binary, encoding='utf-8')
+        try:
+            yield stream
+        finally:
+            stream.detach()
+
+
+def _read_record(text: str):
+    record = json.loads(text)
+    if isinstance(record, str):
+        return record, None
+    if isinstance(record, dict) and isinstance(record.get('equation'), str):
+        return record['equation'], record.get('id')
+    raise ValueError("Expecting a JSON string or an object with an 'equation' string")
+
+
+def _lines(paths: List[str], fmt: str) -> Iterator[_Line]:
+    # One _Line per equation in the input, read lazily. Blank lines and, in text input, '#' comments are skipped.
+    for path in paths:
+        source = '<stdin>' if path == '-' else path
+        raw = sys.stdin.buffer if path == '-' else open(path, 'rb')
+        try:
+            with _text(raw if isinstance(raw, io.BufferedReader) else io.BufferedReader(raw)) as stream:
+                for number, text in enumerate(stream, 1):
+                    text = text.strip()
+                    if not text or text.startswith('#') and fmt != 'jsonl':
+                        continue
+                    if fmt == 'jsonl' or fmt == 'auto' and text.startswith(('{', '"')):
+                        try:
+                            equation, id_ = _read_record(text)
+                        except ValueError as e:  # json.JSONDecodeError is a ValueError
+                            yield _Line(source, number, text, None, ValueError('Invalid JSON record: ' + str(e)))
+                            continue
+                        yield _Line(source, number, equation, id_, None)
+                    else:
+                        yield _Line(source, number, text, None, None)
+        finally:
+            if path != '-':  # leave stdin itself open
+                raw.close()
+
+
+def _record(line: _Line, result: BalanceResult, error: Optional[Exception]):
+    record = {'source': line.source, 'line': line.number}
+    if line.id is not None:
+        record['id'] = line.id
+    record['equation'] = line.equation
+    if error is None:
+        record['balanced'] = str(result.equation)
+    else:
+        record['error'] = str(error)
+        record['type'] = error.__class__.__name__
+        if isinstance(error, ParseError):
+            record['position'] = error.position
+    return record
+
+
+def run(paths: List[str], out: TextIO, err: TextIO, fmt: str = 'auto', output: str = 'text',
+        workers: int = 0, chunksize: int = 64, method: str = 'integer', cache: Optional[BalanceCache] = None) -> int:
+    # Streams the equations read from paths through balance_many and writes each result as soon as it is ready, in
+    # input order. Only the lines in flight are held in memory. Returns the number of lines that failed.
+    pending: Deque[_Line] = deque()
+
+    def equations():
+        for line in _lines(paths, fmt):
+            pending.append(line)
+            yield '' if line.error else line.equation  # unreadable lines are reported with their own error
+
+    failed = 0
+    for result in balance_many(equations(), executor='process' if workers > 1 else None, chunksize=chunksize,
+                               max_workers=workers or None, method=method, cache=cache):
+        line = pending.popleft()
+        error = line.error or result.error
+        failed += error is not None
+        if output == 'jsonl':
+            out.write(json.dumps(_record(line, result, error)) + '\n')
+        elif error is None:
+            out.write(str(result.equation) + '\n')
+        else:
+            err.write(line.source + ':' + str(line.number) + ': ' + str(error) + '\n')
+    return failed
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(prog='python -m chempy',
+                                     description='Balance chemical equations read one per line, e.g. "H2 + O2 = H2O".')
+    parser.add_argument('files', nargs='*', default=['-'],
+                        help="input files, plain or gzip compressed; '-' or none for stdin")
+    parser.add_argument('-f', '--format', choices=['auto', 'text', 'jsonl'], default='auto',
+                        help='input format: equations as text, JSON strings or objects with an "equation" key '
+                             '(default auto, decided per line)')
+    parser.add_argument('-o', '--output', choices=['text', 'jsonl'], default='text',
+                        help='write balanced equations as text with errors on stderr, or one JSON record per line '
+                             'including errors (default text)')
+    parser.add_argument('-j', '--workers', type=int, default=0, help='worker processes to balance in (default none)')
+    parser.add_argument('--chunksize', type=int, default=64, help='equations sent to a worker at a time')
+    parser.add_argument('--method', choices=['integer', 'sparse', 'sympy'], default='integer', help='balancing method')
+    parser.add_argument('--cache', metavar='PATH', help='SQLite file to cache balances in across runs')
+    args = parser.parse_args(argv)
+
+    cache = BalanceCache(path=args.cache) if args.cache else None
+    try:
+        failed = run(args.files, sys.stdout, sys.stderr, args.format, args.output, args.workers, args.chunksize,
+                     args.method, cache)
+    except (OSError, ValueError) as e:
+        parser.exit(2, parser.prog + ': error: ' + str(e) + '\n')
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        if cache is not None:
+            cache.close()
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,143 @@
+import os
+import sqlite3
+import threading
+from typing import List, NamedTuple, Optional
+
+from chempy.molecule import Molecule
+from chempy.util import LRUCache
+
+
+class BalanceCacheInfo(NamedTuple):
+    hits: int
+    disk_hits: int
+    misses: int
+    maxsize: Optional[int]
+    currsize: int
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.disk_hits + self.misses
+        return (self.hits + self.disk_hits) / lookups if lookups else 0.0
+
+
+def canonical_key(reactants: List[Molecule], products: List[Molecule], coeffs: Optional[List[int]] = None) -> str:
+    # The balance of a simplified equation only depends on which molecules are on which side, so neither the order
+    # of the species nor their coefficients are part of the key. Given whole coefficients, one per molecule of the
+    # reactants then the products, each formula is written after its coefficient as in an equation.
+    if coeffs is None:
+        return ' + '.join(sorted(map(str, reactants))) + ' = ' + ' + '.join(sorted(map(str, products)))
+    split = len(reactants)
+    return _side_key(reactants, coeffs[:split]) + ' = ' + _side_key(products, coeffs[split:])
+
+
+def _side_key(molecules: List[Molecule], coeffs: List[int]) -> str:
+    return ' + '.join(sorted((str(n) if n != 1 else '') + str(mol) for mol, n in zip(molecules, coeffs)))
+
+
+class BalanceCache:
+    # Memoizes balanced coefficients in an in-memory LRU, optionally backed by an SQLite file that any number of
+    # processes can share. Pickles as its settings, so each worker process opens its own connection. Unbalanceable
+    # equations are never cached.
+    def __init__(self, maxsize: Optional[int] = 4096, path: Optional[str] = None):
+        self._memory = LRUCache(maxsize)
+        self._path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid = None
+        self._disk_hits = 0
+        self._misses = 0
+
+    @property
+    def path(self):
+        return self._path
+
+    def _connect(self):
+        # Connections are not carried over into forked processes
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(self._path, timeout=30, check_same_thread=False, isolation_level=None)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('CREATE TABLE IF NOT EXISTS balances (key TEXT PRIMARY KEY, coeffs TEXT NOT NULL)')
+            self._pid = os.getpid()
+        return self._conn
+
+    def get(self, reactants: List[Molecule], products: List[Molecule]) -> Optional[List[int]]:
+        key = canonical_key(reactants, products)
+        coeffs = self._memory.get(key)
+
+        if coeffs is None and self._path is not None:
+            with self._lock:
+                row = self._connect().execute('SELECT coeffs FROM balances WHERE key = ?', (key,)).fetchone()
+            if row is not None:
+                coeffs = dict(zip(sorted(map(str, reactants)) + sorted(map(str, products)),
+                                  map(int, row[0].split())))
+                self._memory.put(key, coeffs)
+                with self._lock:
+                    self._disk_hits += 1
+
+        if coeffs is None:
+            with self._lock:
+                self._misses += 1
+            return None
+        return [coeffs[str(mol)] for mol in reactants + products]
+
+    def put(self, reactants: List[Molecule], products: List[Molecule], coeffs: List[int]):
+        key = canonical_key(reactants, products)
+        by_mol = dict(zip(map(str, reactants + products), coeffs))
+        self._memory.put(key, by_mol)
+
+        if self._path is not None:
+            value = ' '.join(str(by_mol[mol]) for mol in sorted(map(str, reactants)) + sorted(map(str, products)))
+            with self._lock:
+                self._connect().execute('INSERT OR REPLACE INTO balances VALUES (?, ?)', (key, value))
+
+    def info(self) -> BalanceCacheInfo:
+        memory = self._memory.info()
+        with self._lock:
+            # memory misses that were found on disk are counted as disk hits instead
+            return BalanceCacheInfo(memory.hits, self._disk_hits, self._misses, memory.maxsize, memory.currsize)
+
+    def clear(self, disk: bool = False):
+        self._memory.clear()
+        with self._lock:
+            self._disk_hits = self._misses = 0
+            if disk and self._path is not None:
+                self._connect().execute('DELETE FROM balances')
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+
+    def __reduce__(self):
+        if self._path is not None:
+            # Set up the file before any worker opens it, as workers opening a new file at once race for the lock
+            # needed to switch it to WAL
+            with self._lock:
+                self._connect()
+        return _reopen, (self._memory.info().maxsize, self._path)
+
+
+_reopened = {}
+_reopened_lock = threading.Lock()
+
+
+def _forget_reopened():
+    # A forked child starts with no caches of its own; those of the parent are never looked up again
+    global _reopened_lock
+    _reopened.clear()
+    _reopened_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_forget_reopened)
+
+
+def _reopen(maxsize: Optional[int], path: Optional[str]):
+    # Unpickled caches with the same settings share one instance per process, so a worker keeps its memory tier
+    # and connection across all the tasks it receives
+    with _reopened_lock:
+        key = (maxsize, path)
+        if key not in _reopened:
+            _reopened[key] = BalanceCache(maxsize, path)
+        return _reopened[key]
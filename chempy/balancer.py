@@ -0,0 +1,282 @@
+import heapq
+import math
+from functools import reduce
+from time import perf_counter
+from typing import Dict, List, Tuple
+
+from chempy import instrument
+from chempy.molecule import Molecule, element_index, element_symbol
+
+
+ELECTRON = 'e'
+_electron = element_index(ELECTRON)
+
+
+def _reduce_row(row: List[int]):
+    gcd = reduce(math.gcd, row, 0)
+    return [x // gcd for x in row] if gcd > 1 else row
+
+
+def composition_matrix(reactants: List[Molecule], products: List[Molecule]) -> Tuple[List[str], List[List[int]]]:
+    # One row per element (plus one for charge if any species is charged), one column per species.
+    # Product columns are negated so that a balanced equation lies in the null space of the matrix.
+    # Electrons are only accounted for through the charge row.
+    molecules = reactants + products
+    signs = [1] * len(reactants) + [-1] * len(products)
+
+    # Element indices present, in order of first appearance, mapped to their row
+    rows_of = {}
+    for mol in molecules:
+        comp = mol.composition
+        for i in range(0, len(comp), 2):
+            if comp[i] not in rows_of and comp[i] != _electron:
+                rows_of[comp[i]] = len(rows_of)
+
+    rows = [[0] * len(molecules) for _ in rows_of]
+    for col, (mol, sign) in enumerate(zip(molecules, signs)):
+        comp = mol.composition
+        for i in range(0, len(comp), 2):
+            row = rows_of.get(comp[i])
+            if row is not None:
+                rows[row][col] = sign * comp[i + 1]
+
+    keys = [element_symbol(index) for index in rows_of]
+    if any(mol.charge for mol in molecules):
+        keys.append('charge')
+        rows.append([sign * mol.charge for mol, sign in zip(molecules, signs)])
+
+    return keys, rows
+
+
+def echelon(rows: List[List[int]], ncols: int) -> Tuple[List[List[int]], List[int]]:
+    # Fraction-free Gauss-Jordan elimination. Rows stay integral and are kept primitive (gcd 1), so entries never
+    # grow beyond what the reduced form itself requires.
+    rows = [_reduce_row(list(row)) for row in rows if any(row)]
+    pivots: List[int] = []
+    rank = 0
+
+    for col in range(ncols):
+        pivot = next((i for i in range(rank, len(rows)) if rows[i][col]), None)
+        if pivot is None:
+            continue
+        rows[rank], rows[pivot] = rows[pivot], rows[rank]
+        prow = rows[rank]
+        p = prow[col]
+        for i, row in enumerate(rows):
+            f = row[col]
+            if i != rank and f:
+                rows[i] = _reduce_row([p * x - f * y for x, y in zip(row, prow)])
+        pivots.append(col)
+        rank += 1
+
+    return rows[:rank], pivots
+
+
+def nullspace(rows: List[List[int]], ncols: int) -> List[List[int]]:
+    # Primitive integer basis of the null space, one vector per free column
+    started = perf_counter() if instrument.enabled else None
+    try:
+        reduced, pivots = echelon(rows, ncols)
+        return echelon_nullspace(reduced, pivots, ncols)
+    finally:
+        if started is not None:
+            instrument.stage('elimination', started)
+
+
+def echelon_nullspace(reduced: List[List[int]], pivots: List[int], ncols: int) -> List[List[int]]:
+    # nullspace from rows already in reduced echelon form, pivots[i] being the pivot column of reduced[i]
+    basis = []
+    pivot_cols = set(pivots)
+
+    for free in range(ncols):
+        if free in pivot_cols:
+            continue
+        scale = reduce(lambda a, b: a * b // math.gcd(a, b),
+                       (abs(row[pc]) for row, pc in zip(reduced, pivots) if row[free]), 1)
+        vec = [0] * ncols
+        vec[free] = scale
+        for row, pc in zip(reduced, pivots):
+            vec[pc] = -row[free] * scale // row[pc]
+        basis.append(_reduce_row(vec))
+
+    return basis
+
+
+class NonUniqueBalanceError(ValueError):
+    # The equation balances in more than one independent way. basis holds a primitive integer basis of all the
+    # solutions, each a coefficient vector over the species with products counted negatively.
+    def __init__(self, basis: List[List[int]]):
+        super().__init__('Equation has no unique balance, ' + str(len(basis)) + ' independent solutions found')
+        self.basis = basis
+
+    def __reduce__(self):
+        return self.__class__, (self.basis,)
+
+
+def sparse_composition_matrix(reactants: List[Molecule], products: List[Molecule]) \
+        -> Tuple[List[str], List[Dict[int, int]]]:
+    # composition_matrix with each row stored as a column to nonzero entry mapping
+    molecules = reactants + products
+    rows_of: Dict[int, int] = {}
+    rows: List[Dict[int, int]] = []
+
+    for col, mol in enumerate(molecules):
+        sign = 1 if col < len(reactants) else -1
+        comp = mol.composition
+        for i in range(0, len(comp), 2):
+            if comp[i] == _electron:
+                continue
+            row = rows_of.get(comp[i])
+            if row is None:
+                row = rows_of[comp[i]] = len(rows)
+                rows.append({})
+            rows[row][col] = sign * comp[i + 1]
+
+    keys = [element_symbol(index) for index in rows_of]
+    charges = {col: (1 if col < len(reactants) else -1) * mol.charge for col, mol in enumerate(molecules) if mol.charge}
+    if charges:
+        keys.append('charge')
+        rows.append(charges)
+
+    return keys, rows
+
+
+def _reduce_sparse(row: Dict[int, int]):
+    gcd = reduce(math.gcd, row.values(), 0)
+    return {col: x // gcd for col, x in row.items()} if gcd > 1 else row
+
+
+def _components(rows: List[Dict[int, int]], ncols: int) -> List[Tuple[List[int], List[int]]]:
+    # Species connected through shared elements, as (row ids, columns) blocks that can be solved independently
+    parent = list(range(ncols))
+
+    def find(x: int):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for row in rows:
+        cols = iter(row)
+        first = find(next(cols))
+        for col in cols:
+            root = find(col)
+            if root != first:
+                parent[root] = first
+
+    blocks: Dict[int, Tuple[List[int], List[int]]] = {}
+    for col in range(ncols):
+        blocks.setdefault(find(col), ([], []))[1].append(col)
+    for i, row in enumerate(rows):
+        blocks[find(next(iter(row)))][0].append(i)
+    return list(blocks.values())
+
+
+def _sparse_block_nullspace(rows: List[Dict[int, int]], cols: List[int]) -> List[Dict[int, int]]:
+    # Fraction-free Gauss-Jordan elimination on sparse rows. Each step pivots on the sparsest remaining row, at its
+    # column shared with the fewest rows, which keeps fill-in low for the block structure of chemical equations.
+    rows = [_reduce_sparse(row) for row in rows]
+    rows_with: Dict[int, set] = {col: set() for col in cols}
+    for i, row in enumerate(rows):
+        for col in row:
+            rows_with[col].add(i)
+
+    # Remaining rows in a heap by length. A row is pushed again whenever elimination changes its length, and the
+    # entries left behind for it are skipped once popped.
+    pivot_of: Dict[int, int] = {}  # row id -> pivot column
+    remaining = set(range(len(rows)))
+    by_length = [(len(row), i) for i, row in enumerate(rows)]
+    heapq.heapify(by_length)
+    while remaining:
+        length, r = heapq.heappop(by_length)
+        if r not in remaining or length != len(rows[r]):
+            continue
+        remaining.discard(r)
+        prow = rows[r]
+        if not prow:
+            continue
+        pc = min(prow, key=lambda col: len(rows_with[col]))
+        p = prow[pc]
+        for i in list(rows_with[pc]):
+            if i == r:
+                continue
+            row = rows[i]
+            f = row[pc]
+            new = {col: p * x for col, x in row.items()}
+            for col, y in prow.items():
+                x = new.get(col, 0) - f * y
+                if x:
+                    new[col] = x
+                else:
+                    new.pop(col, None)
+            new = _reduce_sparse(new)
+            for col in row.keys() - new.keys():
+                rows_with[col].discard(i)
+            for col in new.keys() - row.keys():
+                rows_with[col].add(i)
+            rows[i] = new
+            if i in remaining and len(new) != len(row):
+                heapq.heappush(by_length, (len(new), i))
+        pivot_of[r] = pc
+
+    pivot_cols = set(pivot_of.values())
+    basis = []
+    for free in cols:
+        if free in pivot_cols:
+            continue
+        dependent = [(i, pivot_of[i]) for i in rows_with[free] if i in pivot_of]
+        scale = reduce(lambda a, b: a * b // math.gcd(a, b), (abs(rows[i][pc]) for i, pc in dependent), 1)
+        vec = {free: scale}
+        for i, pc in dependent:
+            vec[pc] = -rows[i][free] * scale // rows[i][pc]
+        basis.append(_reduce_sparse(vec))
+    return basis
+
+
+def sparse_nullspace(rows: List[Dict[int, int]], ncols: int) -> List[List[int]]:
+    # Null space of a sparse integer matrix, solved independently for each block of species sharing elements
+    started = perf_counter() if instrument.enabled else None
+    try:
+        rows = [row for row in rows if row]
+        basis = []
+        for block_rows, cols in _components(rows, ncols):
+            for vec in _sparse_block_nullspace([rows[i] for i in block_rows], cols):
+                dense = [0] * ncols
+                for col, x in vec.items():
+                    dense[col] = x
+                basis.append(dense)
+        return basis
+    finally:
+        if started is not None:
+            instrument.stage('elimination', started)
+
+
+def balance_coefficients(reactants: List[Molecule], products: List[Molecule], sparse: bool = False) -> List[int]:
+    ncols = len(reactants) + len(products)
+    if sparse:
+        _, rows = sparse_composition_matrix(reactants, products)
+        if instrument.enabled:
+            instrument.emit(instrument.MATRIX, 'composition', (len(rows), ncols, sum(len(row) for row in rows)))
+        basis = sparse_nullspace(rows, ncols)
+    else:
+        _, rows = composition_matrix(reactants, products)
+        if instrument.enabled:
+            instrument.emit(instrument.MATRIX, 'composition',
+                            (len(rows), ncols, sum(1 for row in rows for x in row if x)))
+        basis = nullspace(rows, ncols)
+    return positive_solution(basis)
+
+
+def positive_solution(basis: List[List[int]]) -> List[int]:
+    # The balance described by a null space basis, which must be unique and positive
+    if not basis:
+        raise ValueError('Equation cannot be balanced')
+    if len(basis) > 1:
+        raise NonUniqueBalanceError(basis)
+
+    sol = basis[0]
+    if all(x <= 0 for x in sol):
+        sol = [-x for x in sol]
+    if any(x <= 0 for x in sol):
+        raise ValueError('Equation cannot be balanced with positive coefficients')
+    return sol
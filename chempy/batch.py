@@ -0,0 +1,107 @@
+import os
+from collections import deque
+from concurrent.futures import Executor, FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from itertools import islice
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from chempy.balance_cache import BalanceCache
+from chempy.equation import Equation
+
+
+class BalanceResult(NamedTuple):
+    index: int
+    source: Union[str, Equation]
+    equation: Optional[Equation]
+    error: Optional[Exception]
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def _balance_one(index: int, source: Union[str, Equation], method: str, cache: Optional[BalanceCache]):
+    try:
+        eq = Equation.from_str(source) if isinstance(source, str) else source
+        return BalanceResult(index, source, eq.balance(method, cache), None)
+    except Exception as e:  # failures are reported per equation instead of aborting the batch
+        return BalanceResult(index, source, None, e)
+
+
+def balance_chunk(chunk: List[Tuple[int, Union[str, Equation]]], method: str = 'integer',
+                  cache: Optional[BalanceCache] = None) -> List[BalanceResult]:
+    # BalanceResults of (index, equation) pairs in one call, the unit of work sent to a worker
+    return [_balance_one(index, source, method, cache) for index, source in chunk]
+
+
+def _chunks(equations: Iterable[Union[str, Equation]], chunksize: int):
+    it = enumerate(equations)
+    while True:
+        chunk = list(islice(it, chunksize))
+        if not chunk:
+            return
+        yield chunk
+
+
+def balance_many(equations: Iterable[Union[str, Equation]],
+                 executor: Union[str, Executor, None] = None,
+                 chunksize: int = 64,
+                 ordered: bool = True,
+                 max_workers: Optional[int] = None,
+                 method: str = 'integer',
+                 cache: Optional[BalanceCache] = None) -> Iterator[BalanceResult]:
+    # Balances equations (or their strings) as they are read from the iterable, yielding a BalanceResult for each.
+    # executor is None to balance in this thread, 'process' or 'thread' for a pool created (and shut down) here,
+    # or an Executor owned by the caller. Only a bounded number of chunks are in flight at once, so the input can be
+    # a stream of any length. A cache is used by every worker; worker processes each get their own memory tier
+    # and share only its SQLite file.
+    if chunksize < 1:
+        raise ValueError('Chunk size must be positive')
+
+    if executor is None:
+        for chunk in _chunks(equations, chunksize):
+            yield from balance_chunk(chunk, method, cache)
+        return
+
+    if isinstance(executor, str):
+        if executor == 'process':
+            pool = ProcessPoolExecutor(max_workers)
+        elif executor == 'thread':
+            pool = ThreadPoolExecutor(max_workers)
+        else:
+            raise ValueError("Unknown executor '" + executor + "', expecting 'process' or 'thread'")
+        try:
+            yield from _balance_pooled(equations, pool, chunksize, ordered, max_workers, method, cache)
+        finally:
+            pool.shutdown(cancel_futures=True)
+    elif isinstance(executor, Executor):
+        yield from _balance_pooled(equations, executor, chunksize, ordered, max_workers, method, cache)
+    else:
+        raise TypeError("Expecting type 'str' or 'Executor', got '" + str(type(executor).__name__) + "' instead")
+
+
+def _balance_pooled(equations, pool: Executor, chunksize: int, ordered: bool, max_workers: Optional[int], method: str,
+                    cache: Optional[BalanceCache]):
+    limit = 2 * (max_workers or os.cpu_count() or 1)
+    chunks = _chunks(equations, chunksize)
+    pending = deque()
+
+    def submit():
+        chunk = next(chunks, None)
+        if chunk is not None:
+            pending.append(pool.submit(balance_chunk, chunk, method, cache))
+        return chunk is not None
+
+    while len(pending) < limit and submit():
+        pass
+
+    while pending:
+        if ordered:
+            done = [pending.popleft()]
+        else:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            done = [future for future in pending if future in finished]
+            for future in done:
+                pending.remove(future)
+        for future in done:
+            submit()
+            yield from future.result()
@@ -0,0 +1,118 @@
+from fractions import Fraction
+from typing import List, Tuple
+
+from chempy import rational
+from chempy.equation import Equation, Species
+from chempy.molecule import Molecule
+
+# Compact binary encodings. Integers are LEB128 varints, zigzag encoded when signed; strings are a byte length
+# followed by utf-8. A molecule is its formula, charge (signed) and states (a count, then each state). An equation
+# is its reactant and product counts followed by each species as a molecule and a coefficient numerator (signed)
+# and denominator.
+
+
+def _put_uint(out: bytearray, value: int):
+    while value > 0x7f:
+        out.append(value & 0x7f | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _put_int(out: bytearray, value: int):
+    _put_uint(out, value << 1 if value >= 0 else (-value << 1) - 1)
+
+
+def _put_str(out: bytearray, value: str):
+    data = value.encode()
+    _put_uint(out, len(data))
+    out += data
+
+
+def _get_uint(data, pos: int) -> Tuple[int, int]:
+    byte = data[pos]
+    if byte < 0x80:
+        return byte, pos + 1
+    value, shift = 0, 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def _get_int(data, pos: int) -> Tuple[int, int]:
+    value, pos = _get_uint(data, pos)
+    return (value >> 1) if not value & 1 else -((value + 1) >> 1), pos
+
+
+def _get_str(data, pos: int) -> Tuple[str, int]:
+    size, pos = _get_uint(data, pos)
+    return bytes(data[pos:pos + size]).decode(), pos + size
+
+
+def _put_molecule(out: bytearray, mol: Molecule):
+    _put_str(out, mol.formula)
+    _put_int(out, mol.charge)
+    states = mol.states
+    _put_uint(out, len(states))
+    for state in states:
+        _put_str(out, state)
+
+
+def _get_molecule(data, pos: int) -> Tuple[Molecule, int]:
+    formula, pos = _get_str(data, pos)
+    charge, pos = _get_int(data, pos)
+    count, pos = _get_uint(data, pos)
+    states: List[str] = []
+    for _ in range(count):
+        state, pos = _get_str(data, pos)
+        states.append(state)
+    return Molecule.interned(formula, charge, states), pos
+
+
+def encode_molecule(mol: Molecule) -> bytes:
+    out = bytearray()
+    _put_molecule(out, mol)
+    return bytes(out)
+
+
+def decode_molecule(data: bytes) -> Molecule:
+    try:
+        mol, pos = _get_molecule(data, 0)
+    except IndexError:
+        raise ValueError('Truncated encoded molecule') from None
+    if pos != len(data):
+        raise ValueError('Trailing bytes after encoded molecule')
+    return mol
+
+
+def encode_equation(eq: Equation) -> bytes:
+    out = bytearray()
+    _put_uint(out, len(eq.reactants))
+    _put_uint(out, len(eq.products))
+    for sp in eq.reactants + eq.products:
+        _put_molecule(out, sp.molecule)
+        _put_int(out, sp.coeff.numerator)
+        _put_uint(out, sp.coeff.denominator)
+    return bytes(out)
+
+
+def decode_equation(data: bytes) -> Equation:
+    try:
+        nreactants, pos = _get_uint(data, 0)
+        nproducts, pos = _get_uint(data, pos)
+        species = []
+        for _ in range(nreactants + nproducts):
+            mol, pos = _get_molecule(data, pos)
+            num, pos = _get_int(data, pos)
+            denom, pos = _get_uint(data, pos)
+            species.append(Species._make(mol, rational.fraction(num) if denom == 1 else Fraction(num, denom)))
+    except IndexError:
+        raise ValueError('Truncated encoded equation') from None
+    except ZeroDivisionError:
+        raise ValueError('Invalid coefficient in encoded equation') from None
+    if pos != len(data):
+        raise ValueError('Trailing bytes after encoded equation')
+    return Equation(species[:nreactants], species[nreactants:])
@@ -0,0 +1,181 @@
+import math
+from fractions import Fraction
+from typing import Dict, Iterable, List, Union
+
+import numpy as np
+
+from chempy.balancer import ELECTRON
+from chempy.equation import Equation
+from chempy.molecule import Molecule, element_index, element_symbol
+
+_INT64_MAX = int(np.iinfo(np.int64).max)
+
+
+class Imbalance:
+    # Residuals of a batch of equations: what the products gain over the reactants for each element and charge.
+    # Only nonzero residuals are stored, as (equation, key, numerator) entries sorted by equation, with one
+    # denominator per equation. Numerators and denominators are int64, or Python ints in an object array for batches
+    # whose values could overflow int64.
+    def __init__(self, keys: List[str], balanced: np.ndarray, rows: np.ndarray, cols: np.ndarray, nums: np.ndarray,
+                 denoms: np.ndarray):
+        self.keys = keys
+        self.balanced = balanced
+        self.rows = rows
+        self.cols = cols
+        self.nums = nums
+        self.denoms = denoms
+
+    def __len__(self):
+        return len(self.balanced)
+
+    def residual(self, i: int) -> Dict[str, Fraction]:
+        # Same as Equation.imbalance for equation i
+        start, end = np.searchsorted(self.rows, [i, i + 1])
+        denom = int(self.denoms[i])
+        return {self.keys[int(col)]: Fraction(int(num), denom)
+                for col, num in zip(self.cols[start:end], self.nums[start:end])}
+
+    def dense(self) -> np.ndarray:
+        # equations by keys array of float residuals
+        out = np.zeros((len(self.balanced), len(self.keys)))
+        out[self.rows, self.cols] = self._values()
+        return out
+
+    def sparse(self):
+        from chempy.network import scipy_sparse
+        return scipy_sparse().csr_matrix((self._values(), (self.rows, self.cols)),
+                                         shape=(len(self.balanced), len(self.keys)))
+
+    def _values(self) -> np.ndarray:
+        return (self.nums / self.denoms[self.rows]).astype(np.float64)
+
+
+def _pack(equations: Iterable[Equation]):
+    # Flattens a batch into per species arrays (equation, molecule id, signed coefficient scaled to one integer
+    # denominator per equation) and the composition of each distinct molecule in CSR form
+    mol_ids: Dict[Molecule, int] = {}
+    comp_ptr = [0]
+    comp_elems: List[int] = []
+    comp_counts: List[int] = []
+    charges: List[int] = []
+    sp_eq: List[int] = []
+    sp_mol: List[int] = []
+    sp_coeff: List[int] = []
+    n = 0
+
+    electron = element_index(ELECTRON)
+    sp_den: List[int] = []
+    append_eq, append_mol, append_coeff, append_den = sp_eq.append, sp_mol.append, sp_coeff.append, sp_den.append
+    for i, eq in enumerate(equations):
+        for sign, side in ((-1, eq.reactants), (1, eq.products)):
+            for sp in side:
+                mol = sp.molecule
+                mol_id = mol_ids.get(mol)
+                if mol_id is None:
+                    mol_id = mol_ids[mol] = len(charges)
+                    comp = mol.composition
+                    for k in range(0, len(comp), 2):
+                        if comp[k] != electron:
+                            comp_elems.append(comp[k])
+                            comp_counts.append(comp[k + 1])
+                    comp_ptr.append(len(comp_elems))
+                    charges.append(mol.charge)
+                coeff = sp.coeff
+                append_eq(i)
+                append_mol(mol_id)
+                append_coeff(sign * coeff.numerator)
+                append_den(coeff.denominator)
+        n = i + 1
+
+    sp_eq = np.asarray(sp_eq, dtype=np.intp)
+    head = (sp_eq, np.asarray(sp_mol, dtype=np.intp))
+    csr = (np.asarray(comp_ptr, dtype=np.intp), np.asarray(comp_elems, dtype=np.intp))
+    try:
+        nums, dens = np.asarray(sp_coeff, dtype=np.int64), np.asarray(sp_den, dtype=np.int64)
+        counts, qs = np.asarray(comp_counts, dtype=np.int64), np.asarray(charges, dtype=np.int64)
+    except OverflowError:
+        nums = None
+    if nums is not None and _fits_int64(sp_eq, nums, dens, counts, qs):
+        # Scale every coefficient to the least common denominator of its equation
+        denoms = np.ones(n, dtype=np.int64)
+        fractional = dens != 1
+        if fractional.any():
+            np.lcm.at(denoms, sp_eq[fractional], dens[fractional])
+            nums = nums * (denoms[sp_eq] // dens)
+        return head + (nums,) + csr + (counts, qs, denoms)
+
+    # Same with exact Python ints in object arrays
+    denoms = [1] * n
+    for i, den in zip(sp_eq.tolist(), sp_den):
+        if den != 1:
+            denoms[i] = math.lcm(denoms[i], den)
+    sp_coeff = [num * (denoms[i] // den) for i, num, den in zip(sp_eq.tolist(), sp_coeff, sp_den)]
+    return head + (_objects(sp_coeff),) + csr + (_objects(comp_counts), _objects(charges), _objects(denoms))
+
+
+def _fits_int64(sp_eq: np.ndarray, nums: np.ndarray, dens: np.ndarray, counts: np.ndarray, charges: np.ndarray):
+    # Whether common denominators, scaled coefficients and residual sums all stay within int64. A common
+    # denominator is at most the product of the denominators of its equation, and a residual sums one coefficient
+    # times a count per species of the equation.
+    if not len(nums):
+        return True
+    max_species = int(np.bincount(sp_eq).max())
+    max_den = int(dens.max())
+    common = max_den ** max_species if max_den != 1 else 1
+    max_num = max(-int(nums.min()), int(nums.max()))
+    max_count = max(int(counts.max()) if len(counts) else 0, -int(charges.min()), int(charges.max()))
+    return common <= _INT64_MAX and max_species * max_num * common * max_count <= _INT64_MAX
+
+
+def _objects(values: List[int]) -> np.ndarray:
+    out = np.empty(len(values), dtype=object)
+    out[:] = values
+    return out
+
+
+def _imbalance_many(equations: Iterable[Equation]) -> Imbalance:
+    sp_eq, sp_mol, sp_coeff, comp_ptr, comp_elems, comp_counts, charges, denoms = _pack(equations)
+    n = len(denoms)
+
+    # One entry per (species, element): repeat each species once per element of its molecule
+    lengths = comp_ptr[sp_mol + 1] - comp_ptr[sp_mol]
+    owner = np.repeat(np.arange(len(sp_mol)), lengths)
+    offsets = np.arange(len(owner)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    entries = comp_ptr[sp_mol[owner]] + offsets
+
+    element_ids, local = np.unique(comp_elems, return_inverse=True)
+    keys = [element_symbol(int(i)) for i in element_ids] + ['charge']
+    charge_col = len(keys) - 1
+
+    charged = charges[sp_mol] != 0
+    rows = np.concatenate([sp_eq[owner], sp_eq[charged]])
+    cols = np.concatenate([local[entries], np.full(int(charged.sum()), charge_col, dtype=np.intp)])
+    values = np.concatenate([sp_coeff[owner] * comp_counts[entries], sp_coeff[charged] * charges[sp_mol[charged]]])
+
+    # Sum entries sharing an (equation, key) cell, keeping the nonzero sums
+    flat = rows * len(keys) + cols
+    order = np.argsort(flat, kind='stable')
+    flat = flat[order]
+    starts = np.flatnonzero(np.r_[True, flat[1:] != flat[:-1]]) if len(flat) else np.zeros(0, dtype=np.intp)
+    sums = np.add.reduceat(values[order], starts) if len(flat) else np.zeros(0, dtype=values.dtype)
+    cells = flat[starts]
+    nonzero = sums != 0
+    rows, cols, sums = cells[nonzero] // len(keys), cells[nonzero] % len(keys), sums[nonzero]
+
+    balanced = np.ones(n, dtype=bool)
+    balanced[rows] = False
+    return Imbalance(keys, balanced, rows, cols, sums, denoms)
+
+
+def imbalance(equations: Union[Equation, Iterable[Equation]]):
+    # Equation.imbalance for one equation, an Imbalance for a batch
+    if isinstance(equations, Equation):
+        return equations.imbalance()
+    return _imbalance_many(equations)
+
+
+def is_balanced(equations: Union[Equation, Iterable[Equation]]):
+    # A bool for one equation, a bool array for a batch
+    if isinstance(equations, Equation):
+        return equations.is_balanced()
+    return _imbalance_many(equations).balanced
@@ -0,0 +1,101 @@
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from chempy import balance_cache, rational
+from chempy.equation import Equation
+
+
+def canonical_key(eq: Union[str, Equation], directed: bool = True) -> str:
+    # Key shared by all equations describing the same reaction: species in any order, coefficients scaled by any
+    # factor, and species found on both sides. It is balance_cache.canonical_key with the whole coefficients in
+    # lowest terms once species found on both sides cancel. Unless directed, a reaction and its reverse share a key
+    # too.
+    if isinstance(eq, str):
+        eq = Equation.from_str(eq)
+    reactants, products = eq.net()
+    coeffs, _ = rational.primitive(list(reactants.values()) + list(products.values()))
+    key = balance_cache.canonical_key(list(reactants), list(products), coeffs)
+    if directed:
+        return key
+    reverse = balance_cache.canonical_key(list(products), list(reactants), coeffs[len(reactants):] +
+                                          coeffs[:len(reactants)])
+    return min(key, reverse)
+
+
+class Group(NamedTuple):
+    id: int
+    representative: Equation  # first equation of the group seen
+    first: int  # position of the representative in the input
+    count: int
+    members: Optional[List[int]]  # positions of every equation in the group, when kept
+
+
+class EquivalenceIndex:
+    # Groups equations by canonical_key in one hashing pass. Only a representative and a count are kept per group
+    # unless keep_members, so memory grows with the number of distinct reactions rather than with the input.
+    def __init__(self, directed: bool = True, keep_members: bool = False):
+        self._directed = directed
+        self._keep_members = keep_members
+        self._ids: Dict[str, int] = {}
+        self._representatives: List[Equation] = []
+        self._firsts: List[int] = []
+        self._counts: List[int] = []
+        self._members: List[List[int]] = []
+        self._seen = 0
+
+    def add(self, eq: Union[str, Equation]) -> Tuple[int, bool]:
+        # Group id of the equation, and whether it is the first of its group
+        if isinstance(eq, str):
+            eq = Equation.from_str(eq)
+        key = canonical_key(eq, self._directed)
+        position = self._seen
+        self._seen += 1
+
+        gid = self._ids.get(key)
+        new = gid is None
+        if new:
+            gid = self._ids[key] = len(self._representatives)
+            self._representatives.append(eq)
+            self._firsts.append(position)
+            self._counts.append(0)
+            if self._keep_members:
+                self._members.append([])
+        self._counts[gid] += 1
+        if self._keep_members:
+            self._members[gid].append(position)
+        return gid, new
+
+    def extend(self, equations: Iterable[Union[str, Equation]]):
+        for eq in equations:
+            self.add(eq)
+
+    def group_of(self, eq: Union[str, Equation]) -> Optional[int]:
+        return self._ids.get(canonical_key(eq, self._directed))
+
+    def group(self, gid: int) -> Group:
+        return Group(gid, self._representatives[gid], self._firsts[gid], self._counts[gid],
+                     list(self._members[gid]) if self._keep_members else None)
+
+    def groups(self) -> Iterator[Group]:
+        return (self.group(gid) for gid in range(len(self._representatives)))
+
+    @property
+    def seen(self):
+        return self._seen
+
+    def __contains__(self, eq: Union[str, Equation]):
+        return self.group_of(eq) is not None
+
+    def __len__(self):
+        return len(self._representatives)
+
+
+def unique(equations: Iterable[Union[str, Equation]], directed: bool = True) -> Iterator[Equation]:
+    # First equation of each group, yielded as soon as it is read; only the keys seen so far are kept
+    seen = set()
+    for eq in equations:
+        if isinstance(eq, str):
+            eq = Equation.from_str(eq)
+        key = canonical_key(eq, directed)
+        if key not in seen:
+            seen.add(key)
+            yield eq
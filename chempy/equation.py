@@ -2,49 +2,74 @@ import math
 from collections import Counter
 from fractions import Fraction
 from functools import reduce
-from itertools import tee, islice, zip_longest
-from typing import List, Union, Dict
+from time import perf_counter
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Union
 
-from sympy import Matrix
+from chempy import balancer, instrument, rational
+from chempy.molecule import SPECIES, Molecule, element_symbol, position, species_molecule
+from chempy.rational import as_fraction, parse as _parse_coeff
+from chempy.util import ParseError
 
-from chempy.molecule import Molecule
-from chempy.util import tokenize
+if TYPE_CHECKING:
+    from chempy.balance_cache import BalanceCache
 
 
-def _parse_coeff(coeff: str = ''):
-    if not coeff:
-        return Fraction(1)
+def _sympy_coefficients(reactants: List[Molecule], products: List[Molecule]):
+    from sympy import Matrix  # deferred, sympy is slow to import and only needed by this backend
 
-    coeff = ''.join(coeff.split())
-    if coeff[0] == '-':
-        raise ValueError('Coefficient cannot be negative')
+    elements, rows = balancer.composition_matrix(reactants, products)
 
-    if coeff.isnumeric():
-        frac = Fraction(int(coeff))
-    elif '.' in coeff:
-        ratio = float(coeff).as_integer_ratio()
-        frac = Fraction(ratio[0], ratio[1])
-    elif '/' in coeff:
-        ratio = coeff.split('/')
-        if len(ratio) != 2:
-            raise ValueError('Invalid coefficient numerical value')
-        frac = Fraction(int(ratio[0]), int(ratio[1]))
-    else:
-        raise ValueError('Invalid coefficient numerical value')
-    return frac
+    # Use sympy.Matrix to find null space of matrix whose values are to be used as balanced coefficients
+    mat_list = [list(col) for col in zip(*rows)] if rows else [[] for _ in reactants + products]
+    eye = Matrix.eye(len(mat_list))
+    mat_list = [row + eye.row(i).tolist()[0] for i, row in enumerate(mat_list)]
+    mat = Matrix(mat_list).rref()[0]
+
+    # Rows left without elements span the null space, each is scaled to the smallest whole numbers
+    basis = []
+    for i in range(mat.rows):
+        row = mat.row(i).tolist()[0]
+        if any(row[:len(elements)]):
+            continue
+        sols = [Fraction(int(coeff.p), int(coeff.q)) for coeff in row[len(elements):]]
+        lcm = reduce(lambda a, b: a * b // math.gcd(a, b), [sol.denominator for sol in sols], 1)
+        sols = [int(sol * lcm) for sol in sols]
+        gcd = reduce(math.gcd, sols, 0)
+        basis.append([sol // gcd for sol in sols] if gcd > 1 else sols)
+
+    return balancer.positive_solution(basis)
 
 
 class Species:
-    def __init__(self, molecule: Molecule, coeff: Union[int, float, str, Fraction] = Fraction(1)):
-        num, denom = float(coeff).as_integer_ratio() if isinstance(coeff, float) else (0, 1)
-        self._coeff = coeff if isinstance(coeff, Fraction) \
-            else _parse_coeff(coeff) if isinstance(coeff, str) \
-            else Fraction(num, denom) if isinstance(coeff, float) \
-            else Fraction(coeff)
-        self._molecule = molecule
-        self._atoms = self._molecule.elements
-        for key in self._atoms.keys():
-            self._atoms[key] *= self._coeff
+    # Immutable; atoms are derived from the shared molecule composition on access instead of being stored
+    __slots__ = ('_molecule', '_coeff')
+
+    def __init__(self, molecule: Union[Molecule, str], coeff: Union[int, float, str, Fraction] = Fraction(1)):
+        if isinstance(molecule, str):
+            molecule = Molecule.complete_formula(molecule)
+        object.__setattr__(self, '_molecule', molecule)
+        object.__setattr__(self, '_coeff', coeff if type(coeff) is Fraction else as_fraction(coeff))
+        if instrument.enabled:
+            instrument.count('species')
+
+    @classmethod
+    def _make(cls, molecule: Molecule, coeff: Fraction):
+        # Species from an already interned molecule and exact coefficient, skipping validation
+        sp = object.__new__(cls)
+        object.__setattr__(sp, '_molecule', molecule)
+        object.__setattr__(sp, '_coeff', coeff)
+        if instrument.enabled:
+            instrument.count('species')
+        return sp
+
+    def __setattr__(self, name, value):
+        raise AttributeError("'" + self.__class__.__name__ + "' object is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("'" + self.__class__.__name__ + "' object is immutable")
+
+    def __reduce__(self):
+        return _unpickle_species, (self._molecule, self._coeff.numerator, self._coeff.denominator)
 
     @property
     def coeff(self):
@@ -56,7 +81,9 @@ class Species:
 
     @property
     def atoms(self):
-        return self._atoms
+        coeff = self._coeff
+        comp = self._molecule.composition
+        return Counter(dict(zip(map(element_symbol, comp[0::2]), (count * coeff for count in comp[1::2]))))
 
     def as_dict(self):
         return {self._molecule: self._coeff}
@@ -82,52 +109,84 @@ class Species:
         return self.__class__.__name__ + '(coeff=' + str(self._coeff) + ', molecule=' + repr(self._molecule) + ')'
 
 
+_ONE = Fraction(1)
+
+_STREAM_LENGTH = 1 << 20
+
+
+def _parse_equation(src: str):
+    compact = ''.join(src.split())
+    reactants: List[Species] = []
+    products: List[Species] = []
+    side = reactants
+    pos = 0
+
+    while True:
+        match = SPECIES.match(compact, pos)
+        coeff = match.group('coeff')
+        mol = species_molecule(src, match)
+
+        side.append(Species(mol, _ONE if coeff is None else
+                            rational.fraction(int(coeff)) if coeff.isdigit() else
+                            _parse_coeff(coeff)))
+
+        pos = match.end()
+        if pos == len(compact):
+            break
+        sep = compact[pos]
+        if sep == '=':
+            if side is products:
+                raise ParseError("Unexpected second '='", position(src, pos))
+            side = products  # switch to products if '=' is encountered
+        elif sep != '+':
+            raise ParseError("Unexpected '" + sep + "'", position(src, pos))
+        pos += 1
+
+    return Equation(reactants, products)
+
+
+def _unpickle_species(molecule: Molecule, numerator: int, denominator: int):
+    coeff = rational.fraction(numerator) if denominator == 1 else Fraction(numerator, denominator)
+    return Species._make(molecule, coeff)
+
+
+def _unpickle_equation(nreactants: int, flat: tuple):
+    fraction, make = rational.fraction, Species._make
+    species = [make(flat[i], fraction(flat[i + 1]) if flat[i + 2] == 1 else Fraction(flat[i + 1], flat[i + 2]))
+               for i in range(0, len(flat), 3)]
+    return Equation(species[:nreactants], species[nreactants:])
+
+
+# Names of the two sides of an equation
+REACTANTS = 'reactants'
+PRODUCTS = 'products'
+
+
 class Equation:
     def __init__(self, reactants: List[Species], products: List[Species]):
         self._reactants = reactants
         self._products = products
 
+    def __reduce__(self):
+        # Pickled as one flat tuple of molecule, numerator and denominator per species; molecules pickle by their
+        # identity and are shared within a pickle
+        flat = tuple(x for sp in self._reactants + self._products
+                     for x in (sp._molecule, sp._coeff.numerator, sp._coeff.denominator))
+        return _unpickle_equation, (len(self._reactants), flat)
+
     @staticmethod
     def from_str(eq: str):
-        toks: List[str] = tokenize(eq)
-        reactants: List[Species] = []
-        products: List[Species] = []
-
-        def get_next(it, window=1):
-            items, nexts = tee(it, 2)
-            nexts = islice(nexts, window, None)
-            return zip_longest(items, nexts)
-
-        def eval_species(start: int, end: int):
-            mol_start = start
-            while not toks[mol_start].isalpha() and mol_start < end:
-                mol_start += 1
-            if mol_start == end:
-                raise ValueError('Invalid equation')
-
-            coeff = ''.join(toks[start:mol_start])
-            mol_toks = toks[mol_start:end]
-            mol = Molecule.complete_formula(''.join(mol_toks))
-            return Species(mol, coeff=coeff)
-
-        ls = reactants
-        prev_plus_index = -1
-        for i, items in enumerate(get_next(toks)):
-            tok, ahead = items
-            try:
-                if tok == '=' or tok == '+' and (ahead.isnumeric() or ahead.isalpha()):
-                    ls += [eval_species(prev_plus_index + 1, i)]
-                    prev_plus_index = i
-                    if tok == '=':  # switch to products if '=' is encountered
-                        if ls is reactants:
-                            ls = products
-                        else:
-                            raise ValueError('Invalid equation')
-            except AttributeError:  # ahead == NoneType has no isnumeric or isalpha
-                break
-        ls += [eval_species(prev_plus_index + 1, len(toks))]
-
-        return Equation(reactants, products)
+        # Very long inputs go through the streaming parser, which gives the same result without copying the input
+        # or holding the tokens of whole formulas
+        started = perf_counter() if instrument.enabled else None
+        try:
+            if len(eq) > _STREAM_LENGTH:
+                from chempy import stream
+                return stream.read_equation(eq)
+            return _parse_equation(eq)
+        finally:
+            if started is not None:
+                instrument.stage('from_str', started)
 
     @staticmethod
     def from_dict(reactants: Dict[Molecule, Fraction], products: Dict[Molecule, Fraction]):
@@ -135,56 +194,89 @@ class Equation:
         ps = [Species(p, products[p]) for p in products]
         return Equation(rs, ps)
 
+    def imbalance(self) -> Dict[str, Fraction]:
+        # Net amount of each element, and of charge, that the products gain over the reactants; only nonzero
+        # amounts are listed. Electrons are accounted for through the charge.
+        net: Dict[str, Fraction] = {}
+        for sign, side in ((-1, self._reactants), (1, self._products)):
+            for sp in side:
+                amount = sign * sp.coeff
+                comp = sp.molecule.composition
+                for i in range(0, len(comp), 2):
+                    elm = element_symbol(comp[i])
+                    if elm != balancer.ELECTRON:
+                        net[elm] = net.get(elm, 0) + amount * comp[i + 1]
+                if sp.molecule.charge:
+                    net['charge'] = net.get('charge', 0) + amount * sp.molecule.charge
+        return {key: Fraction(value) for key, value in net.items() if value}
+
+    def is_balanced(self):
+        return not self.imbalance()
+
+    def coefficients(self) -> Tuple[List[int], int]:
+        # Coefficients of the reactants then the products as integers over their least common denominator
+        return rational.common_denominator(sp._coeff for side in (self._reactants, self._products) for sp in side)
+
+    def net(self) -> Tuple[Dict[Molecule, int], Dict[Molecule, int]]:
+        # Coefficients brought to whole numbers in lowest terms, then summed per molecule on either side with
+        # species found on both sides cancelled, all on one integer vector without building Species
+        nums, _ = self.coefficients()
+        nums, _ = rational.primitive(nums)
+
+        split = len(self._reactants)
+        reactants: Dict[Molecule, int] = {}
+        products: Dict[Molecule, int] = {}
+        for i, sp in enumerate(self._reactants + self._products):
+            side = reactants if i < split else products
+            side[sp._molecule] = side.get(sp._molecule, 0) + nums[i]
+        for mol in reactants.keys() & products.keys():
+            common = min(reactants[mol], products[mol])
+            reactants[mol] -= common
+            products[mol] -= common
+
+        return ({mol: n for mol, n in reactants.items() if n > 0},
+                {mol: n for mol, n in products.items() if n > 0})
+
     def simplify(self):
-        species = self._reactants + self._products
-
-        # Turn all fractions into whole numbers
-        max_denom = max([sp.coeff.denominator for sp in species])
-        if max_denom > 1:
-            species = [sp * max_denom for sp in species]
-
-        # Reduce all coefficients to lowest terms
-        gcd = reduce(math.gcd, [sp.coeff.numerator for sp in species])
-        if gcd > 1:
-            species = [sp / gcd for sp in species]
-
-        # Reduce species found on both sides
-        reactants, products = Counter(), Counter()
-        for reactant in species[:len(self._reactants)]:
-            reactants.update(reactant.as_dict())
-        for product in species[len(self._reactants):]:
-            products.update(product.as_dict())
-        union = reactants & products
-        for mol in union:
-            reactants[mol] -= union[mol]
-            products[mol] -= union[mol]
-        reactants = {r: reactants[r] for r in reactants if reactants[r] > 0}
-        products = {p: products[p] for p in products if products[p] > 0}
-
-        return Equation.from_dict(reactants, products)
-
-    def balance(self):
-        simplified = self.simplify()
-        species = simplified._reactants + simplified._products
-
-        # Get the number of elements in each species and all elements present in Equation to produce the matrix's rows
-        elm_counters = [sp.molecule.elements for sp in species]
-        elements = {}
-        for counter in elm_counters:
-            elms = counter.keys()
-            elements |= elms
-        elements = dict.fromkeys(elements, Fraction())
-
-        # Use sympy.Matrix to find null space of matrix whose values are to be used as balanced coefficients
-        mat_list = [list({**elements, **counter}.values()) for counter in elm_counters]
-        eye = Matrix.eye(len(mat_list))
-        mat_list = [row + eye.row(i).tolist()[0] for i, row in enumerate(mat_list)]
-        mat = Matrix(mat_list).rref()[0]
-        sols = [Fraction(abs(coeff.numerator()), coeff.denominator())
-                for coeff in mat.row(len(mat_list) - 1).tolist()[0] if abs(coeff) > 0]
-
-        species = [Species(sp.molecule, coeff=sol) for sp, sol in zip(species, sols)]
-        return Equation(species[:len(simplified._reactants)], species[len(simplified._reactants):])
+        started = perf_counter() if instrument.enabled else None
+        try:
+            reactants, products = self.net()
+            fraction, make = rational.fraction, Species._make
+            rs = [make(mol, fraction(n)) for mol, n in reactants.items()]
+            ps = [make(mol, fraction(n)) for mol, n in products.items()]
+            return Equation(rs, ps)
+        finally:
+            if started is not None:
+                instrument.stage('simplify', started)
+
+    def balance(self, method: str = 'integer', cache: Optional['BalanceCache'] = None):
+        if method not in ('integer', 'sparse', 'sympy'):
+            raise ValueError("Unknown balancing method '" + str(method) + "', expecting 'integer', 'sparse' or "
+                             "'sympy'")
+
+        started = perf_counter() if instrument.enabled else None
+        try:
+            simplified = self.simplify()
+            species = simplified._reactants + simplified._products
+            reactants = [sp.molecule for sp in simplified._reactants]
+            products = [sp.molecule for sp in simplified._products]
+
+            sols = cache.get(reactants, products) if cache is not None else None
+            if sols is None:
+                if method == 'integer':
+                    sols = balancer.balance_coefficients(reactants, products)
+                elif method == 'sparse':
+                    sols = balancer.balance_coefficients(reactants, products, sparse=True)
+                else:
+                    sols = _sympy_coefficients(reactants, products)
+                if cache is not None:
+                    cache.put(reactants, products, sols)
+
+            species = [Species._make(sp.molecule, rational.fraction(sol)) for sp, sol in zip(species, sols)]
+            return Equation(species[:len(simplified._reactants)], species[len(simplified._reactants):])
+        finally:
+            if started is not None:
+                instrument.stage('balance', started)
 
     def __add__(self, other: 'Equation'):
         if not isinstance(other, Equation):
@@ -201,14 +293,11 @@ class Equation:
             raise TypeError("Expecting type 'int', 'float', 'str', or 'Fraction', got '" +
                             str(type(other).__name__) + "' instead")
 
-        num, denom = float(other).as_integer_ratio() if isinstance(other, float) else (0, 1)
-        scalar = other if isinstance(other, Fraction) \
-            else _parse_coeff(other) if isinstance(other, str) \
-            else Fraction(num, denom) if isinstance(other, float) \
-            else Fraction(other)
-
-        reactants = [scalar * r for r in self._reactants]
-        products = [scalar * p for p in self._products]
+        # The scalar is converted once and applied to each coefficient directly
+        scalar = as_fraction(other)
+        make = Species._make
+        reactants = [make(r._molecule, r._coeff * scalar) for r in self._reactants]
+        products = [make(p._molecule, p._coeff * scalar) for p in self._products]
         return Equation(reactants, products)
 
     def __rmul__(self, other: Union[int, float, str, Fraction]):
@@ -219,14 +308,11 @@ class Equation:
             raise TypeError("Expecting type 'int', 'float', 'str', or 'Fraction', got '" +
                             str(type(other).__name__) + "' instead")
 
-        num, denom = float(other).as_integer_ratio() if isinstance(other, float) else (0, 1)
-        scalar = other if isinstance(other, Fraction) \
-            else _parse_coeff(other) if isinstance(other, str) \
-            else Fraction(num, denom) if isinstance(other, float) \
-            else Fraction(other)
-
-        reactants = [scalar / r for r in self._reactants]
-        products = [scalar / p for p in self._products]
+        # The scalar is converted once and applied to each coefficient directly
+        scalar = as_fraction(other)
+        make = Species._make
+        reactants = [make(r._molecule, r._coeff / scalar) for r in self._reactants]
+        products = [make(p._molecule, p._coeff / scalar) for p in self._products]
         return Equation(reactants, products)
 
     def __rtruediv__(self, other: Union[int, float]):
@@ -0,0 +1,244 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Union
+
+from chempy import codec
+from chempy.equation import PRODUCTS, REACTANTS, Equation
+from chempy.molecule import Molecule, element_symbol
+
+_SIDES = {REACTANTS: b'r', PRODUCTS: b'p'}
+
+# File layout, all integers in the byte order of the machine that wrote it:
+#   magic, byte order flag, padding                                     8 bytes
+#   reactions, keys, postings, key bytes, equation bytes                 5 x uint64
+#   equation offsets (reactions + 1) | key offsets (keys + 1) | posting offsets (keys + 1)    uint64
+#   postings                                                             uint32 reaction ids
+#   keys, sorted                                                         bytes
+#   equations                                                            codec encoded
+_MAGIC = b'CPYIDX2'
+_HEADER = struct.Struct('=8s5Q')
+_BYTE_ORDER = b'<' if sys.byteorder == 'little' else b'>'
+
+
+def _molecule_key(side: bytes, mol: Molecule) -> bytes:
+    return b'm' + side + (mol.formula + '\0' + str(mol.charge) + '\0' + ','.join(mol.states)).encode()
+
+
+def _element_key(side: bytes, symbol: str) -> bytes:
+    return b'e' + side + symbol.encode()
+
+
+def _sides(side: Optional[str]):
+    if side is None:
+        return _SIDES.values()
+    try:
+        return [_SIDES[side]]
+    except KeyError:
+        raise ValueError("Unknown side '" + str(side) + "', expecting '" + REACTANTS + "', '" + PRODUCTS +
+                         "' or None") from None
+
+
+class ReactionIndex:
+    # Inverted index from molecules and element symbols, on either side, to the ids of the reactions containing
+    # them; ids number reactions in order of insertion. Queries return sets of ids to combine with &, | and -.
+    # A saved index is memory-mapped on load and looked up in place; reactions added afterwards are kept in memory
+    # until the next save.
+    def __init__(self, equations: Iterable[Equation] = ()):
+        self._equations: List[Equation] = []  # reactions added since the index was loaded
+        self._postings: Dict[bytes, array] = {}
+        self._keys_of: Dict[tuple, tuple] = {}  # (side, molecule) -> its molecule and element keys
+        self._mm: Optional[mmap.mmap] = None
+        self._views: Dict[str, memoryview] = {}  # sections of the mapped file, see load
+        self._sections: Dict[str, int] = {}
+        self._counts = (0, 0)
+        self._base = 0  # reactions stored in the mapped file
+        self.extend(equations)
+
+    def add(self, eq: Union[str, Equation]) -> int:
+        if isinstance(eq, str):
+            eq = Equation.from_str(eq)
+        rid = len(self)
+        if rid >= 2 ** 32:
+            raise OverflowError('Reaction index is full')
+
+        keys = set()
+        for side, species in ((b'r', eq.reactants), (b'p', eq.products)):
+            for sp in species:
+                mol_keys = self._keys_of.get((side, sp.molecule))
+                if mol_keys is None:
+                    comp = sp.molecule.composition
+                    mol_keys = self._keys_of[side, sp.molecule] = (
+                        _molecule_key(side, sp.molecule),
+                        *(_element_key(side, element_symbol(comp[i])) for i in range(0, len(comp), 2)))
+                keys.update(mol_keys)
+
+        for key in keys:
+            posting = self._postings.get(key)
+            if posting is None:
+                posting = self._postings[key] = array('I')
+            posting.append(rid)
+        self._equations.append(eq)
+        return rid
+
+    def extend(self, equations: Iterable[Union[str, Equation]]):
+        for eq in equations:
+            self.add(eq)
+
+    def _lookup(self, key: bytes) -> Set[int]:
+        ids = set(self._stored(key))
+        posting = self._postings.get(key)
+        if posting is not None:
+            ids.update(posting)
+        return ids
+
+    def with_molecule(self, mol: Union[str, Molecule], side: Optional[str] = None) -> Set[int]:
+        if isinstance(mol, str):
+            mol = Molecule.complete_formula(mol)
+        ids: Set[int] = set()
+        for s in _sides(side):
+            ids |= self._lookup(_molecule_key(s, mol))
+        return ids
+
+    def with_element(self, symbol: str, side: Optional[str] = None) -> Set[int]:
+        ids: Set[int] = set()
+        for s in _sides(side):
+            ids |= self._lookup(_element_key(s, symbol))
+        return ids
+
+    def with_elements(self, *symbols: str, side: Optional[str] = None) -> Set[int]:
+        # Reactions containing every one of the elements, intersected from the rarest element up
+        hits = sorted((self.with_element(symbol, side) for symbol in symbols), key=len)
+        if not hits:
+            return self.all()
+        ids = hits[0]
+        for other in hits[1:]:
+            ids &= other
+        return ids
+
+    def produces(self, mol: Union[str, Molecule]) -> Set[int]:
+        return self.with_molecule(mol, PRODUCTS)
+
+    def consumes(self, mol: Union[str, Molecule]) -> Set[int]:
+        return self.with_molecule(mol, REACTANTS)
+
+    def all(self) -> Set[int]:
+        return set(range(len(self)))
+
+    def equation(self, rid: int) -> Equation:
+        if not 0 <= rid < len(self):
+            raise IndexError('Reaction id out of range')
+        if rid >= self._base:
+            return self._equations[rid - self._base]
+        offsets, base = self._views['equations'], self._sections['equation']
+        return codec.decode_equation(self._mm[base + offsets[rid]:base + offsets[rid + 1]])
+
+    def equations(self, ids: Iterable[int]) -> Iterator[Equation]:
+        return (self.equation(rid) for rid in sorted(ids))
+
+    def __len__(self):
+        return self._base + len(self._equations)
+
+    # On-disk form
+
+    def _stored(self, key: bytes):
+        if self._mm is None:
+            return ()
+        key_offsets, starts = self._views['keys'], self._views['starts']
+        base = self._sections['key']
+        lo, hi = 0, self._counts[1]
+        while lo < hi:  # binary search over the sorted keys, read in place
+            mid = (lo + hi) // 2
+            if self._mm[base + key_offsets[mid]:base + key_offsets[mid + 1]] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._counts[1] and self._mm[base + key_offsets[lo]:base + key_offsets[lo + 1]] == key:
+            return self._views['postings'][starts[lo]:starts[lo + 1]]
+        return ()
+
+    def save(self, path: str):
+        # Writes all reactions, loaded and added, to path; written to a temporary file first so an index can be
+        # saved over the file it was loaded from
+        keys = set(self._postings)
+        if self._mm is not None:
+            key_offsets, base = self._views['keys'], self._sections['key']
+            keys.update(bytes(self._mm[base + key_offsets[i]:base + key_offsets[i + 1]])
+                        for i in range(self._counts[1]))
+        keys = sorted(keys)
+
+        eq_offsets = array('Q', [0])
+        eq_bytes = bytearray()
+        if self._mm is not None:
+            stored = self._views['equations']
+            eq_bytes += self._mm[self._sections['equation']:self._sections['equation'] + stored[self._base]]
+            eq_offsets.extend(stored[1:self._base + 1])
+        for eq in self._equations:
+            eq_bytes += codec.encode_equation(eq)
+            eq_offsets.append(len(eq_bytes))
+
+        key_offsets, starts, postings = array('Q', [0]), array('Q', [0]), array('I')
+        key_bytes = bytearray()
+        for key in keys:
+            key_bytes += key
+            key_offsets.append(len(key_bytes))
+            postings.extend(self._stored(key))
+            postings.extend(self._postings.get(key, ()))
+            starts.append(len(postings))
+
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC + _BYTE_ORDER, len(self), len(keys), len(postings), len(key_bytes),
+                                 len(eq_bytes)))
+            for section in (eq_offsets, key_offsets, starts, postings):
+                section.tofile(f)
+            f.write(key_bytes)
+            f.write(eq_bytes)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def load(path: str) -> 'ReactionIndex':
+        index = ReactionIndex()
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < _HEADER.size:
+                raise ValueError("'" + path + "' is not a reaction index")
+            index._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, reactions, keys, postings, key_len, eq_len = _HEADER.unpack_from(index._mm)
+        if magic[:7] != _MAGIC:
+            index.close()
+            raise ValueError("'" + path + "' is not a reaction index")
+        if magic[7:] != _BYTE_ORDER:
+            index.close()
+            raise ValueError("'" + path + "' was written on a machine with a different byte order")
+
+        view = memoryview(index._mm)
+        pos = _HEADER.size
+        for name, count, fmt in (('equations', reactions + 1, 'Q'), ('keys', keys + 1, 'Q'), ('starts', keys + 1, 'Q'),
+                                 ('postings', postings, 'I')):
+            size = count * array(fmt).itemsize
+            index._views[name] = view[pos:pos + size].cast(fmt)
+            pos += size
+        index._sections = {'key': pos, 'equation': pos + key_len}
+        index._counts = (reactions, keys)
+        index._base = reactions
+        return index
+
+    def close(self):
+        # Releases the mapped file; the index is empty afterwards
+        if self._mm is not None:
+            for view in self._views.values():
+                view.release()
+            self._views = {}
+            self._mm.close()
+            self._mm = None
+            self._base = 0
+            self._equations = []
+            self._postings = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,105 @@
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Any, Callable, Dict, List
+
+# Off by default. Instrumented code checks enabled inline, without calling into this module, so there is close to no
+# cost until collect() or add_hook() turns it on. A stage is timed as
+#     started = perf_counter() if instrument.enabled else None
+#     try: ...
+#     finally:
+#         if started is not None:
+#             instrument.stage(name, started)
+# Hooks are called as hook(event, name, value) with these events:
+#   'stage'   name of a stage (tokenize, complete_formula, from_str, simplify, balance, elimination), wall seconds
+#   'count'   name of a counter (molecules, species, cache_miss, ...), increment
+#   'matrix'  name of the matrix ('composition'), (rows, columns, nonzeros)
+STAGE = 'stage'
+COUNT = 'count'
+MATRIX = 'matrix'
+
+_hooks: List[Callable[[str, str, Any], None]] = []
+enabled = False  # whether any hook is installed
+
+
+def add_hook(hook: Callable[[str, str, Any], None]):
+    global enabled
+    _hooks.append(hook)
+    enabled = True
+
+
+def remove_hook(hook: Callable[[str, str, Any], None]):
+    global enabled
+    _hooks.remove(hook)
+    enabled = bool(_hooks)
+
+
+def active():
+    return enabled
+
+
+def emit(event: str, name: str, value: Any):
+    for hook in list(_hooks):
+        hook(event, name, value)
+
+
+def count(name: str, n: int = 1):
+    if _hooks:
+        emit(COUNT, name, n)
+
+
+def stage(name: str, started: float):
+    # End of a stage that started at perf_counter() value started
+    emit(STAGE, name, perf_counter() - started)
+
+
+class Collector:
+    # Hook aggregating events: per stage call counts and wall time, counters, and composition matrix sizes
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls: Counter = Counter()
+        self.seconds: Dict[str, float] = {}
+        self.max_seconds: Dict[str, float] = {}
+        self.counters: Counter = Counter()
+        self.matrices: Counter = Counter()
+
+    def __call__(self, event: str, name: str, value: Any):
+        with self._lock:
+            if event == STAGE:
+                self.calls[name] += 1
+                self.seconds[name] = self.seconds.get(name, 0.0) + value
+                self.max_seconds[name] = max(self.max_seconds.get(name, 0.0), value)
+            elif event == COUNT:
+                self.counters[name] += value
+            elif event == MATRIX:
+                rows, cols, nonzeros = value
+                self.matrices[name + '.count'] += 1
+                self.matrices[name + '.cells'] += rows * cols
+                self.matrices[name + '.nonzeros'] += nonzeros
+                self.matrices[name + '.max_rows'] = max(self.matrices[name + '.max_rows'], rows)
+                self.matrices[name + '.max_cols'] = max(self.matrices[name + '.max_cols'], cols)
+
+    def summary(self) -> Dict[str, float]:
+        # Flat metric name to value mapping, ready to be pushed to a metrics system
+        with self._lock:
+            out: Dict[str, float] = {}
+            for name in self.calls:
+                out['stage.' + name + '.calls'] = self.calls[name]
+                out['stage.' + name + '.seconds'] = self.seconds[name]
+                out['stage.' + name + '.max_seconds'] = self.max_seconds[name]
+            for name, value in self.counters.items():
+                out['count.' + name] = value
+            for name, value in self.matrices.items():
+                out['matrix.' + name] = value
+            return out
+
+
+@contextmanager
+def collect():
+    collector = Collector()
+    add_hook(collector)
+    try:
+        yield collector
+    finally:
+        remove_hook(collector)
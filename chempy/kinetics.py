@@ -0,0 +1,149 @@
+from typing import Dict, Iterable, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from chempy.equation import Equation
+from chempy.molecule import Molecule
+from chempy.network import ReactionNetwork, scipy_sparse
+
+
+def _solve_ivp():
+    try:
+        from scipy.integrate import solve_ivp
+    except ImportError:
+        raise ImportError('Simulating kinetics requires scipy') from None
+    return solve_ivp
+
+
+class Simulation(NamedTuple):
+    t: np.ndarray  # (times,)
+    y: np.ndarray  # concentrations, (times, species) or (sets, times, species) for a sweep
+    nfev: int
+    njev: int
+
+
+class MassActionModel:
+    # Mass-action kinetics of a list of equations, compiled to array operations. Reaction j runs at
+    # k[j] * prod(c[i] ** order), the product over its reactant species with their coefficients as orders, and
+    # changes concentrations by its column of the network's stoichiometric matrix. Concentrations and rate constants
+    # may carry any leading batch dimensions, so many parameter sets are evaluated in one call.
+    def __init__(self, equations: Iterable[Union[str, Equation]]):
+        self.network = ReactionNetwork(Equation.from_str(eq) if isinstance(eq, str) else eq for eq in equations)
+        ns, nr = self.network.shape
+        self._stoichiometry = self.network.stoichiometry()  # (species, reactions)
+
+        # Reactant slots of each reaction padded to the same width; padding points at an extra species fixed at 1
+        slots = [[(self.network.index(sp.molecule), float(sp.coeff)) for sp in eq.reactants]
+                 for eq in self.network.equations]
+        width = max((len(s) for s in slots), default=0)
+        self._slot_species = np.full((nr, width), ns, dtype=np.intp)
+        self._slot_orders = np.zeros((nr, width))
+        for j, reaction in enumerate(slots):
+            for m, (i, order) in enumerate(reaction):
+                self._slot_species[j, m] = i
+                self._slot_orders[j, m] = order
+        self._slot_onehot = np.zeros((nr, width, ns))  # d c[slot] / d c, for the Jacobian
+        real = self._slot_species < ns
+        self._slot_onehot[np.nonzero(real) + (self._slot_species[real],)] = 1
+
+    @property
+    def species(self):
+        return self.network.species
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.network.shape
+
+    def concentrations(self, values: Dict[Union[str, Molecule], float]) -> np.ndarray:
+        # Concentration vector from amounts by species; species not given are 0
+        c = np.zeros(self.shape[0])
+        for mol, value in values.items():
+            if isinstance(mol, str):
+                mol = Molecule.complete_formula(mol)
+            try:
+                c[self.network.index(mol)] = value
+            except KeyError:
+                raise ValueError("Species '" + str(mol) + "' is not in any of the reactions") from None
+        return c
+
+    def _terms(self, c: np.ndarray) -> np.ndarray:
+        # c[slot] ** order for every reactant slot, (..., reactions, width)
+        padded = np.concatenate([c, np.ones(c.shape[:-1] + (1,))], axis=-1)
+        return padded[..., self._slot_species] ** self._slot_orders
+
+    def rates(self, c: np.ndarray, k: np.ndarray) -> np.ndarray:
+        c, k = np.asarray(c, dtype=np.float64), np.asarray(k, dtype=np.float64)
+        return k * self._terms(c).prod(axis=-1)
+
+    def dcdt(self, c: np.ndarray, k: np.ndarray) -> np.ndarray:
+        return self.rates(c, k) @ self._stoichiometry.T
+
+    def jacobian(self, c: np.ndarray, k: np.ndarray) -> np.ndarray:
+        # d dcdt / d c, (..., species, species). The derivative of a rate by one slot multiplies the other slots'
+        # terms, taken from prefix and suffix products so that zero concentrations need no special casing.
+        c, k = np.asarray(c, dtype=np.float64), np.asarray(k, dtype=np.float64)
+        ns, nr = self.shape
+        terms = self._terms(c)
+        if not terms.shape[-1]:
+            return np.zeros(c.shape[:-1] + (ns, ns))
+        ones = np.ones(terms.shape[:-1] + (1,))
+        before = np.concatenate([ones, np.cumprod(terms, axis=-1)[..., :-1]], axis=-1)
+        after = np.concatenate([np.cumprod(terms[..., ::-1], axis=-1)[..., -2::-1], ones], axis=-1)
+        padded = np.concatenate([c, np.ones(c.shape[:-1] + (1,))], axis=-1)
+        base, orders = padded[..., self._slot_species], self._slot_orders
+        # d c ** order / d c, taken as 0 where it is unbounded: at zero concentration for orders below 1
+        with np.errstate(divide='ignore', invalid='ignore'):
+            own = np.where((orders != 0) & ((base != 0) | (orders >= 1)), orders * base ** (orders - 1), 0)
+        partial = k[..., None] * before * after * own  # d rate / d c[slot]
+        d_rates = np.einsum('...rm,rmc->...rc', partial, self._slot_onehot)
+        return self._stoichiometry @ d_rates
+
+    def simulate(self, c0: Union[np.ndarray, Dict[Union[str, Molecule], float]], t_span: Tuple[float, float],
+                 k: Sequence[float], t_eval: Optional[Sequence[float]] = None, method: str = 'BDF',
+                 rtol: float = 1e-6, atol: float = 1e-9) -> Simulation:
+        # Integrates one set of rate constants with a stiff solver from scipy
+        c0 = self.concentrations(c0) if isinstance(c0, dict) else np.asarray(c0, dtype=np.float64)
+        k = np.asarray(k, dtype=np.float64)
+        self._check(c0, k, 1)
+        result = _solve_ivp()(lambda t, c: self.dcdt(c, k), t_span, c0, method=method, t_eval=t_eval,
+                              jac=lambda t, c: self.jacobian(c, k), rtol=rtol, atol=atol)
+        if not result.success:
+            raise RuntimeError('Kinetics integration failed: ' + result.message)
+        return Simulation(result.t, result.y.T, result.nfev, result.njev)
+
+    def sweep(self, c0: Union[np.ndarray, Dict[Union[str, Molecule], float]], t_span: Tuple[float, float],
+              k: np.ndarray, t_eval: Optional[Sequence[float]] = None, method: str = 'BDF',
+              rtol: float = 1e-6, atol: float = 1e-9) -> Simulation:
+        # Integrates many sets of rate constants, one per row of k, as a single system whose Jacobian is block
+        # diagonal and handed to the solver as a sparse matrix. c0 is shared or has one row per set.
+        csr_matrix = scipy_sparse().csr_matrix
+
+        k = np.atleast_2d(np.asarray(k, dtype=np.float64))
+        sets = k.shape[0]
+        ns = self.shape[0]
+        c0 = self.concentrations(c0) if isinstance(c0, dict) else np.asarray(c0, dtype=np.float64)
+        c0 = np.broadcast_to(c0, (sets, ns))
+        self._check(c0, k, sets)
+
+        indptr = np.arange(sets * ns + 1) * ns
+        indices = np.tile(np.arange(ns), (ns, 1)).ravel()
+        indices = (indices[None, :] + (np.arange(sets) * ns)[:, None]).ravel()
+        size = sets * ns
+
+        def fun(t, y):
+            return self.dcdt(y.reshape(sets, ns), k).ravel()
+
+        def jac(t, y):
+            return csr_matrix((self.jacobian(y.reshape(sets, ns), k).ravel(), indices, indptr), shape=(size, size))
+
+        result = _solve_ivp()(fun, t_span, c0.ravel(), method=method, t_eval=t_eval, jac=jac, rtol=rtol, atol=atol)
+        if not result.success:
+            raise RuntimeError('Kinetics integration failed: ' + result.message)
+        return Simulation(result.t, result.y.reshape(sets, ns, -1).transpose(0, 2, 1), result.nfev, result.njev)
+
+    def _check(self, c0: np.ndarray, k: np.ndarray, sets: int):
+        ns, nr = self.shape
+        if c0.shape[-1] != ns:
+            raise ValueError('Expecting ' + str(ns) + ' initial concentrations, got ' + str(c0.shape[-1]))
+        if k.shape != ((nr,) if k.ndim == 1 else (sets, nr)):
+            raise ValueError('Expecting ' + str(nr) + ' rate constants per set, got shape ' + str(k.shape))
@@ -1,96 +1,221 @@
+import re
+import threading
 from collections import Counter
-from typing import Union, List
+from time import perf_counter
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 
-from chempy.util import tokenize
+from chempy import instrument
+from chempy.util import CacheInfo, LRUCache, ParseError, tokenize
 
 
-def _parse(toks: List[str]):
-    op_stack: List[str] = []
-    result: List[str] = []
-    reserve: List[List[str]] = []
+# Interned molecules by their (formula, charge, *states) identity, and the same molecules by the complete formula text
+# they were parsed from. Kept apart so that caching a parsed text does not take a molecule's place.
+_cache = LRUCache(maxsize=8192)
+_text_cache = LRUCache(maxsize=8192)
 
-    def eval_op():
-        if len(op_stack) == 0 or len(reserve) == 0:
-            return
+# Element symbols are numbered in order of first appearance; compositions refer to elements by these numbers.
+_symbols: List[str] = []
+_indices: Dict[str, int] = {}
+_symbols_lock = threading.Lock()
 
-        op = op_stack.pop()
 
-        if op == ')':
-            op_stack.append(op)
-        elif op.isnumeric():
-            multiplier = int(op)
-            reserve[-1] *= multiplier
+def element_index(symbol: str) -> int:
+    try:
+        return _indices[symbol]
+    except KeyError:
+        with _symbols_lock:
+            if symbol not in _indices:
+                # The symbol is published before its index, so a reader finding the index can always look it up
+                _symbols.append(symbol)
+                _indices[symbol] = len(_symbols) - 1
+            return _indices[symbol]
 
-    def merge_res():
-        nonlocal reserve
-        if len(reserve) > 1:
-            merged = []
-            for item in reserve:
-                merged += item
-            reserve = [merged]
 
-    for tok in reversed(toks):
-        if tok.isnumeric() or tok == ')':  # the valid operators
-            op_stack.append(tok)
+def element_symbol(index: int) -> str:
+    return _symbols[index]
+
+
+def cache_info() -> CacheInfo:
+    # Lookups and evictions of both caches; the size is that of each cache and currsize counts interned molecules
+    info, text = _cache.info(), _text_cache.info()
+    return CacheInfo(info.hits + text.hits, info.misses + text.misses, info.evictions + text.evictions, info.maxsize,
+                     info.currsize)
+
+
+def cache_clear():
+    _cache.clear()
+    _text_cache.clear()
+
+
+def set_cache_size(maxsize: Optional[int]):
+    _cache.resize(maxsize)
+    _text_cache.resize(maxsize)
+
+
+def _format(formula: str, charge: int, states: List[str]):
+    mag = abs(charge)
+    return formula + \
+        (('+' if charge >= 0 else '-') + (str(mag) if mag != 1 else '') if mag != 0 else '') + \
+        ('(' + ', '.join(states) + ')' if states else '')
+
+
+def _parse(toks: Iterable[str]) -> Counter:
+    # Each open group keeps its own element counts; multipliers scale counts instead of repeating atoms, so the
+    # work done depends on the length of the formula rather than on the number of atoms it describes. Tokens are
+    # consumed in one forward pass and may come from a generator.
+    stack: List[Counter] = [Counter()]
+    last: Union[Counter, str, None] = None  # group or element a following multiplier applies to
+
+    for tok in toks:
+        if tok.isalpha():
+            stack[-1][tok] += 1
+            last = tok
+        elif tok.isnumeric():
+            if last is None:
+                raise ValueError('Multiplier ' + tok + ' does not follow an element or group in molecule formula')
+            multiplier = int(tok)
+            if isinstance(last, str):
+                stack[-1][last] += multiplier - 1
+            else:
+                for elm in last:
+                    last[elm] *= multiplier - 1
+                stack[-1].update(last)
+            last = None
         elif tok == '(':
-            while op_stack[-1] != ')':
-                eval_op()
-            op_stack.pop()  # pop matching ')'
-            eval_op()
-        elif tok.isalpha():
-            reserve.append([tok])
-            eval_op()
+            stack.append(Counter())
+            last = None
+        elif tok == ')':
+            if len(stack) == 1:
+                raise ValueError("Unbalanced parentheses in molecule formula: unexpected ')'")
+            group = stack.pop()
+            stack[-1].update(group)
+            last = group
         else:
             raise ValueError('Invalid character while parsing molecule formula: ' + tok)
 
-        merge_res()
-        if len(op_stack) == 0:
-            result += reserve.pop()
+    if len(stack) > 1:
+        raise ValueError("Unbalanced parentheses in molecule formula: missing ')'")
+
+    return stack[0]
+
+
+# One species of an equation with whitespace removed: coefficient, formula, charge and states. A '(' followed by a
+# lowercase letter opens the states rather than a group of the formula. A '+' is only a charge when it ends the
+# species, i.e. when it is followed by the end of the equation, '+', '=' or states, directly or after a number.
+SPECIES = re.compile(r"""
+    (?P<coeff>[0-9]+(?:[./][0-9]+)?)?
+    (?P<formula>(?:[A-Za-z0-9)]|\((?![a-z]))*)
+    (?P<charge>-[0-9]*|\+[0-9]*(?=$|[+=]|\([a-z]))?
+    (?:\((?P<states>[a-z][A-Za-z0-9]*(?:,[A-Za-z0-9]+)*)\))?
+""", re.VERBOSE)
+
+
+def position(src: str, index: int) -> int:
+    # Position in src of the character at index once whitespace is removed
+    for i, c in enumerate(src):
+        if not c.isspace():
+            if index == 0:
+                return i
+            index -= 1
+    return len(src)
+
 
-    return result
+def species_molecule(src: str, match: re.Match, interned: bool = True) -> 'Molecule':
+    # Molecule of a SPECIES match on src with whitespace removed; a new instance unless interned
+    formula, charge, states = match.group('formula', 'charge', 'states')
+    if not formula:
+        raise ParseError('Expected molecule formula', position(src, match.end('coeff') if match.group('coeff') else
+                                                               match.start()))
+    charge = 0 if charge is None else int(charge) if len(charge) > 1 else 1 if charge == '+' else -1
+    states = states.split(',') if states else None
+    try:
+        return Molecule.interned(formula, charge, states) if interned else Molecule(tokenize(formula), charge, states)
+    except ValueError as e:
+        raise ParseError(str(e), position(src, match.start('formula'))) from None
 
 
 class Molecule:
+    # Immutable and compact. The composition is a flat tuple of (element index, count) pairs sorted by element
+    # index, e.g. (0, 2, 1, 1) for H2O once H is element 0 and O element 1, and is shared without copying.
+    __slots__ = ('_formula', '_composition', '_charge', '_states', '_hash')
+
     def __init__(self, formula_toks: List[str], charge: Union[str, int] = 0, states: List = None):
-        self._formula = ''.join(formula_toks)
-        self._elements = Counter(_parse(formula_toks))
-        self._charge = int(charge)
-        self._states = states if states else []
-        self._charge_sign = '+' if self._charge >= 0 else '-'
-        self._charge_mag = abs(self._charge)
+        self._init(''.join(formula_toks), _parse(formula_toks), charge, states)
+
+    def _init(self, formula: str, elements: Counter, charge: Union[str, int], states: Optional[List]):
+        if hasattr(self, '_hash'):  # e.g. mol.__init__(...) called again on a shared, interned instance
+            raise AttributeError("'" + self.__class__.__name__ + "' object is immutable")
+        charge = int(charge)
+        states = tuple(states) if states else ()
+        counts = sorted((element_index(elm), count) for elm, count in elements.items() if count)
+        setattr_ = object.__setattr__
+        setattr_(self, '_formula', formula)
+        setattr_(self, '_composition', tuple(x for pair in counts for x in pair))
+        setattr_(self, '_charge', charge)
+        setattr_(self, '_states', states)
+        setattr_(self, '_hash', hash((formula, charge, *states)))
+        if instrument.enabled:
+            instrument.count('molecules')
+
+    def __setattr__(self, name, value):
+        raise AttributeError("'" + self.__class__.__name__ + "' object is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("'" + self.__class__.__name__ + "' object is immutable")
+
+    def __reduce__(self):
+        return Molecule.interned, (self._formula, self._charge, list(self._states))
 
     @staticmethod
     def complete_formula(complete_formula: str):
-        toks: List[str] = tokenize(complete_formula)
+        # Molecules are interned: equal complete formulas share one instance, which is safe because a Molecule
+        # never changes after construction and only hands out copies of its elements and states. Parsed text is
+        # cached as is, and the molecule itself under its (formula, charge, *states) identity.
+        key = ''.join(complete_formula.split())
+        mol = _text_cache.get(key)
+        if mol is None:
+            mol = Molecule._parse_complete_formula(complete_formula, key)
+            mol = _cache.setdefault((mol._formula, mol._charge, *mol._states), mol)
+            _text_cache.put(key, mol)
+        return mol
 
-        try:
-            charge_start = toks.index('+')
-        except ValueError:
-            try:
-                charge_start = toks.index('-')
-            except ValueError:
-                charge_start = 0  # charge cannot be first character
-
-        if charge_start > 0:
-            # sign, number, ... OR sign, ...
-            try:
-                charge_is_one = not toks[charge_start + 1].isnumeric()
-            except IndexError:
-                charge_is_one = True
-            states_start = charge_start + (1 if charge_is_one else 2)
-            charge = ''.join(toks[charge_start:states_start] + (['1'] if charge_is_one else []))
-        else:
-            charge = 0
-            try:
-                states_start = len(toks) - toks[-1::-1].index('(') - 1
-            except ValueError:
-                states_start = 0  # states cannot be first character
+    @staticmethod
+    def interned(formula: str, charge: int = 0, states: List[str] = None):
+        # Shared instance for an already split up complete formula; the formula is only parsed when not cached
+        formula, charge, states = ''.join(formula.split()), int(charge), tuple(states or ())
+        key = (formula, charge, *states)
+        mol = _cache.get(key)
+        if mol is None:
+            mol = _cache.setdefault(key, Molecule(tokenize(formula), charge, states))
+        return mol
 
-        # states must take up the rest of the list
-        states = [state for state in toks[states_start + 1:len(toks) - 1] if state != ','] if states_start else None
-        formula_toks = toks[:charge_start] if charge_start else toks[:states_start] if states_start else toks
+    @staticmethod
+    def _interned_elements(formula: str, elements: Counter, charge: int = 0, states: List[str] = None):
+        # Same as interned, for a formula whose element counts were already parsed
+        key = (formula, charge, *(states or ()))
+        mol = _cache.get(key)
+        if mol is None:
+            mol = object.__new__(Molecule)
+            mol._init(formula, elements, charge, states)
+            mol = _cache.setdefault(key, mol)
+        return mol
 
-        return Molecule(formula_toks, charge, states)
+    @staticmethod
+    def _parse_complete_formula(src: str, compact: str):
+        # The species grammar of Equation.from_str, without a coefficient. Timed on cache misses only, hits are a
+        # dictionary lookup.
+        started = perf_counter() if instrument.enabled else None
+        try:
+            match = SPECIES.match(compact)
+            if match.group('coeff'):
+                raise ParseError("Unexpected coefficient '" + match.group('coeff') + "'", position(src, 0))
+            mol = species_molecule(src, match, interned=False)
+            if match.end() != len(compact):
+                raise ParseError("Unexpected '" + compact[match.end()] + "'", position(src, match.end()))
+            return mol
+        finally:
+            if started is not None:
+                instrument.stage('complete_formula', started)
 
     @property
     def formula(self):
@@ -98,7 +223,21 @@ class Molecule:
 
     @property
     def elements(self):
-        return self._elements.copy()
+        comp = self._composition
+        return Counter(dict(zip(map(element_symbol, comp[0::2]), comp[1::2])))
+
+    @property
+    def composition(self) -> Tuple[int, ...]:
+        return self._composition
+
+    @property
+    def molar_mass(self) -> float:
+        from chempy import ptable  # ptable depends on this module
+        return ptable.molar_mass(self)
+
+    def mass_percent(self) -> Dict[str, float]:
+        from chempy import ptable
+        return ptable.mass_percent(self)
 
     @property
     def charge(self):
@@ -106,34 +245,32 @@ class Molecule:
 
     @property
     def states(self):
-        return self._states.copy()
+        return list(self._states)
 
     @property
     def charge_sign(self):
-        return self._charge_sign
+        return '+' if self._charge >= 0 else '-'
 
     @property
     def charge_mag(self):
-        return self._charge_mag
+        return abs(self._charge)
 
     def __hash__(self):
-        return hash((self._formula, self._charge, *self._states))
+        return self._hash
 
     def __eq__(self, other: 'Molecule'):
-        return isinstance(other, Molecule) \
+        return self is other or isinstance(other, Molecule) \
+               and self._hash == other._hash \
                and self._formula == other._formula \
                and self._charge == other._charge \
                and self._states == other._states
 
     def __str__(self):
-        return self._formula + \
-               (self._charge_sign + (str(self._charge_mag) if self._charge_mag != 1 else '')
-                if self._charge_mag != 0 else '') + \
-               ('(' + ', '.join(state for state in self._states) + ')' if self._states else '')
+        return _format(self._formula, self._charge, self._states)
 
     def __repr__(self):
         return self.__class__.__name__ + '(' \
                'formula=' + self._formula + ', ' \
-               'charge='+ self._charge_sign + str(self._charge_mag) + ', ' + \
-               'states=' + str(self._states) + \
+               'charge='+ self.charge_sign + str(self.charge_mag) + ', ' + \
+               'states=' + str(list(self._states)) + \
                ')'
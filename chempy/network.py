@@ -0,0 +1,160 @@
+import math
+from fractions import Fraction
+from functools import reduce
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from chempy.balancer import ELECTRON
+from chempy.equation import Equation, Species
+from chempy.molecule import Molecule, element_index, element_symbol
+
+
+def scipy_sparse():
+    # scipy.sparse, imported on first use as scipy is optional
+    try:
+        import scipy.sparse
+    except ImportError:
+        raise ImportError('Sparse matrices require scipy') from None
+    return scipy.sparse
+
+
+class ReactionNetwork:
+    # Species by reaction stoichiometric matrix of a list of equations. Species are indexed by Molecule (and so by
+    # its cached hash) in order of first appearance; a reaction's column holds products positively and reactants
+    # negatively. Entries are kept exactly as integers over one denominator per reaction, so matrices convert back
+    # to equations without rounding.
+    def __init__(self, equations: Iterable[Equation] = ()):
+        self._equations: List[Equation] = []
+        self._species: Dict[Molecule, int] = {}
+        self._molecules: List[Molecule] = []
+        self._rows: List[int] = []
+        self._cols: List[int] = []
+        self._nums: List[int] = []
+        self._denoms: List[int] = []
+        self._starts: List[int] = [0]  # entries of reaction j are _starts[j]:_starts[j + 1]
+        self.extend(equations)
+
+    def add(self, equation: Equation) -> int:
+        col = len(self._equations)
+        species = equation.reactants + equation.products
+        denom = reduce(lambda a, b: a * b // math.gcd(a, b), (sp.coeff.denominator for sp in species), 1)
+
+        index = self._species
+        for sign, side in ((-1, equation.reactants), (1, equation.products)):
+            for sp in side:
+                row = index.get(sp.molecule)
+                if row is None:
+                    row = index[sp.molecule] = len(self._molecules)
+                    self._molecules.append(sp.molecule)
+                self._rows.append(row)
+                self._cols.append(col)
+                self._nums.append(sign * sp.coeff.numerator * (denom // sp.coeff.denominator))
+
+        self._equations.append(equation)
+        self._denoms.append(denom)
+        self._starts.append(len(self._rows))
+        return col
+
+    def extend(self, equations: Iterable[Equation]):
+        for equation in equations:
+            self.add(equation)
+
+    @property
+    def species(self) -> List[Molecule]:
+        return list(self._molecules)
+
+    @property
+    def equations(self) -> List[Equation]:
+        return list(self._equations)
+
+    def index(self, molecule: Molecule) -> int:
+        return self._species[molecule]
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return len(self._molecules), len(self._equations)
+
+    def integer_stoichiometry(self) -> Tuple[np.ndarray, np.ndarray]:
+        # (numerators, denominators): the exact matrix is numerators / denominators, one denominator per reaction.
+        # Species appearing more than once in a reaction are summed.
+        mat = np.zeros(self.shape, dtype=np.int64)
+        np.add.at(mat, (np.asarray(self._rows, dtype=np.intp), np.asarray(self._cols, dtype=np.intp)),
+                  np.asarray(self._nums, dtype=np.int64))
+        return mat, np.asarray(self._denoms, dtype=np.int64)
+
+    def stoichiometry(self, sparse: bool = False):
+        denoms = np.asarray(self._denoms, dtype=np.float64)
+        if sparse:
+            cols = np.asarray(self._cols, dtype=np.intp)
+            data = np.asarray(self._nums, dtype=np.float64) / denoms[cols] if len(cols) else np.zeros(0)
+            return scipy_sparse().csr_matrix((data, (np.asarray(self._rows, dtype=np.intp), cols)), shape=self.shape)
+        nums, _ = self.integer_stoichiometry()
+        return nums / denoms
+
+    def composition(self, sparse: bool = False, charge: bool = False) -> Tuple[List[str], object]:
+        # (element symbols, element by species count matrix), with a last 'charge' row if asked for. Electrons are
+        # not an element, they are accounted for through the charge.
+        electron = element_index(ELECTRON)
+        rows, cols, counts = [], [], []
+        for col, mol in enumerate(self._molecules):
+            comp = mol.composition
+            for i in range(0, len(comp), 2):
+                if comp[i] != electron:
+                    rows.append(comp[i])
+                    cols.append(col)
+                    counts.append(comp[i + 1])
+
+        element_ids, local = np.unique(np.asarray(rows, dtype=np.intp), return_inverse=True)
+        keys = [element_symbol(int(i)) for i in element_ids]
+        cols = np.asarray(cols, dtype=np.intp)
+        counts = np.asarray(counts, dtype=np.int64)
+        if charge:
+            charged = [(col, mol.charge) for col, mol in enumerate(self._molecules) if mol.charge]
+            local = np.concatenate([local, np.full(len(charged), len(keys), dtype=np.intp)])
+            cols = np.concatenate([cols, np.asarray([col for col, _ in charged], dtype=np.intp)])
+            counts = np.concatenate([counts, np.asarray([q for _, q in charged], dtype=np.int64)])
+            keys.append('charge')
+
+        shape = (len(keys), len(self._molecules))
+        if sparse:
+            return keys, scipy_sparse().csr_matrix((counts, (local, cols)), shape=shape)
+        mat = np.zeros(shape, dtype=np.int64)
+        mat[local, cols] = counts
+        return keys, mat
+
+    def equation(self, col: int) -> Equation:
+        # Reaction col rebuilt exactly from its matrix entries, species in their original order and net amounts
+        start, end = self._starts[col], self._starts[col + 1]
+        net: Dict[int, int] = {}
+        for row, num in zip(self._rows[start:end], self._nums[start:end]):
+            net[row] = net.get(row, 0) + num
+        denom = self._denoms[col]
+        reactants = [Species(self._molecules[row], Fraction(-num, denom)) for row, num in net.items() if num < 0]
+        products = [Species(self._molecules[row], Fraction(num, denom)) for row, num in net.items() if num > 0]
+        return Equation(reactants, products)
+
+    def to_equations(self, matrix: Optional[np.ndarray] = None, max_denominator: int = 10 ** 6) -> List[Equation]:
+        # Equations for the columns of matrix, whose rows are in the order of species; by default this network's own
+        # reactions. Entries of other matrices, e.g. combinations of reactions, are approximated by fractions with
+        # denominators up to max_denominator.
+        if matrix is None:
+            return [self.equation(col) for col in range(len(self._equations))]
+
+        matrix = matrix.toarray() if hasattr(matrix, 'toarray') else np.asarray(matrix)
+        if matrix.shape[0] != len(self._molecules):
+            raise ValueError('Expecting ' + str(len(self._molecules)) + ' rows, one per species, got ' +
+                             str(matrix.shape[0]))
+        equations = []
+        for col in range(matrix.shape[1]):
+            coeffs = [Fraction(float(x)).limit_denominator(max_denominator) for x in matrix[:, col]]
+            equations.append(self._fraction_equation(coeffs))
+        return equations
+
+    def _fraction_equation(self, coeffs: List[Fraction]) -> Equation:
+        reactants = [Species(mol, -x) for mol, x in zip(self._molecules, coeffs) if x < 0]
+        products = [Species(mol, x) for mol, x in zip(self._molecules, coeffs) if x > 0]
+        return Equation(reactants, products)
+
+    def __len__(self):
+        return len(self._equations)
@@ -1,47 +1,154 @@
-# from typing import NamedTuple, List
-#
-# import chempy.config as _config
-#
-#
-# class Element(NamedTuple):
-#     protons: int
-#     symbol: str
-#     name: str
-#     mass: str
-#     config: str
-#     radius: str
-#     ionization: str
-#     affinity: str
-#     phase: str
-#     mp: str
-#     bp: str
-#     density: str
-#     series: str
-#     elneg: str
-#     oxidations: List[str]
-#
-#     def __str__(self):
-#         return self.symbol
-#
-#     def __repr__(self):
-#         return self.__str__()
-#
-#
-# def element_protons(protons: int):
-#     doc = _config.collections['elements'].find_one({'protons': protons})
-#     return Element(*list(doc.values())[1:])
-#
-#
-# def element_symbol(symbol: str):
-#     doc = _config.collections['elements'].find_one({'symbol': symbol})
-#     return Element(*list(doc.values())[1:])
-#
-#
-# def element_name(name: str):
-#     doc = _config.collections['elements'].find_one({'name': name.lower()})
-#     return Element(*list(doc.values())[1:])
-#
-#
-# def elements_with(**kwargs):
-#     docs = _config.collections['elements'].find(dict(kwargs))
-#     return [Element(*list(doc.values())[1:]) for doc in docs]
+from array import array
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from chempy.balancer import ELECTRON
+from chempy.molecule import Molecule, element_symbol as _index_symbol
+
+# Symbol, name and standard atomic weight of each element in order of atomic number. Elements without a standard
+# atomic weight list the mass number of their longest-lived isotope.
+_DATA = '''\
+H Hydrogen 1.008|He Helium 4.002602|Li Lithium 6.94|Be Beryllium 9.0121831|B Boron 10.81|C Carbon 12.011|\
+N Nitrogen 14.007|O Oxygen 15.999|F Fluorine 18.998403163|Ne Neon 20.1797|Na Sodium 22.98976928|\
+Mg Magnesium 24.305|Al Aluminium 26.9815384|Si Silicon 28.085|P Phosphorus 30.973761998|S Sulfur 32.06|\
+Cl Chlorine 35.45|Ar Argon 39.95|K Potassium 39.0983|Ca Calcium 40.078|Sc Scandium 44.955908|Ti Titanium 47.867|\
+V Vanadium 50.9415|Cr Chromium 51.9961|Mn Manganese 54.938043|Fe Iron 55.845|Co Cobalt 58.933194|\
+Ni Nickel 58.6934|Cu Copper 63.546|Zn Zinc 65.38|Ga Gallium 69.723|Ge Germanium 72.630|As Arsenic 74.921595|\
+Se Selenium 78.971|Br Bromine 79.904|Kr Krypton 83.798|Rb Rubidium 85.4678|Sr Strontium 87.62|\
+Y Yttrium 88.90584|Zr Zirconium 91.224|Nb Niobium 92.90637|Mo Molybdenum 95.95|Tc Technetium 98|\
+Ru Ruthenium 101.07|Rh Rhodium 102.90549|Pd Palladium 106.42|Ag Silver 107.8682|Cd Cadmium 112.414|\
+In Indium 114.818|Sn Tin 118.710|Sb Antimony 121.760|Te Tellurium 127.60|I Iodine 126.90447|Xe Xenon 131.293|\
+Cs Caesium 132.90545196|Ba Barium 137.327|La Lanthanum 138.90547|Ce Cerium 140.116|Pr Praseodymium 140.90766|\
+Nd Neodymium 144.242|Pm Promethium 145|Sm Samarium 150.36|Eu Europium 151.964|Gd Gadolinium 157.25|\
+Tb Terbium 158.925354|Dy Dysprosium 162.500|Ho Holmium 164.930329|Er Erbium 167.259|Tm Thulium 168.934219|\
+Yb Ytterbium 173.045|Lu Lutetium 174.9668|Hf Hafnium 178.486|Ta Tantalum 180.94788|W Tungsten 183.84|\
+Re Rhenium 186.207|Os Osmium 190.23|Ir Iridium 192.217|Pt Platinum 195.084|Au Gold 196.966570|\
+Hg Mercury 200.592|Tl Thallium 204.38|Pb Lead 207.2|Bi Bismuth 208.98040|Po Polonium 209|At Astatine 210|\
+Rn Radon 222|Fr Francium 223|Ra Radium 226|Ac Actinium 227|Th Thorium 232.0377|Pa Protactinium 231.03588|\
+U Uranium 238.02891|Np Neptunium 237|Pu Plutonium 244|Am Americium 243|Cm Curium 247|Bk Berkelium 247|\
+Cf Californium 251|Es Einsteinium 252|Fm Fermium 257|Md Mendelevium 258|No Nobelium 259|Lr Lawrencium 266|\
+Rf Rutherfordium 267|Db Dubnium 268|Sg Seaborgium 269|Bh Bohrium 270|Hs Hassium 269|Mt Meitnerium 278|\
+Ds Darmstadtium 281|Rg Roentgenium 282|Cn Copernicium 285|Nh Nihonium 286|Fl Flerovium 289|Mc Moscovium 290|\
+Lv Livermorium 293|Ts Tennessine 294|Og Oganesson 294'''
+
+ELECTRON_MASS = 0.000548579909  # in g/mol, electrons appear as the element 'e' in formulas like 'e-'
+
+
+class Element(NamedTuple):
+    protons: int
+    symbol: str
+    name: str
+    mass: float
+
+    def __str__(self):
+        return self.symbol
+
+    def __repr__(self):
+        return self.__str__()
+
+
+class _Table:
+    # Parsed on first use into parallel arrays indexed by atomic number - 1
+    def __init__(self):
+        rows = [entry.split() for entry in _DATA.split('|')]
+        self.symbols: List[str] = [row[0] for row in rows]
+        self.names: List[str] = [row[1] for row in rows]
+        self.masses = array('d', (float(row[2]) for row in rows))
+        self.by_symbol: Dict[str, int] = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.by_name: Dict[str, int] = {name.lower(): i for i, name in enumerate(self.names)}
+        self.index_masses = None  # numpy masses by molecule element index, see _index_masses
+
+    def element(self, i: int):
+        return Element(i + 1, self.symbols[i], self.names[i], self.masses[i])
+
+
+_table: Optional[_Table] = None
+
+
+def _get_table():
+    global _table
+    if _table is None:
+        _table = _Table()
+    return _table
+
+
+def element_protons(protons: int):
+    if not 1 <= protons <= len(_get_table().symbols):
+        raise ValueError('No element with ' + str(protons) + ' protons')
+    return _get_table().element(protons - 1)
+
+
+def element_symbol(symbol: str):
+    try:
+        return _get_table().element(_get_table().by_symbol[symbol])
+    except KeyError:
+        raise ValueError("Unknown element '" + symbol + "'") from None
+
+
+def element_name(name: str):
+    try:
+        return _get_table().element(_get_table().by_name[name.lower()])
+    except KeyError:
+        raise ValueError("Unknown element name '" + name + "'") from None
+
+
+def elements_with(**kwargs):
+    table = _get_table()
+    elements = (table.element(i) for i in range(len(table.symbols)))
+    return [elm for elm in elements if all(getattr(elm, key) == value for key, value in kwargs.items())]
+
+
+def mass(symbol: str) -> float:
+    if symbol == ELECTRON:
+        return ELECTRON_MASS
+    return element_symbol(symbol).mass
+
+
+def molar_mass(molecule: Molecule) -> float:
+    comp = molecule.composition
+    return sum(mass(_index_symbol(comp[i])) * comp[i + 1] for i in range(0, len(comp), 2))
+
+
+def mass_percent(molecule: Molecule) -> Dict[str, float]:
+    comp = molecule.composition
+    masses = {_index_symbol(comp[i]): mass(_index_symbol(comp[i])) * comp[i + 1] for i in range(0, len(comp), 2)}
+    total = sum(masses.values())
+    return {symbol: 100 * m / total for symbol, m in masses.items()}
+
+
+def _index_masses(size: int):
+    # Masses by molecule element index, nan for symbols that are not elements; grown as new symbols appear
+    import numpy as np
+
+    table = _get_table()
+    known = table.index_masses
+    if known is None or len(known) < size:
+        masses = np.full(size, np.nan)
+        start = 0 if known is None else len(known)
+        if known is not None:
+            masses[:start] = known
+        for i in range(start, size):
+            symbol = _index_symbol(i)
+            if symbol == ELECTRON:
+                masses[i] = ELECTRON_MASS
+            elif symbol in table.by_symbol:
+                masses[i] = table.masses[table.by_symbol[symbol]]
+        table.index_masses = known = masses
+    return known
+
+
+def molar_masses(molecules: Iterable[Molecule]):
+    # Molar masses of many molecules as a numpy array, nan for molecules with symbols that are not elements
+    import numpy as np
+
+    owners, elems, counts = [], [], []
+    n = 0
+    for n, mol in enumerate(molecules, 1):
+        comp = mol.composition
+        owners.extend([n - 1] * (len(comp) // 2))
+        elems.extend(comp[0::2])
+        counts.extend(comp[1::2])
+
+    elems = np.asarray(elems, dtype=np.intp)
+    masses = _index_masses(int(elems.max()) + 1 if len(elems) else 0)
+    return np.bincount(np.asarray(owners, dtype=np.intp), weights=masses[elems] * np.asarray(counts, dtype=np.float64),
+                       minlength=n)
@@ -0,0 +1,97 @@
+import math
+from fractions import Fraction
+from typing import Iterable, List, Tuple, Union
+
+# Integers with more bits than this have their gcds and lcms computed with gmpy2 when it is installed, which is
+# asymptotically faster than the builtin math functions on very large numbers
+BIG_BITS = 4096
+
+_gmpy2 = None  # the gmpy2 module once looked up, False when it is not installed
+
+# Shared Fractions for the small whole coefficients nearly every equation uses
+_INTEGERS = [Fraction(i) for i in range(65)]
+
+
+def _big_math():
+    global _gmpy2
+    if _gmpy2 is None:
+        try:
+            import gmpy2
+            _gmpy2 = gmpy2
+        except ImportError:
+            _gmpy2 = False
+    return _gmpy2
+
+
+def _is_big(values: List[int]):
+    return any(abs(x).bit_length() > BIG_BITS for x in values)
+
+
+def gcd(values: List[int]) -> int:
+    gmpy2 = _is_big(values) and _big_math()
+    if gmpy2:
+        return int(gmpy2.gcd(*values)) if values else 0
+    return math.gcd(*values)
+
+
+def lcm(values: List[int]) -> int:
+    gmpy2 = _is_big(values) and _big_math()
+    if gmpy2:
+        return int(gmpy2.lcm(*values)) if values else 1
+    return math.lcm(*values)
+
+
+def fraction(numerator: int, denominator: int = 1) -> Fraction:
+    if denominator == 1 and 0 <= numerator < len(_INTEGERS):
+        return _INTEGERS[numerator]
+    return Fraction(numerator, denominator)
+
+
+def parse(coeff: str = '') -> Fraction:
+    if not coeff:
+        return _INTEGERS[1]
+
+    coeff = ''.join(coeff.split())
+    if coeff[0] == '-':
+        raise ValueError('Coefficient cannot be negative')
+
+    if coeff.isnumeric():
+        frac = fraction(int(coeff))
+    elif '.' in coeff:
+        frac = Fraction(*float(coeff).as_integer_ratio())
+    elif '/' in coeff:
+        ratio = coeff.split('/')
+        if len(ratio) != 2:
+            raise ValueError('Invalid coefficient numerical value')
+        frac = Fraction(int(ratio[0]), int(ratio[1]))
+    else:
+        raise ValueError('Invalid coefficient numerical value')
+    return frac
+
+
+def as_fraction(value: Union[int, float, str, Fraction]) -> Fraction:
+    # Exact value of a coefficient or scalar; floats are taken at their exact binary value
+    if isinstance(value, Fraction):
+        return value
+    if isinstance(value, str):
+        return parse(value)
+    if isinstance(value, float):
+        return Fraction(*value.as_integer_ratio())
+    if isinstance(value, int):
+        return fraction(value)
+    return Fraction(value)
+
+
+def common_denominator(coeffs: Iterable[Fraction]) -> Tuple[List[int], int]:
+    # Coefficients as integers over one shared denominator, the least one possible
+    pairs = [(c.numerator, c.denominator) for c in coeffs]
+    denom = lcm([d for _, d in pairs])
+    return [n * (denom // d) if d != denom else n for n, d in pairs], denom
+
+
+def primitive(values: List[int]) -> Tuple[List[int], int]:
+    # Values divided by their gcd, and the gcd; all zero values are returned as they are with a gcd of 0
+    divisor = gcd(values)
+    if divisor > 1:
+        values = [x // divisor for x in values]
+    return values, divisor
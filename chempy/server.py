@@ -0,0 +1,374 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Deque, Dict, List, Optional, Tuple, Union
+
+from chempy.balance_cache import BalanceCache
+from chempy.batch import BalanceResult, balance_chunk
+from chempy.util import ParseError
+
+MAX_BODY = 1 << 20
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 408: 'Request Timeout',
+            413: 'Payload Too Large', 422: 'Unprocessable Entity', 503: 'Service Unavailable',
+            504: 'Gateway Timeout'}
+
+
+class _HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _record(source: str, result: Optional[BalanceResult]) -> Dict:
+    if result is None:
+        return {'equation': source, 'error': 'Timed out', 'type': 'TimeoutError'}
+    if result.ok:
+        return {'equation': source, 'balanced': str(result.equation)}
+    record = {'equation': source, 'error': str(result.error), 'type': result.error.__class__.__name__}
+    if isinstance(result.error, ParseError):
+        record['position'] = result.error.position
+    return record
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+class Metrics:
+    # Counters and a window of recent request latencies, reported by the /metrics endpoint
+    def __init__(self, window: int = 4096):
+        self.requests = 0
+        self.equations = 0
+        self.rejected = 0  # turned away because the queue was full
+        self.timeouts = 0
+        self.batches = 0
+        self.max_queue_depth = 0
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._batch_seconds: Deque[float] = deque(maxlen=window)
+
+    def observe(self, seconds: float):
+        self._latencies.append(seconds)
+
+    def observe_batch(self, seconds: float):
+        self.batches += 1
+        self._batch_seconds.append(seconds)
+
+    def snapshot(self, queue_depth: int, batches_in_flight: int) -> Dict:
+        latencies = sorted(self._latencies)
+        batch_seconds = sorted(self._batch_seconds)
+        return {
+            'requests': self.requests,
+            'equations': self.equations,
+            'rejected': self.rejected,
+            'timeouts': self.timeouts,
+            'batches': self.batches,
+            'mean_batch_size': self.equations / self.batches if self.batches else 0.0,
+            'queue_depth': queue_depth,
+            'max_queue_depth': self.max_queue_depth,
+            'batches_in_flight': batches_in_flight,
+            'latency_seconds': {'p50': _percentile(latencies, 0.5), 'p90': _percentile(latencies, 0.9),
+                                'p99': _percentile(latencies, 0.99), 'max': latencies[-1] if latencies else 0.0},
+            'batch_seconds': {'p50': _percentile(batch_seconds, 0.5), 'p99': _percentile(batch_seconds, 0.99)},
+        }
+
+
+class BalanceServer:
+    # HTTP/1.1 balancing service on a TCP port or a Unix socket:
+    #   POST /balance   {"equation": "H2 + O2 = H2O"} or {"equations": [...]}
+    #   GET /metrics    counters, queue depth and latency percentiles
+    #   GET /health
+    # Equations from concurrent requests are queued and dispatched to the worker pool in micro-batches of up to
+    # max_batch, waiting at most max_delay seconds to fill one. At most one batch per worker is in flight; once
+    # max_queue equations are waiting, requests are answered 503 straight away, and a request with more than
+    # max_queue equations is answered 413 as it could never be queued. A request not answered within timeout
+    # seconds gets a 504 and its equations are dropped from the queue.
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, path: Optional[str] = None,
+                 executor: Union[str, Executor] = 'process', max_workers: Optional[int] = None,
+                 max_batch: int = 64, max_delay: float = 0.002, max_queue: int = 1024, timeout: float = 10.0,
+                 method: str = 'integer', cache: Optional[BalanceCache] = None):
+        if max_batch < 1 or max_queue < 1:
+            raise ValueError('Batch and queue sizes must be positive')
+        self.host, self.port, self.path = host, port, path
+        self.max_batch, self.max_delay, self.max_queue, self.timeout = max_batch, max_delay, max_queue, timeout
+        self.method, self.cache = method, cache
+        self.metrics = Metrics()
+        self._workers = max_workers or os.cpu_count() or 1
+        if isinstance(executor, str):
+            if executor == 'process':
+                self._pool, self._owns_pool = ProcessPoolExecutor(self._workers), True
+            elif executor == 'thread':
+                self._pool, self._owns_pool = ThreadPoolExecutor(self._workers), True
+            else:
+                raise ValueError("Unknown executor '" + executor + "', expecting 'process' or 'thread'")
+        elif isinstance(executor, Executor):
+            self._pool, self._owns_pool = executor, False
+        else:
+            raise TypeError("Expecting type 'str' or 'Executor', got '" + str(type(executor).__name__) +
+                            "' instead")
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._batches: set = set()
+
+    async def start(self):
+        self._queue = asyncio.Queue(self.max_queue)
+        self._slots = asyncio.Semaphore(self._workers)
+        # Warm every worker up front so the first requests do not pay for imports; sympy only when it is used
+        loop = asyncio.get_running_loop()
+        warmup = [(0, 'H2 + O2 = H2O')]
+        await asyncio.gather(*(loop.run_in_executor(self._pool, balance_chunk, warmup, self.method, None)
+                               for _ in range(self._workers)))
+        if self.path is not None:
+            self._server = await asyncio.start_unix_server(self._handle, self.path)
+        else:
+            self._server = await asyncio.start_server(self._handle, self.host, self.port)
+            self.port = self._server.sockets[0].getsockname()[1]
+        self._dispatcher = asyncio.ensure_future(self._dispatch())
+
+    @property
+    def address(self) -> str:
+        return 'unix:' + self.path if self.path is not None else 'http://' + self.host + ':' + str(self.port)
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+            if self.path is not None:
+                try:
+                    os.unlink(self.path)
+                except FileNotFoundError:
+                    pass
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            await asyncio.gather(self._dispatcher, *self._batches, return_exceptions=True)
+            self._dispatcher = None
+        while self._queue is not None and not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            future.cancel()
+        if self._owns_pool:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    # Batching
+
+    async def _dispatch(self):
+        while True:
+            await self._slots.acquire()
+            try:
+                batch = [await self._queue.get()]
+                if self._queue.qsize() < self.max_batch - 1 and self.max_delay > 0:
+                    await asyncio.sleep(self.max_delay)
+                while len(batch) < self.max_batch and not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+            except BaseException:
+                self._slots.release()
+                raise
+            task = asyncio.ensure_future(self._run_batch(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _run_batch(self, batch: List[Tuple[str, asyncio.Future]]):
+        try:
+            batch = [(source, future) for source, future in batch if not future.done()]  # drop timed out ones
+            if not batch:
+                return
+            start = time.perf_counter()
+            chunk = [(i, source) for i, (source, _) in enumerate(batch)]
+            try:
+                results = await asyncio.get_running_loop().run_in_executor(self._pool, balance_chunk, chunk,
+                                                                           self.method, self.cache)
+            except Exception as e:  # the pool itself failed, e.g. a worker process died
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            self.metrics.observe_batch(time.perf_counter() - start)
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self._slots.release()
+
+    async def balance(self, sources: List[str]) -> List[Optional[BalanceResult]]:
+        # Queues the equations and waits for their results, None for any that timed out
+        if len(sources) > self.max_queue:
+            raise _HTTPError(413, 'At most ' + str(self.max_queue) + ' equations per request')
+        if self._queue.maxsize - self._queue.qsize() < len(sources):
+            self.metrics.rejected += 1
+            raise _HTTPError(503, 'Server is busy, retry later')
+        loop = asyncio.get_running_loop()
+        futures = [loop.create_future() for _ in sources]
+        for source, future in zip(sources, futures):
+            self._queue.put_nowait((source, future))
+        self.metrics.equations += len(sources)
+        self.metrics.max_queue_depth = max(self.metrics.max_queue_depth, self._queue.qsize())
+
+        done, pending = await asyncio.wait(futures, timeout=self.timeout)
+        for future in pending:
+            future.cancel()
+        if pending:
+            self.metrics.timeouts += 1
+
+        # Equations that fail come back as results; an exception here means the pool itself failed, e.g. it was
+        # shut down or a worker process died, or the server is closing
+        results = []
+        for future in futures:
+            if future not in done:
+                results.append(None)
+            elif future.cancelled():
+                raise _HTTPError(503, 'Server is shutting down')
+            elif future.exception() is not None:
+                raise _HTTPError(503, 'Balancing workers failed: ' + str(future.exception()))
+            else:
+                results.append(future.result())
+        return results
+
+    # HTTP
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(self._read_request(reader), self.timeout)
+                except asyncio.TimeoutError:
+                    await self._respond(writer, 408, {'error': 'Request not received in time'}, False)
+                    return
+                except _HTTPError as e:
+                    await self._respond(writer, e.status, {'error': str(e)}, False)
+                    return
+                if request is None:
+                    return
+                method, target, keep_alive, body = request
+                start = time.perf_counter()
+                self.metrics.requests += 1
+                try:
+                    status, payload = await self._route(method, target, body)
+                except _HTTPError as e:
+                    status, payload = e.status, {'error': str(e)}
+                if target == '/balance':
+                    self.metrics.observe(time.perf_counter() - start)
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader):
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, version = line.decode('latin-1').split()
+        except ValueError:
+            raise _HTTPError(400, 'Malformed request line') from None
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise _HTTPError(400, 'Invalid Content-Length') from None
+        if length < 0:
+            raise _HTTPError(400, 'Invalid Content-Length')
+        if length > MAX_BODY:
+            raise _HTTPError(413, 'Request body larger than ' + str(MAX_BODY) + ' bytes')
+        body = await reader.readexactly(length) if length else b''
+        connection = headers.get('connection', '').lower()
+        keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+        return method, target.split('?')[0], keep_alive, body
+
+    async def _route(self, method: str, target: str, body: bytes) -> Tuple[int, Dict]:
+        if target == '/balance':
+            if method != 'POST':
+                raise _HTTPError(405, 'Use POST')
+            try:
+                request = json.loads(body)
+            except ValueError:
+                raise _HTTPError(400, 'Request body is not valid JSON') from None
+            if isinstance(request, dict) and isinstance(request.get('equation'), str):
+                record = _record(request['equation'], (await self.balance([request['equation']]))[0])
+                status = 200 if 'balanced' in record else 504 if record['type'] == 'TimeoutError' else 422
+                return status, record
+            if isinstance(request, dict) and isinstance(request.get('equations'), list) \
+                    and all(isinstance(eq, str) for eq in request['equations']):
+                results = await self.balance(request['equations']) if request['equations'] else []
+                return 200, {'results': [_record(eq, result) for eq, result in zip(request['equations'], results)]}
+            raise _HTTPError(400, "Expecting an object with an 'equation' string or an 'equations' list")
+        if target == '/metrics':
+            if method != 'GET':
+                raise _HTTPError(405, 'Use GET')
+            return 200, self.metrics.snapshot(self._queue.qsize(), len(self._batches))
+        if target == '/health':
+            return 200, {'status': 'ok'}
+        raise _HTTPError(404, 'No such endpoint: ' + target)
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: int, payload: Dict, keep_alive: bool):
+        body = json.dumps(payload).encode()
+        head = 'HTTP/1.1 ' + str(status) + ' ' + _REASONS.get(status, '') + '\r\n' \
+               'Content-Type: application/json\r\n' \
+               'Content-Length: ' + str(len(body)) + '\r\n' + \
+               ('Retry-After: 1\r\n' if status == 503 else '') + \
+               ('Connection: keep-alive\r\n' if keep_alive else 'Connection: close\r\n') + '\r\n'
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(prog='python -m chempy.server',
+                                     description='Serve equation balancing over HTTP on a local port or Unix socket.')
+    parser.add_argument('--host', default='127.0.0.1', help='address to listen on (default 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8000, help='port to listen on (default 8000)')
+    parser.add_argument('--unix', metavar='PATH', help='listen on a Unix socket instead of a port')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='worker processes (default one per CPU)')
+    parser.add_argument('--threads', action='store_true', help='balance in threads instead of processes')
+    parser.add_argument('--max-batch', type=int, default=64, help='equations per micro-batch')
+    parser.add_argument('--max-delay', type=float, default=0.002, help='seconds to wait to fill a micro-batch')
+    parser.add_argument('--max-queue', type=int, default=1024, help='queued equations before rejecting requests')
+    parser.add_argument('--timeout', type=float, default=10.0, help='seconds before a request times out')
+    parser.add_argument('--method', choices=['integer', 'sparse', 'sympy'], default='integer', help='balancing method')
+    parser.add_argument('--cache', metavar='PATH', help='SQLite file to cache balances in')
+    args = parser.parse_args(argv)
+
+    server = BalanceServer(args.host, args.port, args.unix, 'thread' if args.threads else 'process', args.workers,
+                           args.max_batch, args.max_delay, args.max_queue, args.timeout, args.method,
+                           BalanceCache(path=args.cache) if args.cache else None)
+
+    async def run():
+        async with server:
+            print('Serving on ' + server.address, file=sys.stderr)
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,214 @@
+from typing import Dict, List, Optional, Tuple, Union
+
+from chempy import balancer, rational
+from chempy.equation import PRODUCTS, REACTANTS, Equation, Species
+from chempy.molecule import Molecule, element_index
+
+_CHARGE = 'charge'
+
+
+class BalanceSession:
+    # Mutable equation that keeps its balance up to date as species are added and removed, for editors that
+    # rebalance on every change. The composition matrix A (one row per element and charge, one column per species,
+    # products negated) is kept factored as the fraction-free reduced echelon form of [A | T], where the square
+    # integer matrix T records the row operations applied so far. T turns a new species' column into reduced form
+    # with one matrix-vector product, so an edit costs one pivot step over the rows instead of a full elimination.
+    #
+    # Invariants: rows without a pivot have an all zero A part; every other row is zero in the pivot columns of the
+    # other rows; rows are kept primitive.
+    def __init__(self, equation: Union[str, Equation, None] = None):
+        self._molecules: List[Molecule] = []  # species by column
+        self._signs: List[int] = []  # 1 for reactants, -1 for products
+        self._keys: List[Union[int, str]] = []  # element index or 'charge' of each column of T
+        self._key_cols: Dict[Union[int, str], int] = {}
+        self._key_uses: Dict[Union[int, str], int] = {}  # species containing each key
+        self._a: List[List[int]] = []  # A part of each row
+        self._t: List[List[int]] = []  # T part of each row
+        self._pivots: List[Optional[int]] = []  # pivot column of each row
+        self._basis: Optional[List[List[int]]] = None
+
+        if isinstance(equation, str):
+            equation = Equation.from_str(equation)
+        if equation is not None:
+            for sp in equation.reactants:
+                self.add(sp, REACTANTS)
+            for sp in equation.products:
+                self.add(sp, PRODUCTS)
+
+    @staticmethod
+    def _amounts(mol: Molecule) -> List[Tuple[Union[int, str], int]]:
+        # (row key, count) of a species: element indices, electrons excluded, and 'charge'
+        comp, electron = mol.composition, element_index(balancer.ELECTRON)
+        amounts = [(comp[i], comp[i + 1]) for i in range(0, len(comp), 2) if comp[i] != electron]
+        if mol.charge:
+            amounts.append((_CHARGE, mol.charge))
+        return amounts
+
+    # Editing
+
+    def add(self, species: Union[str, Molecule, Species], side: str = REACTANTS) -> int:
+        # Adds a species (its coefficient is ignored) and returns its position on its side
+        mol = self._molecule(species)
+        sign = self._sign(side)
+
+        for key, _ in self._amounts(mol):
+            if key not in self._key_cols:
+                self._add_key(key)
+            self._key_uses[key] = self._key_uses.get(key, 0) + 1
+
+        # The new column of the reduced matrix is T times the species' column of A
+        col = len(self._molecules)
+        amounts = [(self._key_cols[key], sign * count) for key, count in self._amounts(mol)]
+        for a, t in zip(self._a, self._t):
+            a.append(sum(t[k] * x for k, x in amounts))
+        self._molecules.append(mol)
+        self._signs.append(sign)
+
+        # Only rows without a pivot can pivot on it; their A part is zero elsewhere, so eliminating the column from
+        # the other rows leaves their pivot columns untouched
+        candidates = [i for i, pivot in enumerate(self._pivots) if pivot is None and self._a[i][col]]
+        if candidates:
+            self._pivot(min(candidates, key=lambda i: abs(self._a[i][col])), col)
+        self._basis = None
+        return self._signs.count(sign) - 1
+
+    def remove(self, species: Union[str, Molecule, Species], side: str = REACTANTS):
+        # Removes the last occurrence of a species from a side
+        mol, sign = self._molecule(species), self._sign(side)
+        cols = [col for col in range(len(self._molecules)) if self._molecules[col] == mol and self._signs[col] == sign]
+        if not cols:
+            raise ValueError("'" + str(mol) + "' is not one of the " + side)
+        self._remove_col(cols[-1])
+
+    def _remove_col(self, col: int):
+        mol = self._molecules.pop(col)
+        self._signs.pop(col)
+        for a in self._a:
+            del a[col]
+        freed = None
+        for i, pivot in enumerate(self._pivots):
+            if pivot == col:
+                freed = i
+                self._pivots[i] = None
+            elif pivot is not None and pivot > col:
+                self._pivots[i] = pivot - 1
+        if freed is not None:
+            # The row is zero in every other pivot column, so it can pivot on any of its remaining entries
+            entries = [c for c, x in enumerate(self._a[freed]) if x]
+            if entries:
+                self._pivot(freed, min(entries, key=lambda c: abs(self._a[freed][c])))
+
+        for key, _ in self._amounts(mol):
+            self._key_uses[key] -= 1
+            if not self._key_uses[key]:
+                del self._key_uses[key]
+                self._remove_key(key)
+        self._basis = None
+
+    def _add_key(self, key: Union[int, str]):
+        # New all zero row of A: T grows by an identity row and column
+        k = len(self._keys)
+        self._keys.append(key)
+        self._key_cols[key] = k
+        for t in self._t:
+            t.append(0)
+        self._a.append([0] * len(self._molecules))
+        self._t.append([0] * k + [1])
+        self._pivots.append(None)
+
+    def _remove_key(self, key: Union[int, str]):
+        # Drops an all zero row of A. Some row without a pivot has a nonzero entry in T's column for it (the unit
+        # vector of that row is in the left null space, which those rows span); it eliminates the column from the
+        # others and is dropped. Its A part is zero, so the other rows' A parts do not change.
+        k = self._key_cols.pop(key)
+        r = next(i for i, pivot in enumerate(self._pivots) if pivot is None and self._t[i][k])
+        tr = self._t[r]
+        for i, t in enumerate(self._t):
+            f = t[k]
+            if i != r and f:
+                self._set_row(i, [tr[k] * x for x in self._a[i]], [tr[k] * x - f * y for x, y in zip(t, tr)])
+        for rows in (self._a, self._t, self._pivots):
+            del rows[r]
+        for t in self._t:
+            del t[k]
+        del self._keys[k]
+        self._key_cols = {key: i for i, key in enumerate(self._keys)}
+
+    def _pivot(self, r: int, col: int):
+        ar, tr = self._a[r], self._t[r]
+        p = ar[col]
+        for i, a in enumerate(self._a):
+            f = a[col]
+            if i != r and f:
+                self._set_row(i, [p * x - f * y for x, y in zip(a, ar)],
+                              [p * x - f * y for x, y in zip(self._t[i], tr)])
+        self._pivots[r] = col
+
+    def _set_row(self, i: int, a: List[int], t: List[int]):
+        divisor = rational.gcd(a + t)
+        if divisor > 1:
+            a, t = [x // divisor for x in a], [x // divisor for x in t]
+        self._a[i], self._t[i] = a, t
+
+    @staticmethod
+    def _molecule(species: Union[str, Molecule, Species]) -> Molecule:
+        if isinstance(species, Species):
+            return species.molecule
+        if isinstance(species, str):
+            return Molecule.complete_formula(species)
+        return species
+
+    @staticmethod
+    def _sign(side: str) -> int:
+        if side == REACTANTS:
+            return 1
+        if side == PRODUCTS:
+            return -1
+        raise ValueError("Unknown side '" + str(side) + "', expecting '" + REACTANTS + "' or '" + PRODUCTS + "'")
+
+    # Results
+
+    @property
+    def reactants(self) -> List[Molecule]:
+        return [mol for mol, sign in zip(self._molecules, self._signs) if sign > 0]
+
+    @property
+    def products(self) -> List[Molecule]:
+        return [mol for mol, sign in zip(self._molecules, self._signs) if sign < 0]
+
+    @property
+    def rank(self) -> int:
+        return sum(pivot is not None for pivot in self._pivots)
+
+    def nullspace(self) -> List[List[int]]:
+        # Primitive integer basis of the balances, each a coefficient vector over reactants then products
+        if self._basis is None:
+            rows = [(a, pivot) for a, pivot in zip(self._a, self._pivots) if pivot is not None]
+            basis = balancer.echelon_nullspace([a for a, _ in rows], [pivot for _, pivot in rows],
+                                               len(self._molecules))
+            order = self._order()
+            self._basis = [[vec[col] for col in order] for vec in basis]
+        return [list(vec) for vec in self._basis]
+
+    def coefficients(self) -> List[int]:
+        return balancer.positive_solution(self.nullspace())
+
+    def balance(self) -> Equation:
+        coeffs = self.coefficients()
+        species = [Species._make(mol, rational.fraction(coeff))
+                   for mol, coeff in zip(self.reactants + self.products, coeffs)]
+        split = len(self.reactants)
+        return Equation(species[:split], species[split:])
+
+    def equation(self) -> Equation:
+        return Equation([Species(mol) for mol in self.reactants], [Species(mol) for mol in self.products])
+
+    def _order(self) -> List[int]:
+        cols = range(len(self._molecules))
+        return [col for col in cols if self._signs[col] > 0] + [col for col in cols if self._signs[col] < 0]
+
+    def __len__(self):
+        return len(self._molecules)
+
+    def __str__(self):
+        return str(self.equation())
@@ -0,0 +1,110 @@
+from typing import Dict, List, NamedTuple, Union
+
+import numpy as np
+
+from chempy import ptable
+from chempy.equation import Equation
+from chempy.molecule import Molecule
+
+MOLES = 'mol'
+GRAMS = 'g'
+
+
+class Yield(NamedTuple):
+    # Results over a batch of feeds, in the unit of the amounts given; ... is the batch shape of the feeds
+    limiting: np.ndarray  # (...,) index of the limiting reactant
+    extent: np.ndarray  # (...,) moles of reaction, the number of times the equation runs
+    products: np.ndarray  # (..., products) theoretical yield of each product
+    consumed: np.ndarray  # (..., reactants)
+    excess: np.ndarray  # (..., reactants) left over once the limiting reactant runs out
+
+
+class Stoichiometry:
+    # Limiting reagent and theoretical yields of a balanced equation for many feeds at once. A feed is one amount
+    # per reactant, in the order of the equation's reactants; feeds are stacked along any leading dimensions, so
+    # a (scenarios, reactants) array is evaluated in one call.
+    def __init__(self, equation: Union[str, Equation]):
+        if isinstance(equation, str):
+            equation = Equation.from_str(equation)
+        if not equation.reactants or not equation.products:
+            raise ValueError("Equation '" + str(equation) + "' needs both reactants and products")
+        if not equation.is_balanced():
+            raise ValueError("Equation '" + str(equation) + "' is not balanced")
+        if any(sp.coeff <= 0 for sp in equation.reactants + equation.products):
+            raise ValueError("Equation '" + str(equation) + "' has coefficients that are not positive")
+        self.equation = equation
+        self.reactants: List[Molecule] = [sp.molecule for sp in equation.reactants]
+        self.products: List[Molecule] = [sp.molecule for sp in equation.products]
+        self._reactant_coeffs = np.array([float(sp.coeff) for sp in equation.reactants])
+        self._product_coeffs = np.array([float(sp.coeff) for sp in equation.products])
+        self._reactant_masses = None
+        self._product_masses = None
+
+    def _masses(self):
+        if self._reactant_masses is None:
+            masses = ptable.molar_masses(self.reactants + self.products)
+            if np.isnan(masses).any():
+                unknown = [str(mol) for mol, m in zip(self.reactants + self.products, masses) if np.isnan(m)]
+                raise ValueError('No molar mass for ' + ', '.join("'" + mol + "'" for mol in unknown))
+            self._reactant_masses, self._product_masses = masses[:len(self.reactants)], masses[len(self.reactants):]
+        return self._reactant_masses, self._product_masses
+
+    def amounts(self, values: Dict[Union[str, Molecule, int], float]) -> np.ndarray:
+        # Feed vector from amounts by reactant, or by position among the reactants for a molecule that appears more
+        # than once; reactants not given are 0
+        feed = np.zeros(len(self.reactants))
+        for key, value in values.items():
+            if isinstance(key, int):
+                if not 0 <= key < len(self.reactants):
+                    raise ValueError('Reactant position ' + str(key) + ' out of range')
+                feed[key] = value
+                continue
+            mol = Molecule.complete_formula(key) if isinstance(key, str) else key
+            positions = [i for i, reactant in enumerate(self.reactants) if reactant == mol]
+            if not positions:
+                raise ValueError("Species '" + str(mol) + "' is not one of the reactants")
+            if len(positions) > 1:
+                raise ValueError("Species '" + str(mol) + "' appears more than once among the reactants, expecting "
+                                 "one of its positions " + ', '.join(map(str, positions)) + ' instead')
+            feed[positions[0]] = value
+        return feed
+
+    def limiting(self, amounts: np.ndarray, unit: str = MOLES) -> Yield:
+        amounts = np.asarray(amounts, dtype=np.float64)
+        if amounts.ndim < 1 or amounts.shape[-1] != len(self.reactants):
+            raise ValueError('Expecting ' + str(len(self.reactants)) + ' reactant amounts per feed, got shape ' +
+                             str(amounts.shape))
+        if not np.isfinite(amounts).all():
+            raise ValueError('Reactant amounts must be finite')
+        if (amounts < 0).any():
+            raise ValueError('Reactant amounts must not be negative')
+        if unit == MOLES:
+            moles = amounts
+        elif unit == GRAMS:
+            moles = amounts / self._masses()[0]
+        else:
+            raise ValueError("Unknown unit '" + str(unit) + "', expecting '" + MOLES + "' or '" + GRAMS + "'")
+
+        runs = moles / self._reactant_coeffs
+        limiting = runs.argmin(axis=-1)
+        extent = np.take_along_axis(runs, limiting[..., None], axis=-1)[..., 0]
+        consumed = extent[..., None] * self._reactant_coeffs
+        products = extent[..., None] * self._product_coeffs
+        if unit == GRAMS:
+            reactant_masses, product_masses = self._masses()
+            consumed *= reactant_masses
+            products *= product_masses
+        excess = amounts - consumed
+        # The limiting reactant is used up exactly, and rounding must not leave a negative excess elsewhere
+        np.put_along_axis(excess, limiting[..., None], 0, axis=-1)
+        np.maximum(excess, 0, out=excess)
+        return Yield(limiting, extent, products, consumed, excess)
+
+    def required(self, extent: np.ndarray, unit: str = MOLES) -> np.ndarray:
+        # Reactant amounts needed to run the equation extent times, (..., reactants)
+        amounts = np.asarray(extent, dtype=np.float64)[..., None] * self._reactant_coeffs
+        if unit == GRAMS:
+            amounts *= self._masses()[0]
+        elif unit != MOLES:
+            raise ValueError("Unknown unit '" + str(unit) + "', expecting '" + MOLES + "' or '" + GRAMS + "'")
+        return amounts
@@ -0,0 +1,194 @@
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+from array import array
+from fractions import Fraction
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+from chempy import codec, rational
+from chempy.equation import Equation, Species
+from chempy.molecule import Molecule
+
+# File layout, all integers in the byte order of the machine that wrote it:
+#   magic, byte order flag                                               8 bytes
+#   reactions, species, molecules, molecule bytes                        4 x uint64
+#   species offsets (reactions + 1) | molecule offsets (molecules + 1)   uint64
+#   numerators | denominators (species)                                  int64
+#   molecule ids (species) | reactant counts (reactions)                 uint32
+#   molecule table                                                       codec encoded molecules
+_MAGIC = b'CPYRXS1'
+_HEADER = struct.Struct('=8s4Q')
+_BYTE_ORDER = b'<' if sys.byteorder == 'little' else b'>'
+_INT64 = 2 ** 63
+_UINT32 = 2 ** 32
+
+# (name, typecode) of each array section in file order
+_SECTIONS = (('starts', 'Q'), ('molecule_offsets', 'Q'), ('numerators', 'q'), ('denominators', 'q'),
+             ('molecules', 'I'), ('reactants', 'I'))
+
+
+class StoreWriter:
+    # Appends equations to a new reaction store. Molecules are interned into a table written once; the per-species
+    # arrays are spooled to temporary files, so memory grows with the number of distinct molecules only.
+    def __init__(self, path: str):
+        self._path = path
+        self._ids: Dict[Molecule, int] = {}
+        self._table = bytearray()
+        self._molecule_offsets = array('Q', [0])
+        self._sections = {name: tempfile.TemporaryFile() for name, _ in _SECTIONS if name != 'molecule_offsets'}
+        self._reactions = 0
+        self._species = 0
+        self._sections['starts'].write(array('Q', [0]).tobytes())
+
+    def _molecule_id(self, mol: Molecule) -> int:
+        mid = self._ids.get(mol)
+        if mid is None:
+            mid = self._ids[mol] = len(self._ids)
+            self._table += codec.encode_molecule(mol)
+            self._molecule_offsets.append(len(self._table))
+        return mid
+
+    def add(self, eq: Union[str, Equation]) -> int:
+        if isinstance(eq, str):
+            eq = Equation.from_str(eq)
+        species = eq.reactants + eq.products
+        nums = [sp.coeff.numerator for sp in species]
+        denoms = [sp.coeff.denominator for sp in species]
+        if any(not -_INT64 <= x < _INT64 for x in nums + denoms):
+            raise OverflowError('Coefficient too large to store: ' + str(eq))
+        if self._reactions + 1 >= _UINT32:
+            raise OverflowError('Reaction store is full')
+
+        self._sections['molecules'].write(array('I', [self._molecule_id(sp.molecule) for sp in species]).tobytes())
+        self._sections['numerators'].write(array('q', nums).tobytes())
+        self._sections['denominators'].write(array('q', denoms).tobytes())
+        self._sections['reactants'].write(array('I', [len(eq.reactants)]).tobytes())
+        self._species += len(species)
+        self._sections['starts'].write(array('Q', [self._species]).tobytes())
+        self._reactions += 1
+        return self._reactions - 1
+
+    def extend(self, equations: Iterable[Union[str, Equation]]):
+        for eq in equations:
+            self.add(eq)
+
+    def close(self):
+        if self._sections is None:
+            return
+        tmp = self._path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC + _BYTE_ORDER, self._reactions, self._species, len(self._ids),
+                                 len(self._table)))
+            for name, _ in _SECTIONS:
+                if name == 'molecule_offsets':
+                    self._molecule_offsets.tofile(f)
+                else:
+                    section = self._sections[name]
+                    section.seek(0)
+                    shutil.copyfileobj(section, f)
+            f.write(self._table)
+        os.replace(tmp, self._path)
+        self.abort()
+
+    def abort(self):
+        # Discards the spooled sections without writing the store
+        if self._sections is not None:
+            for section in self._sections.values():
+                section.close()
+            self._sections = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class ReactionStore:
+    # Read-only reaction store, memory-mapped and decoded lazily: an Equation is only built when it is accessed,
+    # and each molecule of the table is decoded once, on first use.
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < _HEADER.size:
+                raise ValueError("'" + path + "' is not a reaction store")
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, reactions, species, molecules, table_len = _HEADER.unpack_from(self._mm)
+        if magic[:7] != _MAGIC:
+            self._mm.close()
+            raise ValueError("'" + path + "' is not a reaction store")
+        if magic[7:] != _BYTE_ORDER:
+            self._mm.close()
+            raise ValueError("'" + path + "' was written on a machine with a different byte order")
+
+        counts = {'starts': reactions + 1, 'molecule_offsets': molecules + 1, 'numerators': species,
+                  'denominators': species, 'molecules': species, 'reactants': reactions}
+        view = memoryview(self._mm)
+        pos = _HEADER.size
+        self._views: Dict[str, memoryview] = {}
+        for name, typecode in _SECTIONS:
+            size = counts[name] * array(typecode).itemsize
+            self._views[name] = view[pos:pos + size].cast(typecode)
+            pos += size
+        view.release()
+        self._table = pos
+        self._len = reactions
+        self._molecules: List[Optional[Molecule]] = [None] * molecules
+
+    @staticmethod
+    def write(path: str, equations: Iterable[Union[str, Equation]]) -> 'ReactionStore':
+        with StoreWriter(path) as writer:
+            writer.extend(equations)
+        return ReactionStore(path)
+
+    def molecule(self, mid: int) -> Molecule:
+        mol = self._molecules[mid]
+        if mol is None:
+            offsets = self._views['molecule_offsets']
+            mol = self._molecules[mid] = codec.decode_molecule(
+                self._mm[self._table + offsets[mid]:self._table + offsets[mid + 1]])
+        return mol
+
+    @property
+    def molecule_count(self):
+        return len(self._molecules)
+
+    def __getitem__(self, i: int) -> Equation:
+        if i < 0:
+            i += self._len
+        if not 0 <= i < self._len:
+            raise IndexError('Reaction store index out of range')
+        views = self._views
+        start, end = views['starts'][i], views['starts'][i + 1]
+        mids, nums, denoms = views['molecules'][start:end], views['numerators'][start:end], \
+            views['denominators'][start:end]
+        species = [Species._make(self.molecule(mid), rational.fraction(num) if denom == 1 else Fraction(num, denom))
+                   for mid, num, denom in zip(mids, nums, denoms)]
+        split = views['reactants'][i]
+        return Equation(species[:split], species[split:])
+
+    def __iter__(self) -> Iterator[Equation]:
+        return (self[i] for i in range(self._len))
+
+    def __len__(self):
+        return self._len
+
+    def close(self):
+        if self._mm is not None:
+            for view in self._views.values():
+                view.release()
+            self._views = {}
+            self._mm.close()
+            self._mm = None
+            self._len = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,262 @@
+import io
+from collections import deque
+from typing import Deque, Iterator, List, Optional, TextIO, Tuple, Union
+
+from chempy import rational
+from chempy.equation import PRODUCTS, REACTANTS, Equation, Species
+from chempy.molecule import Molecule, _parse
+from chempy.util import ALPHA, NUMBER, SYMBOL, ParseError, token_spans
+
+CHUNK_SIZE = 1 << 16
+
+# Token as (kind, text, position): text has its whitespace removed and position is the offset of its first character
+# in the input. The scanner ends with (None, '', length of the input).
+Token = Tuple[Optional[str], str, int]
+
+
+def _chunks(source: Union[str, TextIO], chunk_size: int) -> Iterator[str]:
+    if isinstance(source, str):
+        return (source[i:i + chunk_size] for i in range(0, len(source), chunk_size))
+    if not hasattr(source, 'read'):
+        raise TypeError("Expecting type 'str' or a text file, got '" + type(source).__name__ + "' instead")
+    return _read_chunks(source, chunk_size)
+
+
+def _read_chunks(f: TextIO, chunk_size: int) -> Iterator[str]:
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            return
+        if not isinstance(chunk, str):
+            raise TypeError("Expecting a text file, got '" + type(chunk).__name__ + "' data instead")
+        yield chunk
+
+
+def _scan(chunks: Iterator[str], split: bool = False) -> Iterator[Token]:
+    # Tokens of each chunk as token_spans finds them, except the last one, which may continue in the next chunk and
+    # is scanned again with it. Only that token is carried over, so memory is bounded by the chunk size. With split,
+    # tokens outside of ASCII are broken up as the parser needs them, see _pieces.
+    # A carried token longer than a chunk is not rescanned while it stays open: whether a chunk continues it only
+    # depends on the token's last character, so that character is scanned with the chunk and the chunk is set aside
+    # until the token ends.
+    buf, base = '', 0
+    parts: List[str] = []  # chunks continuing the carried token, not yet added to buf
+    seed = ''  # last character of a long carried token, empty when the token is rescanned with the next chunk
+    last = None
+    for chunk in chunks:
+        if seed:
+            spans = token_spans(seed + chunk)
+            next(spans)
+            if next(spans, None) is None:
+                parts.append(chunk)
+                tail = chunk.rstrip()
+                seed = tail[-1] if tail else seed
+                continue
+            buf += ''.join(parts)
+            parts = []
+        buf += chunk
+        last = None
+        for span in token_spans(buf):
+            if last is not None:
+                kind, start, end = last
+                text = buf[start:end]
+                if (len(text) == 1 or text.isalnum()) and text.isascii():
+                    yield kind, text, base + start
+                else:
+                    yield from _token(kind, text, base + start, split)
+            last = span
+        cut = len(buf) if last is None else last[1]
+        buf, base = buf[cut:], base + cut
+        seed = buf.rstrip()[-1] if len(buf) > len(chunk) else ''
+    buf += ''.join(parts)
+    for kind, start, end in token_spans(buf):
+        yield from _token(kind, buf[start:end], base + start, split)
+    yield None, '', base + len(buf)
+
+
+def _token(kind: str, text: str, pos: int, split: bool) -> Iterator[Token]:
+    if split and not text.isascii():
+        yield from _pieces(kind, text, pos)
+    else:
+        yield kind, ''.join(text.split()), pos
+
+
+def _pieces(kind: str, text: str, pos: int) -> Iterator[Token]:
+    # The grammar only knows ASCII letters and digits, so a token like 'Oé' is its ASCII part followed by each other
+    # character as a symbol, every piece at its own position
+    ascii_text, ascii_pos = '', pos
+    for i, c in enumerate(text, pos):
+        if c.isspace():
+            continue
+        if c.isascii():
+            if not ascii_text:
+                ascii_pos = i
+            ascii_text += c
+            continue
+        if ascii_text:
+            yield kind, ascii_text, ascii_pos
+            ascii_text = ''
+        yield SYMBOL, c, i
+    if ascii_text:
+        yield kind, ascii_text, ascii_pos
+
+
+def iter_tokens(source: Union[str, TextIO], chunk_size: int = CHUNK_SIZE) -> Iterator[Tuple[str, str, int]]:
+    # Same tokens as util.tokenize, as (kind, text, position), read from a string or a text file chunk_size
+    # characters at a time
+    return (tok for tok in _scan(_chunks(source, chunk_size)) if tok[0] is not None)
+
+
+def _is_lower(tok: Token) -> bool:
+    return tok[0] == ALPHA and 'a' <= tok[1][0] <= 'z'
+
+
+def _is_alnum(tok: Token) -> bool:
+    return tok[0] == ALPHA or tok[0] == NUMBER
+
+
+def _is_symbol(tok: Token, text: str) -> bool:
+    return tok[0] == SYMBOL and tok[1] == text
+
+
+class _Parser:
+    # Forward parser over the token stream for the same grammar as Equation.from_str, with the same errors at the
+    # same positions. Letters and digits outside of ASCII arrive as symbols, see _pieces. It looks at most four
+    # tokens ahead, and formulas are counted as their tokens go by, so besides the molecules it builds it only holds
+    # one group of element counts per open parenthesis.
+    def __init__(self, source: Union[str, TextIO], chunk_size: int):
+        self._tokens = _scan(_chunks(source, chunk_size), split=True)
+        self._ahead: Deque[Token] = deque()
+
+    def peek(self, i: int = 0) -> Token:
+        ahead = self._ahead
+        while len(ahead) <= i:
+            tok = next(self._tokens, None)
+            if tok is None:
+                return ahead[-1]  # end of input
+            ahead.append(tok)
+        return ahead[i]
+
+    def take(self) -> Token:
+        tok = self.peek()
+        if tok[0] is not None:
+            self._ahead.popleft()
+        return tok
+
+    def _opens_states(self, i: int) -> bool:
+        # A '(' followed by a lowercase letter opens the states rather than a group of the formula
+        return _is_symbol(self.peek(i), '(') and _is_lower(self.peek(i + 1))
+
+    def _formula(self, text: io.StringIO) -> Iterator[str]:
+        # Tokens of the formula, taken straight from the scanner as this is where long inputs spend their time
+        ahead, tokens, write = self._ahead, self._tokens, text.write
+        while True:
+            tok = ahead.popleft() if ahead else next(tokens)
+            kind = tok[0]
+            if kind != ALPHA and kind != NUMBER and not _is_symbol(tok, ')'):
+                ahead.appendleft(tok)
+                if not _is_symbol(tok, '(') or self._opens_states(0):
+                    return
+                ahead.popleft()
+            write(tok[1])
+            yield tok[1]
+
+    def molecule(self) -> Molecule:
+        start = self.peek()[2]
+        text = io.StringIO()
+        try:
+            elements = _parse(self._formula(text))
+        except ValueError as e:
+            raise ParseError(str(e), start) from None
+        formula = text.getvalue()
+        if not formula:
+            raise ParseError('Expected molecule formula', start)
+
+        # A '+' is only a charge when it ends the species, i.e. when it is followed by the end of the input, '+',
+        # '=' or states, directly or after a number
+        charge = 0
+        tok = self.peek()
+        if _is_symbol(tok, '-'):
+            self.take()
+            charge = -int(self.take()[1]) if self.peek()[0] == NUMBER else -1
+        elif _is_symbol(tok, '+'):
+            i = 2 if self.peek(1)[0] == NUMBER else 1
+            after = self.peek(i)
+            if after[0] is None or _is_symbol(after, '+') or _is_symbol(after, '=') or self._opens_states(i):
+                self.take()
+                charge = int(self.take()[1]) if i == 2 else 1
+
+        states = None
+        if self._opens_states(0):
+            paren = self.take()
+            states, state = [], ''
+            while True:
+                tok = self.peek()
+                if _is_alnum(tok):
+                    state += tok[1]
+                elif state and (_is_symbol(tok, ',') or _is_symbol(tok, ')')):
+                    states.append(state)
+                    state = ''
+                else:
+                    raise ParseError("Unexpected '('", paren[2])
+                self.take()
+                if _is_symbol(tok, ')'):
+                    break
+
+        return Molecule._interned_elements(formula, elements, charge, states)
+
+    def species(self) -> Species:
+        coeff = None
+        tok = self.peek()
+        if tok[0] == NUMBER:
+            coeff = self.take()[1]
+            sep, denom = self.peek(), self.peek(1)
+            if (_is_symbol(sep, '.') or _is_symbol(sep, '/')) and denom[0] == NUMBER:
+                self.take()
+                self.take()
+                coeff += sep[1] + denom[1]
+        mol = self.molecule()
+        return Species._make(mol, rational.fraction(1) if coeff is None else
+                             rational.fraction(int(coeff)) if coeff.isdigit() else
+                             rational.parse(coeff))
+
+    def equation(self) -> Iterator[Tuple[str, Species]]:
+        side = REACTANTS
+        while True:
+            yield side, self.species()
+            tok = self.take()
+            if tok[0] is None:
+                return
+            if _is_symbol(tok, '='):
+                if side == PRODUCTS:
+                    raise ParseError("Unexpected second '='", tok[2])
+                side = PRODUCTS
+            elif not _is_symbol(tok, '+'):
+                raise ParseError("Unexpected '" + tok[1][0] + "'", tok[2])
+
+    def end(self):
+        tok = self.peek()
+        if tok[0] is not None:
+            raise ParseError("Unexpected '" + tok[1][0] + "'", tok[2])
+
+
+def iter_species(source: Union[str, TextIO], chunk_size: int = CHUNK_SIZE) -> Iterator[Tuple[str, Species]]:
+    # (side, species) of an equation in order as they are parsed, side being REACTANTS or PRODUCTS
+    return _Parser(source, chunk_size).equation()
+
+
+def read_equation(source: Union[str, TextIO], chunk_size: int = CHUNK_SIZE) -> Equation:
+    # Same result as Equation.from_str, from a string or a text file read incrementally
+    reactants: List[Species] = []
+    products: List[Species] = []
+    for side, sp in iter_species(source, chunk_size):
+        (reactants if side == REACTANTS else products).append(sp)
+    return Equation(reactants, products)
+
+
+def read_molecule(source: Union[str, TextIO], chunk_size: int = CHUNK_SIZE) -> Molecule:
+    # A complete formula as it appears in an equation, without a coefficient
+    parser = _Parser(source, chunk_size)
+    mol = parser.molecule()
+    parser.end()
+    return mol
@@ -1,30 +1,157 @@
-def tokenize(src: str):
-    src = ''.join(src.split())  # remove whitespaces
-    tokens = []
-    reserve = ''
-
-    def add_tok(tok: str):
-        if tok != '':
-            tokens.append(tok)
-
-    def retrieve_store():
-        nonlocal reserve
-        tmp = reserve
-        reserve = ''
-        return tmp
-
-    for c in src:
+import re
+import threading
+from collections import OrderedDict
+from time import perf_counter
+from typing import Any, Hashable, Iterator, List, NamedTuple, Optional, Tuple
+
+from chempy import instrument
+
+
+class ParseError(ValueError):
+    def __init__(self, message: str, position: int):
+        super().__init__(message + ' at position ' + str(position))
+        self.message = message
+        self.position = position
+
+    def __reduce__(self):
+        return self.__class__, (self.message, self.position)
+
+
+ALPHA = 'alpha'
+NUMBER = 'number'
+SYMBOL = 'symbol'
+
+# Whitespace never separates tokens, so 'H e' is the same token as 'He'. An alpha token is one capital letter and
+# the lowercase letters after it, or a run of lowercase letters; every other non-space character stands alone.
+_TOKEN = re.compile(r'[A-Z][a-z]*|[a-z]+|[0-9]+|.', re.DOTALL)
+_TOKEN_SPAN = re.compile(r'(?P<alpha>[A-Z](?:\s*[a-z])*|[a-z](?:\s*[a-z])*)'
+                         r'|(?P<number>[0-9](?:\s*[0-9])*)'
+                         r'|(?P<symbol>\S)')
+
+
+def tokenize(src: str) -> List[str]:
+    started = perf_counter() if instrument.enabled else None
+    try:
+        src = ''.join(src.split())  # remove whitespaces
+        if not src.isascii():
+            return [''.join(src[start:end].split()) for _, start, end in _char_spans(src)]
+        return _TOKEN.findall(src)
+    finally:
+        if started is not None:
+            instrument.stage('tokenize', started)
+
+
+def token_spans(src: str) -> Iterator[Tuple[str, int, int]]:
+    # Same tokens as tokenize, as (kind, start, end) positions into src instead of new strings. A span may contain
+    # whitespace, which is not part of the token.
+    if not src.isascii():
+        return _char_spans(src)
+    return ((m.lastgroup, m.start(), m.end()) for m in _TOKEN_SPAN.finditer(src))
+
+
+def _char_spans(src: str) -> Iterator[Tuple[str, int, int]]:
+    # Character by character scanner for input outside of ASCII, where str.isalpha, str.isnumeric and str.isupper
+    # decide what a letter, a digit or a capital is
+    kind, start, end = None, 0, 0
+
+    for i, c in enumerate(src):
+        if c.isspace():
+            continue
         if c.isalpha():
-            if not reserve.isalpha() or c.isupper():
-                add_tok(retrieve_store())
+            new = kind != ALPHA or c.isupper()
+            c_kind = ALPHA
         elif c.isnumeric():
-            if not reserve.isnumeric():
-                add_tok(retrieve_store())
+            new = kind != NUMBER
+            c_kind = NUMBER
         else:
-            add_tok(retrieve_store())
-        reserve += c
+            new = True
+            c_kind = SYMBOL
+
+        if new:
+            if kind is not None:
+                yield kind, start, end
+            kind, start = c_kind, i
+        end = i + 1
+
+    if kind is not None:
+        yield kind, start, end  # last token
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    maxsize: Optional[int]
+    currsize: int
+
+
+class LRUCache:
+    # Thread-safe mapping that discards its least recently used entries once it holds more than maxsize of them.
+    # A maxsize of None means unbounded, 0 disables caching altogether.
+    def __init__(self, maxsize: Optional[int] = 128):
+        self._data: 'OrderedDict[Hashable, Any]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._maxsize = maxsize
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: Hashable, default: Any = None):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self._misses += 1
+                return default
+            self._data.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        with self._lock:
+            if self._maxsize == 0:
+                return
+            self._data[key] = value
+            self._data.move_to_end(key)
+            self._evict()
+
+    def setdefault(self, key: Hashable, value: Any):
+        # Like put, but keeps and returns an existing value; does not count as a lookup
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                return self._data[key]
+            if self._maxsize != 0:
+                self._data[key] = value
+                self._evict()
+            return value
+
+    def resize(self, maxsize: Optional[int]):
+        if maxsize is not None and maxsize < 0:
+            raise ValueError('Cache size cannot be negative')
+        with self._lock:
+            self._maxsize = maxsize
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._hits = self._misses = self._evictions = 0
+
+    def info(self):
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self._evictions, self._maxsize, len(self._data))
 
-    add_tok(retrieve_store())  # last token in reserve
+    def _evict(self):
+        if self._maxsize is None:
+            return
+        while len(self._data) > self._maxsize:
+            self._data.popitem(last=False)
+            self._evictions += 1
 
-    return tokens
+    def __contains__(self, key: Hashable):
+        with self._lock:
+            return key in self._data
 
+    def __len__(self):
+        return len(self._data)
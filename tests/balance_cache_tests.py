@@ -0,0 +1,91 @@
+import os
+import pickle
+import tempfile
+import unittest
+
+from chempy import Equation, balance_cache
+from chempy.balance_cache import BalanceCache, canonical_key
+from chempy.batch import balance_many
+
+
+class BalanceCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'balances.sqlite')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_canonical_key(self):
+        a = Equation.from_str('H2 + O2 = H2O').simplify()
+        b = Equation.from_str('4O2 + 2H2 + H2O = 5H2O').simplify()
+        key = canonical_key([sp.molecule for sp in a.reactants], [sp.molecule for sp in a.products])
+        self.assertEqual(key, 'H2 + O2 = H2O')
+        self.assertEqual(key, canonical_key([sp.molecule for sp in b.reactants], [sp.molecule for sp in b.products]))
+        self.assertEqual(canonical_key([sp.molecule for sp in b.reactants], [sp.molecule for sp in b.products],
+                                       [int(sp.coeff) for sp in b.reactants + b.products]), '2H2 + 4O2 = 4H2O')
+
+    def test_memory(self):
+        cache = BalanceCache()
+        first = Equation.from_str('Fe + O2 = Fe2O3').balance(cache=cache)
+        second = Equation.from_str('O2 + 2Fe = 1/2Fe2O3').balance(cache=cache)
+        self.assertEqual(str(first), '4Fe + 3O2 = 2Fe2O3')
+        self.assertEqual(str(second), '3O2 + 4Fe = 2Fe2O3')
+        info = cache.info()
+        self.assertEqual((info.hits, info.disk_hits, info.misses, info.currsize), (1, 0, 1, 1))
+        self.assertEqual(info.hit_rate, 0.5)
+
+        # The method is checked before the cache is looked up
+        self.assertRaises(ValueError, lambda: Equation.from_str('Fe + O2 = Fe2O3').balance('gauss', cache=cache))
+        self.assertEqual(cache.info().hits, 1)
+
+    def test_failures_not_cached(self):
+        cache = BalanceCache()
+        for _ in range(2):
+            self.assertRaises(ValueError, lambda: Equation.from_str('H2 = O2').balance(cache=cache))
+        self.assertEqual(cache.info().currsize, 0)
+        self.assertEqual(cache.info().misses, 2)
+
+    def test_disk(self):
+        cache = BalanceCache(path=self.path)
+        expected = str(Equation.from_str('C3H8 + O2 = CO2 + H2O').balance(cache=cache))
+        cache.close()
+
+        # a cold cache on the same file skips balancing
+        cold = BalanceCache(path=self.path)
+        self.assertEqual(str(Equation.from_str('O2 + C3H8 = H2O + CO2').balance(cache=cold)),
+                         '5O2 + C3H8 = 4H2O + 3CO2')
+        self.assertEqual(str(Equation.from_str('C3H8 + O2 = CO2 + H2O').balance(cache=cold)), expected)
+        info = cold.info()
+        self.assertEqual((info.hits, info.disk_hits, info.misses), (1, 1, 0))
+
+        cold.clear(disk=True)
+        self.assertIsNone(cold.get([], []))
+        self.assertEqual(cold.info().misses, 1)
+        cold.close()
+
+    def test_pickle(self):
+        cache = BalanceCache(maxsize=10, path=self.path)
+        other = pickle.loads(pickle.dumps(cache))
+        self.assertEqual(other.path, self.path)
+        self.assertEqual(other.info().maxsize, 10)
+        self.assertIs(pickle.loads(pickle.dumps(cache)), other)
+
+        # A forked child does not keep the instances of its parent
+        balance_cache._forget_reopened()
+        self.assertEqual(balance_cache._reopened, {})
+        self.assertIsNot(pickle.loads(pickle.dumps(cache)), other)
+
+    def test_balance_many(self):
+        equations = ['H2 + O2 = H2O', 'Fe + O2 = Fe2O3', 'H2 = O2'] * 4
+        cache = BalanceCache(path=self.path)
+        results = list(balance_many(equations, executor='process', chunksize=2, max_workers=2, cache=cache))
+        self.assertEqual([result.ok for result in results], [True, True, False] * 4)
+
+        list(balance_many(equations[:2], cache=cache))
+        self.assertEqual(cache.info().misses, 0)
+        cache.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
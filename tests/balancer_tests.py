@@ -0,0 +1,126 @@
+import unittest
+from fractions import Fraction
+
+from chempy import Equation, Molecule
+from chempy import balancer
+
+
+equations = [
+    'H2 + O2 = H2O',
+    'Fe + O2 = Fe2O3',
+    'C3H8 + O2 = CO2 + H2O',
+    'C8H18 + O2 = CO2 + H2O',
+    'C6H12O6 + O2 = CO2 + H2O',
+    'KMnO4 + HCl = KCl + MnCl2 + H2O + Cl2',
+    'Ca(OH)2(aq) + H3PO4 = Ca3(PO4)2(s) + H2O',
+    'NH4NO3 = N2O + H2O',
+    'Al + H2SO4 = Al2(SO4)3(aq) + H2',
+    'K4Fe(CN)6(s) + KMnO4 + H2SO4 = KHSO4 + Fe2(SO4)3(aq) + MnSO4 + HNO3 + CO2 + H2O',
+    '2H2 + O2 + H2O = 3H2O',
+    'MnO4- + Fe+(aq) + e- = Mn(s) + FeO(s)',
+]
+
+
+def coefficients(eq: Equation):
+    return [sp.coeff for sp in eq.reactants + eq.products]
+
+
+class CompositionMatrixTests(unittest.TestCase):
+    def test_matrix(self):
+        reactants = [Molecule.complete_formula('H2'), Molecule.complete_formula('O2')]
+        products = [Molecule.complete_formula('H2O')]
+        keys, rows = balancer.composition_matrix(reactants, products)
+        self.assertEqual(keys, ['H', 'O'])
+        self.assertEqual(rows, [[2, 0, -2], [0, 2, -1]])
+
+    def test_charge_row(self):
+        reactants = [Molecule.complete_formula('Fe+2(aq)')]
+        products = [Molecule.complete_formula('Fe+3(aq)'), Molecule.complete_formula('e-')]
+        keys, rows = balancer.composition_matrix(reactants, products)
+        self.assertEqual(keys, ['Fe', 'charge'])
+        self.assertEqual(rows[-1], [2, -3, 1])
+
+
+class NullspaceTests(unittest.TestCase):
+    def test_nullspace(self):
+        self.assertEqual(balancer.nullspace([[2, 0, -2], [0, 2, -1]], 3), [[2, 1, 2]])
+        self.assertEqual(balancer.nullspace([[1, -1, 0, 0]], 4), [[1, 1, 0, 0], [0, 0, 1, 0], [0, 0, 0, 1]])
+        self.assertEqual(balancer.nullspace([[1, 0], [0, 1]], 2), [])
+
+    def test_nullspace_is_exact(self):
+        rows = [[1, 2, -3, 4, 0], [2, -1, 0, 0, 5], [0, 3, 3, -3, 1]]
+        for vec in balancer.nullspace(rows, 5):
+            for row in rows:
+                self.assertEqual(sum(a * b for a, b in zip(row, vec)), 0)
+
+    def test_sparse_nullspace(self):
+        rows = [[1, 2, -3, 4, 0], [2, -1, 0, 0, 5], [0, 3, 3, -3, 1], [0, 0, 0, 0, 0]]
+        sparse = [{col: x for col, x in enumerate(row) if x} for row in rows]
+        basis = balancer.sparse_nullspace(sparse, 5)
+        self.assertEqual(len(basis), len(balancer.nullspace(rows, 5)))
+        for vec in basis:
+            for row in rows:
+                self.assertEqual(sum(a * b for a, b in zip(row, vec)), 0)
+
+    def test_sparse_blocks(self):
+        # two independent blocks, {0, 1} and {2, 3, 4}, plus a column that appears nowhere
+        rows = [{0: 2, 1: -1}, {2: 1, 4: -1}, {3: 1, 4: -2}]
+        basis = balancer.sparse_nullspace(rows, 6)
+        self.assertEqual(sorted(basis), sorted([[1, 2, 0, 0, 0, 0], [0, 0, 1, 2, 1, 0], [0, 0, 0, 0, 0, 1]]))
+
+
+class BalanceTests(unittest.TestCase):
+    def test_integer(self):
+        self.assertEqual(coefficients(Equation.from_str('H2 + O2 = H2O').balance()), [2, 1, 2])
+        self.assertEqual(coefficients(Equation.from_str('Fe + O2 = Fe2O3').balance()), [4, 3, 2])
+        self.assertEqual(coefficients(Equation.from_str('KMnO4 + HCl = KCl + MnCl2 + H2O + Cl2').balance()),
+                         [2, 16, 2, 2, 8, 5])
+        for sp in Equation.from_str('C8H18 + O2 = CO2 + H2O').balance().reactants:
+            self.assertIsInstance(sp.coeff, Fraction)
+            self.assertEqual(sp.coeff.denominator, 1)
+
+    def test_charge(self):
+        eq = Equation.from_dict({Molecule.complete_formula('Fe+2(aq)'): Fraction(1)},
+                                {Molecule.complete_formula('Fe+3(aq)'): Fraction(1),
+                                 Molecule.complete_formula('e-'): Fraction(1)})
+        self.assertEqual(coefficients(eq.balance()), [1, 1, 1])
+
+    def test_unbalanceable(self):
+        self.assertRaises(ValueError, lambda: Equation.from_str('H2 = O2').balance())
+        self.assertRaises(ValueError, lambda: Equation.from_str('H2 + O2 = H2O + H2O2').balance())
+        self.assertRaises(ValueError, lambda: Equation.from_str('H2O = H2 + O2 + H2O2').balance())
+
+    def test_unknown_method(self):
+        self.assertRaises(ValueError, lambda: Equation.from_str('H2 + O2 = H2O').balance('numpy'))
+
+    def test_non_unique(self):
+        eq = Equation.from_str('H2 + O2 + Na + Cl2 = H2O + NaCl')
+        for method in ('integer', 'sparse', 'sympy'):
+            with self.assertRaises(balancer.NonUniqueBalanceError) as ctx:
+                eq.balance(method)
+            basis = ctx.exception.basis
+            self.assertEqual(len(basis), 2)
+            _, rows = balancer.composition_matrix([sp.molecule for sp in eq.reactants],
+                                                  [sp.molecule for sp in eq.products])
+            for vec in basis:
+                for row in rows:
+                    self.assertEqual(sum(a * b for a, b in zip(row, vec)), 0)
+
+    def test_sparse(self):
+        for eq in equations:
+            eq = Equation.from_str(eq)
+            self.assertEqual(coefficients(eq.balance('sparse')), coefficients(eq.balance()), str(eq))
+
+        symbols = ['Q' + chr(ord('a') + i // 26) + chr(ord('a') + i % 26) for i in range(300)]
+        eq = Equation.from_str(' + '.join(symbol + '2' for symbol in symbols) + ' = ' + ''.join(symbols))
+        self.assertEqual(coefficients(eq.balance('sparse')), [1] * 300 + [2])
+
+    def test_sympy_cross_check(self):
+        for eq in equations:
+            eq = Equation.from_str(eq)
+            self.assertEqual(coefficients(eq.balance()), coefficients(eq.balance('sympy')), str(eq))
+            self.assertEqual(str(eq.balance()), str(eq.balance('sympy')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import pickle
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from chempy import Equation, util
+from chempy.batch import BalanceResult, balance_chunk, balance_many
+
+
+equations = ['H2 + O2 = H2O', 'Fe + O2 = Fe2O3', 'H2 = O2', 'C3H8 + O2 = CO2 + H2O', 'H2 . O2',
+             'KMnO4 + HCl = KCl + MnCl2 + H2O + Cl2'] * 7
+expected = [str(Equation.from_str(eq).balance()) if i % 6 not in (2, 4) else None for i, eq in enumerate(equations)]
+
+
+class BalanceManyTests(unittest.TestCase):
+    def check(self, results):
+        self.assertEqual(len(results), len(equations))
+        for result in results:
+            self.assertIsInstance(result, BalanceResult)
+            self.assertEqual(result.source, equations[result.index])
+            if expected[result.index] is None:
+                self.assertFalse(result.ok)
+                self.assertIsNone(result.equation)
+                self.assertIsInstance(result.error, ValueError)
+            else:
+                self.assertTrue(result.ok)
+                self.assertEqual(str(result.equation), expected[result.index])
+
+    def test_serial(self):
+        results = list(balance_many(iter(equations), chunksize=4))
+        self.check(results)
+        self.assertEqual([result.index for result in results], list(range(len(equations))))
+
+    def test_chunk(self):
+        results = balance_chunk([(5, equations[0]), (9, equations[2])])
+        self.assertEqual([(result.index, result.ok) for result in results], [(5, True), (9, False)])
+        self.assertEqual(str(results[0].equation), expected[0])
+
+    def test_equation_objects(self):
+        results = list(balance_many([Equation.from_str(equations[0])]))
+        self.assertEqual(str(results[0].equation), expected[0])
+
+    def test_thread(self):
+        results = list(balance_many(equations, executor='thread', chunksize=3, max_workers=2))
+        self.check(results)
+        self.assertEqual([result.index for result in results], list(range(len(equations))))
+
+        results = list(balance_many(equations, executor='thread', chunksize=3, ordered=False))
+        self.check(results)
+        self.assertEqual(sorted(result.index for result in results), list(range(len(equations))))
+
+    def test_process(self):
+        results = list(balance_many(equations, executor='process', chunksize=5, max_workers=2))
+        self.check(results)
+        self.assertEqual([result.index for result in results], list(range(len(equations))))
+        self.assertIsInstance(results[4].error, util.ParseError)
+        self.assertEqual(results[4].error.position, 3)
+
+    def test_executor_instance(self):
+        with ThreadPoolExecutor(2) as pool:
+            self.check(list(balance_many(equations, executor=pool, ordered=False)))
+            self.assertEqual(pool.submit(len, 'abc').result(), 3)  # still usable
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, lambda: list(balance_many(equations, executor='gpu')))
+        self.assertRaises(ValueError, lambda: list(balance_many(equations, chunksize=0)))
+        self.assertRaises(TypeError, lambda: list(balance_many(equations, executor=4)))
+
+    def test_parse_error_pickles(self):
+        error = pickle.loads(pickle.dumps(util.ParseError('Unexpected', 3)))
+        self.assertEqual(error.position, 3)
+        self.assertEqual(str(error), 'Unexpected at position 3')
+
+
+if __name__ == '__main__':
+    unittest.main()
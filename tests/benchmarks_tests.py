@@ -0,0 +1,45 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from benchmarks import corpora
+from benchmarks.__main__ import main
+from chempy import Equation, Molecule
+
+
+class CorporaTests(unittest.TestCase):
+    def test_equations_balance(self):
+        for eq in corpora.SIMPLE_INORGANIC + corpora.ORGANIC_COMBUSTIONS + corpora.MANY_SPECIES:
+            Equation.from_str(eq).balance()
+
+    def test_molecules_parse(self):
+        for formula in corpora.MOLECULES:
+            Molecule.complete_formula(formula)
+        self.assertEqual(corpora.nested_formula(1), '(CH3)2N')
+
+
+class RunnerTests(unittest.TestCase):
+    def test_baseline_and_regression(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'baseline.json')
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.assertEqual(main(['-k', 'tokenize/', '--min-time', '0', '--baseline', path, '--save']), 0)
+            with open(path) as f:
+                baseline = json.load(f)
+            self.assertEqual(sorted(baseline), ['tokenize/inorganic', 'tokenize/many_species'])
+
+            for result in baseline.values():
+                result['items_per_sec'] *= 1000
+            with open(path, 'w') as f:
+                json.dump(baseline, f)
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                self.assertEqual(main(['-k', 'tokenize/', '--min-time', '0', '--baseline', path]), 1)
+            self.assertIn('Regressions', out.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
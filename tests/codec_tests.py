@@ -0,0 +1,50 @@
+import pickle
+import unittest
+from fractions import Fraction
+
+from chempy import Equation, Molecule, codec
+
+equations = ['2H2 + O2 = 2H2O', 'Cu+2(aq) + 2e- = Cu(s)', '1/2N2 + 3/2H2 = NH3', 'Fe2(SO4)3 + KOH = K2SO4 + Fe(OH)3',
+             'SO4-2(aq, l) + Ba+2(aq) = BaSO4(s)']
+
+
+class CodecTests(unittest.TestCase):
+    def test_molecule(self):
+        for formula in ['H2O', 'SO4-2(aq)', 'Cu+2(aq, s)', 'e-', 'Na+']:
+            mol = Molecule.complete_formula(formula)
+            data = codec.encode_molecule(mol)
+            self.assertIsInstance(data, bytes)
+            self.assertIs(codec.decode_molecule(data), mol)
+
+    def test_equation(self):
+        for src in equations:
+            eq = Equation.from_str(src)
+            decoded = codec.decode_equation(codec.encode_equation(eq))
+            self.assertEqual(str(decoded), str(eq))
+            self.assertEqual([sp.coeff for sp in decoded.reactants], [sp.coeff for sp in eq.reactants])
+            self.assertTrue(all(type(sp.coeff) is Fraction for sp in decoded.reactants + decoded.products))
+
+    def test_extreme_values(self):
+        eq = Equation.from_str('H2 + O2 = H2O') * Fraction(3 ** 100, 7 ** 40) * -1
+        self.assertEqual(codec.decode_equation(codec.encode_equation(eq)).reactants[0].coeff,
+                         Fraction(-3 ** 100, 7 ** 40))
+        mol = Molecule.interned('Fe', -300, ['aq'])
+        self.assertIs(codec.decode_molecule(codec.encode_molecule(mol)), mol)
+
+    def test_invalid(self):
+        data = codec.encode_equation(Equation.from_str(equations[0]))
+        self.assertRaises(ValueError, lambda: codec.decode_equation(data[:-1]))
+        self.assertRaises(ValueError, lambda: codec.decode_equation(data + b'\0'))
+        self.assertRaises(ValueError, lambda: codec.decode_molecule(b'\x05H2'))
+
+    def test_pickle(self):
+        eqs = [Equation.from_str(src) for src in equations]
+        for eq, copy in zip(eqs, pickle.loads(pickle.dumps(eqs))):
+            self.assertEqual(str(copy), str(eq))
+            self.assertIs(copy.reactants[0].molecule, eq.reactants[0].molecule)
+        sp = eqs[2].reactants[0]
+        self.assertEqual(pickle.loads(pickle.dumps(sp)).coeff, Fraction(1, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
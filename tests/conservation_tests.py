@@ -0,0 +1,91 @@
+import unittest
+from fractions import Fraction
+
+from chempy import Equation
+
+try:
+    import numpy as np
+    from chempy import conservation
+except ImportError:
+    np = None
+
+try:
+    import scipy
+except ImportError:
+    scipy = None
+
+
+equations = ['2H2 + O2 = 2H2O', 'H2 + O2 = H2O', 'Cu+2(aq) + 2e- = Cu(s)', 'Cu+2(aq) + e- = Cu(s)',
+             '1/2N2 + 3/2H2 = NH3', 'N2 + H2 = NH3', '1/3O3 = 1/4O2', 'H2O = H2O']
+
+
+class ImbalanceTests(unittest.TestCase):
+    def test_equation(self):
+        eqs = [Equation.from_str(eq) for eq in equations]
+        self.assertEqual([eq.is_balanced() for eq in eqs], [True, False, True, False, True, False, False, True])
+        self.assertEqual(eqs[1].imbalance(), {'O': Fraction(-1)})
+        self.assertEqual(eqs[3].imbalance(), {'charge': Fraction(-1)})
+        self.assertEqual(eqs[5].imbalance(), {'N': Fraction(-1), 'H': Fraction(1)})
+        self.assertEqual(eqs[6].imbalance(), {'O': Fraction(-1, 2)})
+
+    def test_balanced_results(self):
+        for eq in ['C3H8 + O2 = CO2 + H2O', 'KMnO4 + HCl = KCl + MnCl2 + H2O + Cl2', 'Fe+2(aq) = Fe+3(aq) + e-']:
+            self.assertTrue(Equation.from_str(eq).balance().is_balanced())
+
+
+@unittest.skipIf(np is None, 'numpy is not installed')
+class BatchImbalanceTests(unittest.TestCase):
+    def test_batch(self):
+        eqs = [Equation.from_str(eq) for eq in equations]
+        result = conservation.imbalance(eqs)
+        self.assertEqual(len(result), len(eqs))
+        np.testing.assert_array_equal(result.balanced, [eq.is_balanced() for eq in eqs])
+        np.testing.assert_array_equal(conservation.is_balanced(iter(eqs)), result.balanced)
+        for i, eq in enumerate(eqs):
+            self.assertEqual(result.residual(i), eq.imbalance())
+
+        dense = result.dense()
+        self.assertEqual(dense.shape, (len(eqs), len(result.keys)))
+        self.assertEqual(dense[6, result.keys.index('O')], -0.5)
+        self.assertEqual(dense[3, result.keys.index('charge')], -1)
+        self.assertNotIn('e', result.keys)
+
+    def test_single(self):
+        eq = Equation.from_str('H2 + O2 = H2O')
+        self.assertFalse(conservation.is_balanced(eq))
+        self.assertEqual(conservation.imbalance(eq), {'O': Fraction(-1)})
+
+    def test_large_batch(self):
+        eqs = [Equation.from_str(eq) for eq in equations] * 5000
+        balanced = conservation.is_balanced(eqs)
+        self.assertEqual(balanced.shape, (len(eqs),))
+        self.assertEqual(int(balanced.sum()), 4 * 5000)
+
+    def test_large_values(self):
+        # Values beyond int64 are summed exactly instead of overflowing
+        big = Fraction(2 ** 70, 3 ** 41)
+        eqs = [Equation.from_str('H2 + O2 = H2O') * big, Equation.from_str('2H2 + O2 = 2H2O') / 2 ** 65,
+               Equation.from_str('1/' + str(2 ** 40) + 'O2 = 1/' + str(3 ** 30) + 'O3'),
+               Equation.from_str('H2 + O2 = H2O'), Equation.from_str('H2 + O2 = H2O') * 2 ** 62]
+        result = conservation.imbalance(eqs)
+        np.testing.assert_array_equal(result.balanced, [False, True, False, False, False])
+        for i, eq in enumerate(eqs):
+            self.assertEqual(result.residual(i), eq.imbalance())
+        self.assertEqual(result.dense()[3, result.keys.index('O')], -1)
+        self.assertEqual(conservation.imbalance(eqs[3:4]).nums.dtype, np.int64)
+        self.assertEqual(conservation.imbalance(eqs[4:]).residual(0), {'O': -2 ** 62})
+
+    def test_empty(self):
+        result = conservation.imbalance([])
+        self.assertEqual(len(result), 0)
+        self.assertEqual(result.dense().shape, (0, 1))
+        np.testing.assert_array_equal(conservation.is_balanced([Equation([], [])]), [True])
+
+    @unittest.skipIf(scipy is None, 'scipy is not installed')
+    def test_sparse(self):
+        result = conservation.imbalance([Equation.from_str(eq) for eq in equations])
+        np.testing.assert_array_equal(result.sparse().toarray(), result.dense())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+
+from chempy import Equation, balance_cache, dedup
+
+corpus = [
+    '2H2 + O2 = 2H2O',
+    'O2 + 2H2 = 2H2O',
+    'H2 + 1/2O2 = H2O',
+    '4H2 + 2O2 + N2 = 4H2O + N2',
+    '2H2O = 2H2 + O2',
+    'N2 + 3H2 = 2NH3',
+    '2H2 + O2 = H2O2 + H2',
+    'H2 + O2 = H2O2',
+]
+
+
+class CanonicalKeyTests(unittest.TestCase):
+    def test_equivalent(self):
+        keys = [dedup.canonical_key(eq) for eq in corpus[:4]]
+        self.assertEqual(len(set(keys)), 1)
+        self.assertEqual(dedup.canonical_key(Equation.from_str(corpus[0])), keys[0])
+        self.assertEqual(dedup.canonical_key(corpus[6]), dedup.canonical_key(corpus[7]))
+        self.assertEqual(dedup.canonical_key('2Na + 2Cl2 + H2O = 2NaCl + 3H2O'),
+                         dedup.canonical_key('Na + Cl2 = NaCl + H2O'))
+
+    def test_balance_cache_form(self):
+        # The balance cache key of the same molecules, with the coefficients written in
+        self.assertEqual(dedup.canonical_key('H2 + 1/2O2 = H2O'), '2H2 + O2 = 2H2O')
+        eq = Equation.from_str('O2 + H2 = H2O')
+        self.assertEqual(balance_cache.canonical_key([sp.molecule for sp in eq.reactants],
+                                                     [sp.molecule for sp in eq.products]),
+                         dedup.canonical_key(eq))
+        self.assertIsInstance(dedup.canonical_key(corpus[0], directed=False), str)
+
+    def test_distinct(self):
+        self.assertNotEqual(dedup.canonical_key(corpus[0]), dedup.canonical_key(corpus[4]))
+        self.assertNotEqual(dedup.canonical_key('H2 + O2 = H2O'), dedup.canonical_key(corpus[0]))
+        self.assertNotEqual(dedup.canonical_key('Fe+2(aq) = Fe+3(aq)'), dedup.canonical_key('Fe+2(s) = Fe+3(aq)'))
+
+    def test_undirected(self):
+        self.assertEqual(dedup.canonical_key(corpus[0], directed=False), dedup.canonical_key(corpus[4], directed=False))
+        self.assertEqual(dedup.canonical_key('H2O = H2O', directed=False),
+                         dedup.canonical_key(Equation([], []), directed=False))
+
+
+class EquivalenceIndexTests(unittest.TestCase):
+    def test_add(self):
+        index = dedup.EquivalenceIndex(keep_members=True)
+        self.assertEqual([index.add(eq) for eq in corpus],
+                         [(0, True), (0, False), (0, False), (0, False), (1, True), (2, True), (3, True), (3, False)])
+        self.assertEqual((len(index), index.seen), (4, 8))
+        group = index.group(0)
+        self.assertEqual((group.first, group.count, group.members), (0, 4, [0, 1, 2, 3]))
+        self.assertEqual(str(group.representative), corpus[0])
+        self.assertEqual([g.count for g in index.groups()], [4, 1, 1, 2])
+        self.assertIn('4H2O = 4H2 + 2O2', index)
+        self.assertNotIn('H2 + Cl2 = 2HCl', index)
+        self.assertEqual(index.group_of('2NH3 + 2H2O = 3H2 + N2 + 2H2O'), None)
+
+    def test_undirected(self):
+        index = dedup.EquivalenceIndex(directed=False)
+        index.extend(corpus)
+        self.assertEqual(len(index), 3)
+        self.assertIsNone(index.group(0).members)
+
+    def test_unique(self):
+        self.assertEqual([str(eq) for eq in dedup.unique(iter(corpus * 3))],
+                         [corpus[0], corpus[4], corpus[5], corpus[6]])
+
+
+if __name__ == '__main__':
+    unittest.main()
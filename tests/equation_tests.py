@@ -1,7 +1,9 @@
+import pickle
 import unittest
+from collections import Counter
 from fractions import Fraction
 
-from chempy import equation, Molecule
+from chempy import equation, util, Molecule
 
 
 class CoefficientParseTest(unittest.TestCase):
@@ -17,7 +19,7 @@ class CoefficientParseTest(unittest.TestCase):
 
 molecules = [
     Molecule.complete_formula('e-'),
-    Molecule.complete_formula('He(g_'),
+    Molecule.complete_formula('He(g)'),
     Molecule.complete_formula('H2O(l)'),
     Molecule.complete_formula('SO4-2(aq)'),
     Molecule.complete_formula('HgS(s, red)'),
@@ -56,6 +58,19 @@ class SpeciesTest(unittest.TestCase):
                     atoms[key] *= coeffs[len(coeffs) - 1]
                 self.assertEqual(sp.atoms, atoms)
 
+    def test_immutable(self):
+        sp = equation.Species(molecules[2], 2)
+        with self.assertRaises(AttributeError):
+            sp._coeff = Fraction(3)
+        self.assertFalse(hasattr(sp, '__dict__'))
+        sp.atoms['H'] += 1
+        self.assertEqual(sp.atoms, {'H': 4, 'O': 2})
+
+    def test_pickle(self):
+        sp = pickle.loads(pickle.dumps(equation.Species(molecules[3], '3/2')))
+        self.assertEqual(sp.molecule, molecules[3])
+        self.assertEqual(sp.coeff, Fraction(3, 2))
+
     def test_as_dict(self):
         for coeffs in coefficients:
             for coeff, molecule in zip(coeffs, molecules):
@@ -83,7 +98,89 @@ class SpeciesTest(unittest.TestCase):
 
 
 class EquationTests(unittest.TestCase):
-    pass
+    def test_from_str(self):
+        cases = [
+            ('H2 + O2 = H2O', 'H2 + O2 = H2O'),
+            ('2H2+O2=2H2O', '2H2 + O2 = 2H2O'),
+            ('1.5H2 + 3/4 O2 = H2O(l)', '3/2H2 + 3/4O2 = H2O(l)'),
+            ('Na+(aq) + Cl-(aq) = NaCl(s)', 'Na+(aq) + Cl-(aq) = NaCl(s)'),
+            ('Na+ + Cl- = NaCl', 'Na+ + Cl- = NaCl'),
+            ('Cu+2 + 2e- = Cu(s)', 'Cu+2 + 2e- = Cu(s)'),
+            ('Mg+2(aq)+2e-=Mg(s)', 'Mg+2(aq) + 2e- = Mg(s)'),
+            ('SO4-2(aq) + Ba+2(aq) = BaSO4(s)', 'SO4-2(aq) + Ba+2(aq) = BaSO4(s)'),
+            ('HgS(s, red) = Hg(l) + S', 'HgS(s, red) = Hg(l) + S'),
+            ('(NH4)2SO4 + Fe2(SO4)3 = X', '(NH4)2SO4 + Fe2(SO4)3 = X'),
+            ('H2 + O2', 'H2 + O2 = '),
+        ]
+        for src, expected in cases:
+            self.assertEqual(str(equation.Equation.from_str(src)), expected)
+
+        eq = equation.Equation.from_str('Cu+2(aq) + 2e- = Cu(s)')
+        self.assertEqual(eq.reactants[0].molecule.charge, 2)
+        self.assertEqual(eq.reactants[0].molecule.states, ['aq'])
+        self.assertEqual(eq.reactants[1].coeff, Fraction(2))
+        self.assertEqual(eq.reactants[1].molecule.charge, -1)
+        self.assertEqual(eq.products[0].atoms, {'Cu': 1})
+
+    def test_from_str_errors(self):
+        cases = [
+            ('H2 + O2 = = H2O', 10),
+            ('H2 + O2 = H2O = O2', 14),
+            ('H2 . O2', 3),
+            ('2 = H2', 2),
+            ('H2 + (O2 = H2O', 5),
+            ('H2 + O2 = H2O)', 10),
+            ('= H2', 0),
+            ('', 0),
+        ]
+        for src, position in cases:
+            with self.assertRaises(ValueError) as ctx:
+                equation.Equation.from_str(src)
+            self.assertIsInstance(ctx.exception, util.ParseError)
+            self.assertEqual(ctx.exception.position, position, src)
+
+    def test_from_str_shares_molecules(self):
+        eq = equation.Equation.from_str('2H2 + O2 = 2H2O')
+        self.assertIs(eq.reactants[0].molecule, Molecule.complete_formula('H2'))
+        self.assertIs(eq.products[0].molecule, equation.Species('H2O').molecule)
+
+        eq = equation.Equation.from_str('Fe2(SO4)3 + 6KOH = 3K2SO4 + 2Fe(OH)3')
+        for sp, src in zip(eq.reactants + eq.products, ['Fe2(SO4)3', 'KOH', 'K2SO4', 'Fe(OH)3']):
+            self.assertIs(equation.Species(src).molecule, sp.molecule)
+        self.assertEqual(equation.Species('Fe(OH)3', 2).atoms, Counter({'Fe': 2, 'O': 6, 'H': 6}))
+
+    def test_coefficients(self):
+        eq = equation.Equation.from_str('1/2N2 + 3/2H2 = NH3')
+        self.assertEqual(eq.coefficients(), ([1, 3, 2], 2))
+        self.assertEqual(equation.Equation([], []).coefficients(), ([], 1))
+
+    def test_simplify(self):
+        cases = [
+            ('1/2N2 + 3/2H2 = NH3', 'N2 + 3H2 = 2NH3'),
+            ('4H2 + 2O2 = 4H2O', '2H2 + O2 = 2H2O'),
+            ('1/3O3 + H2O = 1/4O2 + H2O', '4O3 = 3O2'),
+            ('2H2O + H2 = 3H2O', 'H2 = H2O'),
+            ('H2 + H2 + O2 = H2O', '2H2 + O2 = H2O'),
+            ('H2O = H2O', ' = '),
+            ('2Na + 2Cl2 + H2O = 2NaCl + 3H2O', '2Na + 2Cl2 = 2NaCl + 2H2O'),
+        ]
+        for src, expected in cases:
+            simplified = equation.Equation.from_str(src).simplify()
+            self.assertEqual(str(simplified), expected, src)
+            self.assertTrue(all(type(sp.coeff) is Fraction for sp in simplified.reactants + simplified.products))
+
+        reactants, products = equation.Equation.from_str('1/2H2 + 1/2H2 + O2 + H2O = 3H2O').net()
+        self.assertEqual(reactants, {Molecule.complete_formula('H2'): 2, Molecule.complete_formula('O2'): 2})
+        self.assertEqual(products, {Molecule.complete_formula('H2O'): 4})
+
+    def test_scale(self):
+        eq = equation.Equation.from_str('2H2 + O2 = 2H2O')
+        self.assertEqual(str(eq * '3/2'), '3H2 + 3/2O2 = 3H2O')
+        self.assertEqual(str(eq * 0.5), 'H2 + 1/2O2 = H2O')
+        self.assertEqual(str(2 * eq), '4H2 + 2O2 = 4H2O')
+        self.assertEqual(str(eq / Fraction(2, 3)), '3H2 + 3/2O2 = 3H2O')
+        self.assertEqual(str(eq / 4), '1/2H2 + 1/4O2 = 1/2H2O')
+        self.assertRaises(TypeError, lambda: eq * None)
 
 
 if __name__ == '__main__':
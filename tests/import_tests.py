@@ -0,0 +1,43 @@
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that are slow to import and must only be loaded by the code paths that need them
+HEAVY_MODULES = ['sympy', 'numpy', 'scipy']
+
+# Generous upper bound on the import time of chempy alone, in microseconds, to catch a heavy import sneaking back in
+IMPORT_BUDGET_US = 150000
+
+
+def run(code: str):
+    return subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                          cwd=ROOT, capture_output=True, text=True, check=True)
+
+
+class ImportTests(unittest.TestCase):
+    def test_no_heavy_modules(self):
+        out = run('import sys, chempy, chempy.batch, chempy.ptable; print(" ".join(sorted(sys.modules)))').stdout.split()
+        for module in HEAVY_MODULES:
+            self.assertNotIn(module, out)
+
+    def test_import_time(self):
+        # -X importtime reports cumulative microseconds per module on stderr: 'import time: self | cumulative | name'
+        lines = [line.split('|') for line in run('import chempy').stderr.splitlines() if line.startswith('import time:')]
+        cumulative = {fields[2].strip(): fields[1].strip() for fields in lines if fields[1].strip().isdigit()}
+        self.assertIn('chempy', cumulative)
+        self.assertLess(int(cumulative['chempy']), IMPORT_BUDGET_US)
+
+    def test_sympy_loaded_on_demand(self):
+        out = run('import sys, chempy\n'
+                  'chempy.Equation.from_str("H2 + O2 = H2O").balance()\n'
+                  'print("sympy" in sys.modules)\n'
+                  'chempy.Equation.from_str("H2 + O2 = H2O").balance("sympy")\n'
+                  'print("sympy" in sys.modules)').stdout.split()
+        self.assertEqual(out, ['False', 'True'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import os
+import tempfile
+import unittest
+
+from chempy import Equation, Molecule
+from chempy.index import PRODUCTS, REACTANTS, ReactionIndex
+
+corpus = [
+    '2H2 + O2 = 2H2O',
+    'Fe + O2 = Fe2O3',
+    'H2SO4 + 2NaOH = Na2SO4 + 2H2O',
+    'Ba+2(aq) + SO4-2(aq) = BaSO4(s)',
+    'HgO = Hg + O2',
+    'Hg + S = HgS',
+    'Fe2(SO4)3 + KOH = K2SO4 + Fe(OH)3',
+    'BaCl2(aq) + Na2SO4(aq) = BaSO4(s) + 2NaCl(aq)',
+]
+
+
+class ReactionIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'reactions.idx')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def check_queries(self, index: ReactionIndex):
+        self.assertEqual(len(index), len(corpus))
+        self.assertEqual(index.with_element('Fe'), {1, 6})
+        self.assertEqual(index.with_elements('Fe', 'O'), {1, 6})
+        self.assertEqual(index.with_elements('S', 'O', side=PRODUCTS), {2, 3, 6, 7})
+        self.assertEqual(index.with_element('Hg', side=REACTANTS), {4, 5})
+        self.assertEqual(index.produces('H2O'), {0, 2})
+        self.assertEqual(index.consumes(Molecule.complete_formula('SO4-2(aq)')), {3})
+        self.assertEqual(index.with_molecule('BaSO4(s)'), {3, 7})
+        self.assertEqual(index.with_molecule('BaSO4'), set())
+        self.assertEqual(index.with_molecule('Fe2(SO4)3'), {6})
+        self.assertEqual(index.produces('Fe(OH)3'), {6})
+        self.assertEqual(index.consumes('Fe(OH)3'), set())
+        self.assertEqual(index.with_element('S') - index.with_element('Ba'), {2, 5, 6})
+        self.assertEqual(index.all() - index.with_element('O'), {5})
+        self.assertEqual(index.with_element('Xe'), set())
+        self.assertEqual([str(eq) for eq in index.equations({6, 1})], [corpus[1], corpus[6]])
+
+    def test_queries(self):
+        self.check_queries(ReactionIndex(corpus))
+        self.assertRaises(ValueError, lambda: ReactionIndex().with_element('O', side='left'))
+        self.assertRaises(IndexError, lambda: ReactionIndex(corpus).equation(len(corpus)))
+
+    def test_equations_kept(self):
+        eq = Equation.from_str(corpus[0])
+        index = ReactionIndex([eq])
+        self.assertIs(index.equation(0), eq)
+        self.assertEqual(index.add(corpus[1]), 1)
+
+    def test_save_load(self):
+        ReactionIndex(corpus).save(self.path)
+        with ReactionIndex.load(self.path) as index:
+            self.check_queries(index)
+
+    def test_incremental(self):
+        ReactionIndex(corpus[:5]).save(self.path)
+        index = ReactionIndex.load(self.path)
+        index.extend(corpus[5:])
+        self.check_queries(index)
+        index.save(self.path)  # over the file it is mapped from
+        index.close()
+        self.assertEqual(len(index), 0)
+
+        with ReactionIndex.load(self.path) as index:
+            self.check_queries(index)
+            self.assertEqual(index.add('Fe + S = FeS'), len(corpus))
+            self.assertEqual(index.with_elements('Fe', 'S'), {6, len(corpus)})
+
+    def test_save_load_equations(self):
+        equations = ['H2 + O2', '1/2H2 + 1/2Cl2 = HCl', 'HgS(s, red) = Hg(l) + S(s)', 'Fe+3(aq) + e- = Fe+2(aq)']
+        ReactionIndex(equations).save(self.path)
+        with ReactionIndex.load(self.path) as index:
+            self.assertEqual([str(eq) for eq in index.equations(index.all())],
+                             [str(Equation.from_str(src)) for src in equations])
+            self.assertEqual(index.equation(0).products, [])
+            self.assertEqual(index.equation(1).reactants[0].coeff, Equation.from_str(equations[1]).reactants[0].coeff)
+
+    def test_invalid_file(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'\0' * 64)
+        self.assertRaises(ValueError, lambda: ReactionIndex.load(self.path))
+        for size in (0, 10):
+            with open(self.path, 'wb') as f:
+                f.write(b'\0' * size)
+            self.assertRaises(ValueError, lambda: ReactionIndex.load(self.path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+
+from chempy import Equation, Molecule, instrument, molecule
+from chempy.equation import Species
+
+
+class InstrumentTests(unittest.TestCase):
+    def test_disabled(self):
+        self.assertFalse(instrument.active())
+        self.assertFalse(instrument.enabled)
+        Equation.from_str('H2 + O2 = H2O').balance()
+
+    def test_collect(self):
+        molecule.cache_clear()
+        with instrument.collect() as collector:
+            self.assertTrue(instrument.active())
+            Molecule.complete_formula('C3H8(g)')
+            eq = Equation.from_str('C3H8 + O2 = CO2 + H2O')
+            eq.balance()
+            eq.balance()
+        self.assertFalse(instrument.active())
+
+        summary = collector.summary()
+        self.assertEqual(summary['stage.complete_formula.calls'], 1)
+        self.assertEqual(summary['stage.from_str.calls'], 1)
+        self.assertEqual(summary['stage.balance.calls'], 2)
+        self.assertEqual(summary['stage.simplify.calls'], 2)
+        self.assertEqual(summary['stage.elimination.calls'], 2)
+        self.assertGreater(summary['stage.tokenize.calls'], 0)
+        self.assertGreaterEqual(summary['stage.balance.seconds'], summary['stage.elimination.seconds'])
+        self.assertGreaterEqual(summary['stage.balance.seconds'], summary['stage.balance.max_seconds'])
+        self.assertEqual(summary['count.molecules'], 5)
+        self.assertEqual(summary['count.species'], 4 + 2 * (4 + 4))
+        self.assertEqual(summary['matrix.composition.count'], 2)
+        self.assertEqual(summary['matrix.composition.max_rows'], 3)
+        self.assertEqual(summary['matrix.composition.max_cols'], 4)
+        self.assertEqual(summary['matrix.composition.cells'], 24)
+        self.assertEqual(summary['matrix.composition.nonzeros'], 14)
+
+    def test_species_count(self):
+        eq = Equation.from_str('2H2 + O2 = 2H2O')
+        with instrument.collect() as collector:
+            eq * 2
+            -eq
+            Species('H2O')
+            Equation.from_dict({Molecule.complete_formula('H2'): 1}, {})
+        self.assertEqual(collector.summary()['count.species'], 3 + 1 + 1)
+
+    def test_hook(self):
+        events = []
+        hook = lambda event, name, value: events.append((event, name))
+        instrument.add_hook(hook)
+        try:
+            Equation.from_str('H2 + O2 = H2O')
+        finally:
+            instrument.remove_hook(hook)
+        Equation.from_str('H2 + O2 = H2O')
+        self.assertIn((instrument.STAGE, 'from_str'), events)
+        self.assertIn((instrument.COUNT, 'species'), events)
+        self.assertEqual(events.count((instrument.STAGE, 'from_str')), 1)
+
+    def test_nested(self):
+        with instrument.collect() as outer:
+            Equation.from_str('H2 + O2 = H2O')
+            with instrument.collect() as inner:
+                Equation.from_str('H2 + O2 = H2O')
+        self.assertEqual(outer.summary()['stage.from_str.calls'], 2)
+        self.assertEqual(inner.summary()['stage.from_str.calls'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+
+try:
+    import numpy as np
+    import scipy
+    from chempy.kinetics import MassActionModel
+except ImportError:
+    np = scipy = None
+
+ROBERTSON = ['A = B', '2B = B + C', 'B + C = A + C']
+ROBERTSON_K = [0.04, 3e7, 1e4]
+
+
+def numeric_jacobian(model, c, k, eps=1e-7):
+    eye = np.eye(c.shape[-1])
+    return np.stack([(model.dcdt(c + eps * e, k) - model.dcdt(c - eps * e, k)) / (2 * eps) for e in eye], axis=-1)
+
+
+@unittest.skipIf(scipy is None, 'numpy and scipy are not installed')
+class MassActionModelTests(unittest.TestCase):
+    def test_rates(self):
+        model = MassActionModel(['2A + B = C', 'C = A'])
+        self.assertEqual(model.shape, (3, 2))
+        c = model.concentrations({'A': 2, 'B': 3, 'C': 5})
+        np.testing.assert_allclose(model.rates(c, [0.5, 2]), [0.5 * 4 * 3, 2 * 5])
+        np.testing.assert_allclose(model.dcdt(c, [0.5, 2]), [-2 * 6 + 10, -6, 6 - 10])
+        self.assertRaises(ValueError, lambda: model.concentrations({'D': 1}))
+
+        model = MassActionModel(['Fe+3(aq) + 3OH-(aq) = Fe(OH)3(s)'])
+        np.testing.assert_allclose(model.concentrations({'Fe+3(aq)': 1, 'Fe(OH)3(s)': 2, 'OH-(aq)': 3}), [1, 3, 2])
+
+    def test_batch(self):
+        model = MassActionModel(ROBERTSON)
+        rng = np.random.default_rng(1)
+        c, k = rng.random((5, 4, 3)), rng.random((5, 4, 3))
+        self.assertEqual(model.dcdt(c, k).shape, (5, 4, 3))
+        np.testing.assert_allclose(model.dcdt(c, k)[2, 1], model.dcdt(c[2, 1], k[2, 1]))
+        self.assertEqual(model.jacobian(c, k).shape, (5, 4, 3, 3))
+
+    def test_jacobian(self):
+        rng = np.random.default_rng(2)
+        for equations in [ROBERTSON, ['A + A + 1/2B = C', 'C = D', 'D + A = 2A']]:
+            model = MassActionModel(equations)
+            ns, nr = model.shape
+            c, k = rng.random((3, ns)) + 0.1, rng.random((3, nr))
+            np.testing.assert_allclose(model.jacobian(c, k), numeric_jacobian(model, c, k), atol=1e-6)
+        self.assertTrue(np.isfinite(model.jacobian(np.zeros(ns), k[0])).all())
+
+    def test_simulate(self):
+        # A = B at rate k has A(t) = exp(-k t)
+        model = MassActionModel(['A = B'])
+        sim = model.simulate({'A': 1}, (0, 2), [1.5], t_eval=[0, 1, 2])
+        np.testing.assert_allclose(sim.y[:, 0], np.exp(-1.5 * np.array([0, 1, 2])), rtol=1e-4)
+        np.testing.assert_allclose(sim.y.sum(axis=1), 1, rtol=1e-6)
+        self.assertRaises(ValueError, lambda: model.simulate([1, 0, 0], (0, 1), [1]))
+        self.assertRaises(ValueError, lambda: model.simulate([1, 0], (0, 1), [1, 2]))
+
+    def test_stiff(self):
+        model = MassActionModel(ROBERTSON)
+        sim = model.simulate({'A': 1}, (0, 40), ROBERTSON_K, t_eval=[40])
+        np.testing.assert_allclose(sim.y[-1], [0.7158, 9.185e-6, 0.2842], rtol=1e-3)
+
+    def test_sweep(self):
+        model = MassActionModel(ROBERTSON)
+        k = np.array(ROBERTSON_K) * np.random.default_rng(3).uniform(0.5, 2, (50, 3))
+        sweep = model.sweep({'A': 1}, (0, 40), k, t_eval=[0, 10, 40])
+        self.assertEqual(sweep.y.shape, (50, 3, 3))
+        np.testing.assert_allclose(sweep.y.sum(axis=2), 1, rtol=1e-6)
+        for i in (0, 17, 49):
+            single = model.simulate({'A': 1}, (0, 40), k[i], t_eval=[0, 10, 40])
+            np.testing.assert_allclose(sweep.y[i], single.y, rtol=1e-3, atol=1e-8)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import gzip
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from chempy.__main__ import _text, run
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+INPUT = '\n'.join(['H2 + O2 = H2O', '# comment', '', 'H2 = O2', '{"equation": "Fe + O2 = Fe2O3", "id": "rust"}',
+                   '"N2 + H2 = NH3"', '{not json', 'H2 + O2 = 2(']) + '\n'
+
+
+class MainTests(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'input.txt')
+        with open(self.path, 'w') as f:
+            f.write(INPUT)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def run_cli(self, paths, **kwargs):
+        out, err = io.StringIO(), io.StringIO()
+        failed = run(paths, out, err, **kwargs)
+        return failed, out.getvalue().splitlines(), err.getvalue().splitlines()
+
+    def test_text(self):
+        failed, out, err = self.run_cli([self.path])
+        self.assertEqual(failed, 3)
+        self.assertEqual(out, ['2H2 + O2 = 2H2O', '4Fe + 3O2 = 2Fe2O3', 'N2 + 3H2 = 2NH3'])
+        self.assertEqual([line.split(':')[1] for line in err], ['4', '7', '8'])
+        self.assertTrue(err[0].startswith(self.path + ':4: '))
+
+    def test_jsonl(self):
+        failed, out, _ = self.run_cli([self.path], output='jsonl')
+        records = [json.loads(line) for line in out]
+        self.assertEqual([record['line'] for record in records], [1, 4, 5, 6, 7, 8])
+        self.assertEqual(records[2], {'source': self.path, 'line': 5, 'id': 'rust', 'equation': 'Fe + O2 = Fe2O3',
+                                      'balanced': '4Fe + 3O2 = 2Fe2O3'})
+        self.assertEqual(records[1]['type'], 'ValueError')
+        self.assertIn('Invalid JSON record', records[4]['error'])
+        self.assertEqual(records[5]['type'], 'ParseError')
+        self.assertIn('position', records[5])
+
+    def test_text_format(self):
+        _, out, err = self.run_cli([self.path], fmt='text')
+        self.assertEqual(len(out), 1)
+        self.assertEqual(len(err), 5)
+
+    def test_gzip_and_workers(self):
+        path = os.path.join(self.dir.name, 'input')  # detected by content, not by name
+        with gzip.open(path, 'wt') as f:
+            f.write(INPUT)
+        expected = self.run_cli([self.path])
+        self.assertEqual(self.run_cli([path], workers=2, chunksize=2)[:2], expected[:2])
+        self.assertEqual(self.run_cli([path, self.path])[1], expected[1] * 2)
+
+        # The decompressor is closed with the stream, the file under it is left to its owner
+        raw = io.BufferedReader(io.BytesIO(gzip.compress(INPUT.encode())))
+        with _text(raw) as stream:
+            binary = stream.buffer
+            self.assertEqual(stream.readline(), 'H2 + O2 = H2O\n')
+        self.assertTrue(binary.closed)
+        self.assertFalse(raw.closed)
+
+    def test_stdin(self):
+        proc = subprocess.run([sys.executable, '-m', 'chempy', '-o', 'jsonl'], input=gzip.compress(INPUT.encode()),
+                              cwd=ROOT, capture_output=True, check=False)
+        self.assertEqual(proc.returncode, 1)
+        records = [json.loads(line) for line in proc.stdout.splitlines()]
+        self.assertEqual(len(records), 6)
+        self.assertEqual(records[0]['source'], '<stdin>')
+
+        proc = subprocess.run([sys.executable, '-m', 'chempy'], input=b'C3H8 + O2 = CO2 + H2O\n', cwd=ROOT,
+                              capture_output=True, check=False)
+        self.assertEqual((proc.returncode, proc.stdout), (0, b'C3H8 + 5O2 = 3CO2 + 4H2O\n'))
+
+
+if __name__ == '__main__':
+    unittest.main()
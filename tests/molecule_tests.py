@@ -1,3 +1,4 @@
+import pickle
 import unittest
 from collections import Counter
 
@@ -25,8 +26,7 @@ def adjust_charge(charge):
 
 def molecule_as_str(formula, charge, states):
     charge = str(charge) if str(charge) != '0' else ''
-    tmp = formula + charge + '(' + ', '.join(states) + ')'
-    return tmp
+    return formula + charge + ('(' + ', '.join(states) + ')' if states else '')
 
 
 class MoleculeParseTests(unittest.TestCase):
@@ -45,7 +45,19 @@ class MoleculeParseTests(unittest.TestCase):
         ]
 
         for actual, expected in cases:
-            self.assertEqual(actual, expected)
+            self.assertEqual(actual, Counter(expected))
+
+    def test_parse_large_multipliers(self):
+        self.assertEqual(molecule._parse(util.tokenize('(C2H4)50000')), Counter({'C': 100000, 'H': 200000}))
+        self.assertEqual(molecule._parse(util.tokenize('C100000H200002')), Counter({'C': 100000, 'H': 200002}))
+        self.assertEqual(molecule._parse(util.tokenize('((CH3)3C)2O')), Counter({'C': 8, 'H': 18, 'O': 1}))
+
+    def test_parse_errors(self):
+        self.assertRaises(ValueError, lambda: molecule._parse(util.tokenize('(CH3')))
+        self.assertRaises(ValueError, lambda: molecule._parse(util.tokenize('CH3)2')))
+        self.assertRaises(ValueError, lambda: molecule._parse(util.tokenize('Ca(OH))2')))
+        self.assertRaises(ValueError, lambda: molecule._parse(util.tokenize('2H')))
+        self.assertRaises(ValueError, lambda: molecule._parse(util.tokenize('H.O')))
 
 
 class MoleculeTests(unittest.TestCase):
@@ -77,6 +89,94 @@ class MoleculeTests(unittest.TestCase):
             self.assertEqual(actual.charge, exp_charge)
             self.assertEqual(actual.states, exp_states)
 
+    def test_complete_formula_matches_from_str(self):
+        from chempy import Equation
+        for src in ['Fe2(SO4)3', 'Fe(OH)3', '(NH4)2SO4', 'Fe+3(aq)', 'Ca(NO3)2(s)', 'SO4-2(aq)', 'HgS(s, red)']:
+            self.assertIs(Molecule.complete_formula(src), Equation.from_str(src).reactants[0].molecule, src)
+        self.assertEqual(Molecule.complete_formula('Fe2(SO4)3').elements, Counter({'Fe': 2, 'S': 3, 'O': 12}))
+        self.assertRaises(util.ParseError, Molecule.complete_formula, '2H2O')
+        self.assertRaises(util.ParseError, Molecule.complete_formula, 'H2 + O2')
+
+    def test_composition(self):
+        mol = Molecule.complete_formula('Ca(NO3)2(s)')
+        comp = mol.composition
+        self.assertIs(mol.composition, comp)
+        self.assertEqual(list(comp[0::2]), sorted(comp[0::2]))
+        self.assertEqual({molecule.element_symbol(i): c for i, c in zip(comp[0::2], comp[1::2])},
+                         {'Ca': 1, 'N': 2, 'O': 6})
+        self.assertEqual(molecule.element_index('Ca'), molecule.element_index('Ca'))
+        self.assertEqual(molecule.element_symbol(molecule.element_index('Xx')), 'Xx')
+
+    def test_immutable(self):
+        mol = Molecule.complete_formula('H2O(l)')
+        with self.assertRaises(AttributeError):
+            mol._formula = 'H2O2'
+        with self.assertRaises(AttributeError):
+            mol.extra = 1
+        with self.assertRaises(AttributeError):
+            del mol._charge
+        self.assertFalse(hasattr(mol, '__dict__'))
+        with self.assertRaises(AttributeError):
+            mol.__init__(util.tokenize('H2O2'))
+        self.assertIs(Molecule.complete_formula('H2O(l)'), mol)
+        self.assertEqual((mol.formula, mol.states), ('H2O', ['l']))
+
+    def test_hash_eq(self):
+        a = Molecule(util.tokenize('SO4'), -2, ['aq'])
+        b = Molecule(util.tokenize('SO4'), '-2', ['aq'])
+        self.assertIsNot(a, b)
+        self.assertEqual(a, b)
+        self.assertEqual(hash(a), hash(b))
+        self.assertNotEqual(a, Molecule(util.tokenize('SO4'), -2, ['s']))
+        self.assertEqual(repr(a), 'Molecule(formula=SO4, charge=-2, states=[\'aq\'])')
+
+    def test_pickle(self):
+        mol = Molecule.complete_formula('SO4-2(aq)')
+        self.assertIs(pickle.loads(pickle.dumps(mol)), mol)
+        other = pickle.loads(pickle.dumps(Molecule(util.tokenize('(CH3)2CO'), 0, ['l'])))
+        self.assertEqual(other.elements, Counter({'C': 3, 'H': 6, 'O': 1}))
+
+
+class MoleculeCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.maxsize = molecule.cache_info().maxsize
+        molecule.cache_clear()
+
+    def tearDown(self):
+        molecule.set_cache_size(self.maxsize)
+
+    def test_interned(self):
+        first = Molecule.complete_formula('SO4-2(aq)')
+        self.assertIs(Molecule.complete_formula('SO4-2(aq)'), first)
+        self.assertIs(Molecule.complete_formula(' SO4 -2 ( aq ) '), first)
+        self.assertIs(Molecule.complete_formula('HgS(s,red)'), Molecule.complete_formula('HgS(s, red)'))
+        self.assertIsNot(Molecule.complete_formula('SO4-2(s)'), first)
+        info = molecule.cache_info()
+        self.assertEqual(info.hits, 3)
+        self.assertEqual(info.misses, 3)
+        self.assertIs(Molecule.interned('SO4', -2, ['aq']), first)
+        self.assertIs(Molecule.interned(' SO4 ', '-2', ('aq',)), first)
+        self.assertIs(Molecule.interned('H2O'), Molecule.interned('H2O', '0', []))
+
+    def test_copies_are_not_shared(self):
+        mol = Molecule.complete_formula('H2O(l)')
+        mol.elements['H'] += 1
+        mol.states.append('g')
+        self.assertEqual(Molecule.complete_formula('H2O(l)').elements, Counter({'H': 2, 'O': 1}))
+        self.assertEqual(Molecule.complete_formula('H2O(l)').states, ['l'])
+
+    def test_size(self):
+        molecule.set_cache_size(2)
+        for formula in ['H2', 'O2', 'N2']:
+            Molecule.complete_formula(formula)
+        info = molecule.cache_info()
+        self.assertEqual((info.maxsize, info.currsize), (2, 2))
+        self.assertEqual(info.evictions, 2)  # H2 from both the text and the molecule cache
+        self.assertIs(Molecule.complete_formula('O2'), Molecule.interned('O2'))
+        molecule.set_cache_size(0)
+        self.assertIsNot(Molecule.complete_formula('H2'), Molecule.complete_formula('H2'))
+        self.assertEqual(Molecule.complete_formula('H2'), Molecule.complete_formula('H2'))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+from fractions import Fraction
+
+from chempy import Equation, Molecule
+
+try:
+    import numpy as np
+    from chempy.network import ReactionNetwork
+except ImportError:
+    np = None
+
+try:
+    import scipy
+except ImportError:
+    scipy = None
+
+
+equations = ['2H2 + O2 = 2H2O', 'CH4 + 2O2 = CO2 + 2H2O', '1/2N2 + 3/2H2 = NH3', 'H2O + CO2 = H2CO3']
+
+
+@unittest.skipIf(np is None, 'numpy is not installed')
+class ReactionNetworkTests(unittest.TestCase):
+    def setUp(self):
+        self.network = ReactionNetwork(Equation.from_str(eq) for eq in equations)
+
+    def test_species(self):
+        self.assertEqual([str(mol) for mol in self.network.species],
+                         ['H2', 'O2', 'H2O', 'CH4', 'CO2', 'N2', 'NH3', 'H2CO3'])
+        self.assertEqual(self.network.index(Molecule.complete_formula('CO2')), 4)
+        self.assertEqual(self.network.shape, (8, 4))
+        self.assertEqual(len(self.network), 4)
+
+    def test_stoichiometry(self):
+        mat = self.network.stoichiometry()
+        self.assertEqual(mat.shape, (8, 4))
+        np.testing.assert_array_equal(mat[:, 0], [-2, -1, 2, 0, 0, 0, 0, 0])
+        np.testing.assert_array_equal(mat[:, 2], [-1.5, 0, 0, 0, 0, -0.5, 1, 0])
+        nums, denoms = self.network.integer_stoichiometry()
+        np.testing.assert_array_equal(denoms, [1, 1, 2, 1])
+        np.testing.assert_array_equal(nums[:, 2], [-3, 0, 0, 0, 0, -1, 2, 0])
+
+    def test_repeated_species(self):
+        network = ReactionNetwork([Equation.from_str('H2O + H2 + O2 = 2H2O + H2')])
+        np.testing.assert_array_equal(network.stoichiometry()[:, 0], [1, 0, -1])
+        self.assertEqual(str(network.equation(0)), 'O2 = H2O')
+
+    def test_composition(self):
+        keys, mat = self.network.composition()
+        self.assertEqual(set(keys), {'H', 'O', 'C', 'N'})
+        h2co3 = self.network.index(Molecule.complete_formula('H2CO3'))
+        self.assertEqual({key: int(mat[i, h2co3]) for i, key in enumerate(keys)}, {'H': 2, 'O': 3, 'C': 1, 'N': 0})
+        # every reaction conserves every element
+        np.testing.assert_array_equal(mat @ self.network.integer_stoichiometry()[0], 0)
+
+        keys, mat = ReactionNetwork([Equation.from_str('Na+ + Cl- = NaCl')]).composition(charge=True)
+        self.assertEqual(keys[-1], 'charge')
+        np.testing.assert_array_equal(mat[-1], [1, -1, 0])
+
+        network = ReactionNetwork([Equation.from_str('MnO4- + Fe+2 + H+ = Mn+2 + Fe+3 + H2O').balance(),
+                                   Equation.from_str('Cu+2 + e- = Cu(s)').balance()])
+        keys, mat = network.composition(charge=True)
+        self.assertEqual(set(keys), {'O', 'Mn', 'Fe', 'H', 'Cu', 'charge'})
+        np.testing.assert_array_equal(mat @ network.integer_stoichiometry()[0], 0)
+        self.assertEqual(network.composition()[0], keys[:-1])
+
+    def test_round_trip(self):
+        for eq, back in zip(equations, self.network.to_equations()):
+            self.assertEqual(str(back), str(Equation.from_str(eq)))
+        self.assertEqual(str(self.network.equation(2)), '1/2N2 + 3/2H2 = NH3')
+
+        combined = self.network.stoichiometry() @ np.array([[1], [0], [0], [Fraction(1, 3)]], dtype=float)
+        self.assertEqual(str(self.network.to_equations(combined)[0]),
+                         '2H2 + O2 + 1/3CO2 = 5/3H2O + 1/3H2CO3')
+        self.assertRaises(ValueError, lambda: self.network.to_equations(np.zeros((2, 1))))
+
+    @unittest.skipIf(scipy is None, 'scipy is not installed')
+    def test_sparse(self):
+        np.testing.assert_array_equal(self.network.stoichiometry(sparse=True).toarray(), self.network.stoichiometry())
+        keys, dense = self.network.composition()
+        self.assertEqual(self.network.composition(sparse=True)[0], keys)
+        np.testing.assert_array_equal(self.network.composition(sparse=True)[1].toarray(), dense)
+        self.assertEqual(str(self.network.to_equations(self.network.stoichiometry(sparse=True))[1]),
+                         '2O2 + CH4 = 2H2O + CO2')
+
+    def test_empty(self):
+        network = ReactionNetwork()
+        self.assertEqual(network.stoichiometry().shape, (0, 0))
+        self.assertEqual(network.composition()[1].shape, (0, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+
+from chempy import Molecule, ptable
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class ElementTests(unittest.TestCase):
+    def test_lookup(self):
+        self.assertEqual(ptable.element_protons(26), ptable.element_symbol('Fe'))
+        self.assertEqual(ptable.element_name('IRON').symbol, 'Fe')
+        self.assertEqual(ptable.element_protons(1).mass, 1.008)
+        self.assertEqual(ptable.element_protons(118).name, 'Oganesson')
+        self.assertEqual(str(ptable.element_symbol('Au')), 'Au')
+        self.assertEqual(ptable.elements_with(name='Gold'), [ptable.element_symbol('Au')])
+        self.assertEqual(len(ptable.elements_with()), 118)
+
+    def test_unknown(self):
+        for lookup, arg in [(ptable.element_symbol, 'Xx'), (ptable.element_name, 'Unobtainium'),
+                            (ptable.element_protons, 0), (ptable.element_protons, 119)]:
+            with self.assertRaises(ValueError):
+                lookup(arg)
+
+    def test_table(self):
+        elements = ptable.elements_with()
+        self.assertEqual([elm.protons for elm in elements], list(range(1, 119)))
+        self.assertEqual(len({elm.symbol for elm in elements}), 118)
+
+
+class MassTests(unittest.TestCase):
+    def test_molar_mass(self):
+        self.assertAlmostEqual(Molecule.complete_formula('H2O').molar_mass, 18.015)
+        self.assertAlmostEqual(Molecule.complete_formula('C6H12O6(s)').molar_mass, 180.156)
+        self.assertAlmostEqual(Molecule.interned('Ca3(PO4)2').molar_mass, 310.174, places=3)
+        self.assertAlmostEqual(Molecule.complete_formula('SO4-2(aq)').molar_mass, 96.056)
+        self.assertAlmostEqual(Molecule.complete_formula('e-').molar_mass, ptable.ELECTRON_MASS)
+
+    def test_mass_percent(self):
+        percent = Molecule.complete_formula('H2O').mass_percent()
+        self.assertEqual(set(percent), {'H', 'O'})
+        self.assertAlmostEqual(sum(percent.values()), 100)
+        self.assertAlmostEqual(percent['O'], 88.81, places=2)
+
+    def test_unknown_element(self):
+        with self.assertRaises(ValueError):
+            Molecule.complete_formula('Qq2').molar_mass
+
+    @unittest.skipIf(np is None, 'numpy is not installed')
+    def test_molar_masses(self):
+        formulas = ['H2O', 'C6H12O6', 'Qq2', 'NaCl', 'e-', 'Ca3(PO4)2']
+        molecules = [Molecule.complete_formula(f) for f in formulas[:-1]] + [Molecule.interned(formulas[-1])]
+        masses = ptable.molar_masses(iter(molecules))
+        self.assertEqual(masses.shape, (len(formulas),))
+        self.assertTrue(np.isnan(masses[2]))
+        expected = [mol.molar_mass for i, mol in enumerate(molecules) if i != 2]
+        np.testing.assert_allclose(np.delete(masses, 2), expected)
+        self.assertEqual(ptable.molar_masses([]).shape, (0,))
+
+
+if __name__ == '__main__':
+    unittest.main()
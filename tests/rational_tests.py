@@ -0,0 +1,79 @@
+import math
+import sys
+import unittest
+from fractions import Fraction
+
+from chempy import rational
+
+
+class RationalTests(unittest.TestCase):
+    def test_as_fraction(self):
+        self.assertEqual(rational.as_fraction(3), Fraction(3))
+        self.assertEqual(rational.as_fraction(0.25), Fraction(1, 4))
+        self.assertEqual(rational.as_fraction('3/6'), Fraction(1, 2))
+        self.assertEqual(rational.as_fraction(' 1 . 5 '), Fraction(3, 2))
+        frac = Fraction(2, 3)
+        self.assertIs(rational.as_fraction(frac), frac)
+        self.assertIs(rational.as_fraction(2), rational.fraction(2))
+        self.assertRaises(ValueError, lambda: rational.as_fraction('-1'))
+        self.assertRaises(TypeError, lambda: rational.as_fraction(None))
+
+    def test_common_denominator(self):
+        self.assertEqual(rational.common_denominator([Fraction(1, 2), Fraction(3, 2), Fraction(1)]), ([1, 3, 2], 2))
+        self.assertEqual(rational.common_denominator([Fraction(1, 4), Fraction(1, 6)]), ([3, 2], 12))
+        self.assertEqual(rational.common_denominator([]), ([], 1))
+
+    def test_primitive(self):
+        self.assertEqual(rational.primitive([4, 6, 8]), ([2, 3, 4], 2))
+        self.assertEqual(rational.primitive([3, 5]), ([3, 5], 1))
+        self.assertEqual(rational.primitive([0, 0]), ([0, 0], 0))
+
+    def test_big(self):
+        # Same results whether or not gmpy2 is installed
+        big = 3 ** 6000
+        self.assertGreater(big.bit_length(), rational.BIG_BITS)
+        self.assertEqual(rational.primitive([2 * big, 4 * big]), ([1, 2], 2 * big))
+        self.assertEqual(rational.common_denominator([Fraction(1, big), Fraction(1, 3)]), ([1, big // 3], big))
+
+    def test_big_math_selection(self):
+        class FakeGmpy2:
+            calls = 0
+
+            @classmethod
+            def gcd(cls, *values):
+                cls.calls += 1
+                return math.gcd(*values)
+
+            @classmethod
+            def lcm(cls, *values):
+                cls.calls += 1
+                return math.lcm(*values)
+
+        big, old_module, old_gmpy2 = 3 ** 6000, sys.modules.get('gmpy2'), rational._gmpy2
+        try:
+            # Not installed: the lookup settles on the builtin functions
+            rational._gmpy2 = None
+            sys.modules['gmpy2'] = None
+            self.assertIs(rational._big_math(), False)
+            self.assertEqual(rational.gcd([2 * big, 4 * big]), 2 * big)
+
+            # Installed: used for big integers only
+            rational._gmpy2 = None
+            sys.modules['gmpy2'] = FakeGmpy2
+            self.assertIs(rational._big_math(), FakeGmpy2)
+            self.assertEqual(rational.gcd([4, 6]), 2)
+            self.assertEqual(rational.lcm([4, 6]), 12)
+            self.assertEqual(FakeGmpy2.calls, 0)
+            self.assertEqual(rational.gcd([2 * big, 4 * big]), 2 * big)
+            self.assertEqual(rational.lcm([big, 3]), big)
+            self.assertEqual(FakeGmpy2.calls, 2)
+        finally:
+            rational._gmpy2 = old_gmpy2
+            if old_module is None:
+                sys.modules.pop('gmpy2', None)
+            else:
+                sys.modules['gmpy2'] = old_module
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,170 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from chempy.server import BalanceServer
+
+
+async def request(server: BalanceServer, method: str, target: str, payload=None, body: bytes = None,
+                  length: str = None):
+    if server.path is not None:
+        reader, writer = await asyncio.open_unix_connection(server.path)
+    else:
+        reader, writer = await asyncio.open_connection(server.host, server.port)
+    body = json.dumps(payload).encode() if payload is not None else body or b''
+    writer.write((method + ' ' + target + ' HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n'
+                  'Content-Length: ' + (str(len(body)) if length is None else length) + '\r\n\r\n').encode() + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b'\r\n\r\n')
+    return int(head.split()[1]), json.loads(body)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class BalanceServerTests(unittest.TestCase):
+    def test_balance(self):
+        async def scenario():
+            async with BalanceServer(max_workers=2) as server:
+                self.assertEqual(await request(server, 'POST', '/balance', {'equation': 'H2 + O2 = H2O'}),
+                                 (200, {'equation': 'H2 + O2 = H2O', 'balanced': '2H2 + O2 = 2H2O'}))
+                status, record = await request(server, 'POST', '/balance', {'equation': 'H2 = O2'})
+                self.assertEqual((status, record['type']), (422, 'ValueError'))
+                status, record = await request(server, 'POST', '/balance', {'equation': 'H2 + O2 = 2('})
+                self.assertEqual((status, record['type']), (422, 'ParseError'))
+                self.assertIn('position', record)
+
+                status, payload = await request(server, 'POST', '/balance',
+                                                {'equations': ['Fe + O2 = Fe2O3', 'H2 = O2', 'N2 + H2 = NH3']})
+                self.assertEqual(status, 200)
+                self.assertEqual([r.get('balanced') for r in payload['results']],
+                                 ['4Fe + 3O2 = 2Fe2O3', None, 'N2 + 3H2 = 2NH3'])
+                self.assertEqual(await request(server, 'POST', '/balance', {'equations': []}), (200, {'results': []}))
+        run(scenario())
+
+    def test_errors(self):
+        async def scenario():
+            async with BalanceServer(max_workers=1) as server:
+                self.assertEqual((await request(server, 'POST', '/balance', body=b'{'))[0], 400)
+                self.assertEqual((await request(server, 'POST', '/balance', {'equation': 1}))[0], 400)
+                for length in ('-1', 'ten'):
+                    self.assertEqual(await request(server, 'POST', '/balance', body=b'{}', length=length),
+                                     (400, {'error': 'Invalid Content-Length'}))
+                self.assertEqual((await request(server, 'GET', '/balance'))[0], 405)
+                self.assertEqual((await request(server, 'GET', '/nothing'))[0], 404)
+                self.assertEqual(await request(server, 'GET', '/health'), (200, {'status': 'ok'}))
+        run(scenario())
+
+    def test_micro_batches_and_metrics(self):
+        async def scenario():
+            async with BalanceServer(max_workers=1, max_batch=16, max_delay=0.01) as server:
+                equations = ['C%dH%d + O2 = CO2 + H2O' % (n, 2 * n + 2) for n in range(1, 41)]
+                results = await asyncio.gather(*(request(server, 'POST', '/balance', {'equation': eq})
+                                                 for eq in equations))
+                self.assertTrue(all(status == 200 for status, _ in results))
+                status, metrics = await request(server, 'GET', '/metrics')
+                self.assertEqual(status, 200)
+                self.assertEqual(metrics['equations'], 40)
+                self.assertLess(metrics['batches'], 40)  # concurrent requests were coalesced
+                self.assertGreater(metrics['mean_batch_size'], 1)
+                self.assertEqual(metrics['queue_depth'], 0)
+                self.assertGreater(metrics['max_queue_depth'], 0)
+                self.assertGreater(metrics['latency_seconds']['max'], 0)
+        run(scenario())
+
+    def test_backpressure_and_timeout(self):
+        gate = threading.Event()
+
+        async def scenario():
+            pool = ThreadPoolExecutor(1)
+            pool.submit(lambda: None).result()
+            async with BalanceServer(executor=pool, max_workers=1, max_batch=1, max_queue=2, timeout=0.5) as server:
+                pool.submit(gate.wait)  # occupy the only worker so batches back up
+                pending = [asyncio.ensure_future(request(server, 'POST', '/balance', {'equation': 'H2 + O2 = H2O'}))
+                           for _ in range(4)]
+                await asyncio.sleep(0.1)
+                status, payload = await request(server, 'POST', '/balance', {'equations': ['H2 + O2 = H2O'] * 2})
+                self.assertEqual(status, 503)
+                # more equations than the queue holds could never be served
+                status, payload = await request(server, 'POST', '/balance', {'equations': ['H2 + O2 = H2O'] * 3})
+                self.assertEqual(status, 413)
+                statuses = sorted(status for status, _ in await asyncio.gather(*pending))
+                self.assertIn(504, statuses)
+                gate.set()
+                self.assertEqual((await request(server, 'POST', '/balance', {'equation': 'H2 + O2 = H2O'}))[0], 200)
+                _, metrics = await request(server, 'GET', '/metrics')
+                self.assertGreaterEqual(metrics['rejected'], 1)
+                self.assertGreaterEqual(metrics['timeouts'], 1)
+            pool.shutdown()
+        run(scenario())
+
+    def test_pool_failure(self):
+        async def scenario():
+            pool = ThreadPoolExecutor(1)
+            async with BalanceServer(executor=pool, max_workers=1) as server:
+                pool.shutdown()
+                status, payload = await request(server, 'POST', '/balance', {'equation': 'H2 + O2 = H2O'})
+                self.assertEqual(status, 503)
+                self.assertIn('Balancing workers failed', payload['error'])
+                self.assertEqual((await request(server, 'POST', '/balance', {'equations': ['H2 + O2 = H2O']}))[0], 503)
+                self.assertEqual(await request(server, 'GET', '/health'), (200, {'status': 'ok'}))
+        run(scenario())
+
+    def test_unix_socket(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'chempy.sock')
+
+            async def scenario():
+                async with BalanceServer(path=path, max_workers=1) as server:
+                    self.assertTrue(server.address.startswith('unix:'))
+                    self.assertEqual((await request(server, 'POST', '/balance', {'equation': 'H2 + Cl2 = HCl'}))[1],
+                                     {'equation': 'H2 + Cl2 = HCl', 'balanced': 'H2 + Cl2 = 2HCl'})
+                self.assertFalse(os.path.exists(path))
+            run(scenario())
+            run(scenario())  # the path can be served again
+
+    def test_http_client(self):
+        # A standard HTTP client against a server running in its own thread
+        ready = threading.Event()
+        state = {}
+
+        def serve():
+            async def main():
+                server = state['server'] = BalanceServer(max_workers=1)
+                await server.start()
+                state['loop'] = asyncio.get_running_loop()
+                state['stop'] = asyncio.Event()
+                ready.set()
+                await state['stop'].wait()
+                await server.close()
+            asyncio.run(main())
+
+        thread = threading.Thread(target=serve)
+        thread.start()
+        ready.wait(10)
+        try:
+            url = state['server'].address + '/balance'
+            req = urllib.request.Request(url, json.dumps({'equation': 'CH4 + O2 = CO2 + H2O'}).encode(),
+                                         {'Content-Type': 'application/json'})
+            with urllib.request.urlopen(req, timeout=10) as response:
+                self.assertEqual(json.load(response)['balanced'], 'CH4 + 2O2 = CO2 + 2H2O')
+            with self.assertRaises(urllib.error.HTTPError) as ctx:
+                urllib.request.urlopen(urllib.request.Request(url, b'{"equation": "H2 = O2"}'), timeout=10)
+            self.assertEqual(ctx.exception.code, 422)
+            ctx.exception.close()
+        finally:
+            state['loop'].call_soon_threadsafe(state['stop'].set)
+            thread.join(10)
+
+
+if __name__ == '__main__':
+    unittest.main()
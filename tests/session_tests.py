@@ -0,0 +1,98 @@
+import random
+import unittest
+
+from chempy import Equation, Molecule, balancer
+from chempy.session import PRODUCTS, REACTANTS, BalanceSession
+
+
+def _in_nullspace(session: BalanceSession, vec):
+    _, rows = balancer.composition_matrix(session.reactants, session.products)
+    return all(sum(x * y for x, y in zip(row, vec)) == 0 for row in rows)
+
+
+class BalanceSessionTests(unittest.TestCase):
+    def test_incremental(self):
+        session = BalanceSession()
+        session.add('C3H8')
+        session.add('O2')
+        session.add('CO2', PRODUCTS)
+        self.assertEqual(session.nullspace(), [])
+        session.add('H2O', PRODUCTS)
+        self.assertEqual(session.coefficients(), [1, 5, 3, 4])
+        self.assertEqual(str(session.balance()), str(Equation.from_str('C3H8 + O2 = CO2 + H2O').balance()))
+        self.assertEqual(session.rank, 3)
+        self.assertEqual(len(session), 4)
+
+        # Strings are parsed as in Equation.from_str, also when the formula ends in a group
+        session = BalanceSession()
+        session.add('Fe2(SO4)3')
+        session.add('KOH')
+        session.add('K2SO4', PRODUCTS)
+        session.add('Fe(OH)3', PRODUCTS)
+        self.assertEqual(session.coefficients(), [1, 6, 3, 2])
+        session.remove('Fe(OH)3', PRODUCTS)
+        self.assertEqual(str(session), 'Fe2(SO4)3 + KOH = K2SO4')
+
+    def test_from_equation(self):
+        for s in ['KMnO4 + HCl = KCl + MnCl2 + H2O + Cl2', 'Cu+2 + e- = Cu(s)',
+                  'MnO4- + Fe+2 + H+ = Mn+2 + Fe+3 + H2O', 'Fe2(SO4)3 + KOH = K2SO4 + Fe(OH)3']:
+            self.assertEqual(str(BalanceSession(s).balance()), str(Equation.from_str(s).balance()))
+
+    def test_remove(self):
+        session = BalanceSession('KMnO4 + HCl = KCl + MnCl2 + H2O + Cl2')
+        session.remove('KMnO4')
+        session.remove('KCl', PRODUCTS)
+        session.remove('MnCl2', PRODUCTS)
+        self.assertEqual(str(session), 'HCl = H2O + Cl2')
+        self.assertEqual(session.nullspace(), [])
+        session.remove('H2O', PRODUCTS)
+        session.add('H2', PRODUCTS)
+        self.assertEqual(session.coefficients(), [2, 1, 1])
+        self.assertEqual(session.rank, 2)
+
+        # Elements no longer used drop out of the factorization
+        session = BalanceSession('H2 + O2 = H2O')
+        session.add('NaCl')
+        session.remove('NaCl')
+        self.assertEqual(session._keys, BalanceSession('H2 + O2 = H2O')._keys)
+        self.assertEqual(session.coefficients(), [2, 1, 2])
+
+    def test_charge(self):
+        session = BalanceSession('Cu+2 = Cu(s)')
+        self.assertRaises(ValueError, session.coefficients)
+        session.add(Molecule.complete_formula('e-'))
+        self.assertEqual(session.coefficients(), [1, 2, 1])
+        session.remove('e-')
+        self.assertEqual(session.nullspace(), [])
+
+    def test_errors(self):
+        session = BalanceSession('H2 + O2 = H2O')
+        self.assertRaises(ValueError, session.remove, 'H2O')
+        self.assertRaises(ValueError, session.add, 'H2', 'catalysts')
+        session.add('H2O2', PRODUCTS)
+        self.assertRaises(balancer.NonUniqueBalanceError, session.coefficients)
+
+    def test_random_edits(self):
+        pool = ['H2', 'O2', 'H2O', 'CO2', 'CH4', 'NaCl', 'Na', 'Cl2', 'HCl', 'NaOH', 'Fe2O3', 'Fe', 'Fe+3', 'e-',
+                'SO4-2', 'H+', 'OH-', 'NH3', 'N2', 'C6H12O6', 'CO', 'H2SO4']
+        rng = random.Random(7)
+        session = BalanceSession()
+        for _ in range(400):
+            if len(session) and rng.random() < 0.4:
+                side = rng.choice([REACTANTS, PRODUCTS])
+                mols = session.reactants if side == REACTANTS else session.products
+                if mols:
+                    session.remove(rng.choice(mols), side)
+            else:
+                session.add(rng.choice(pool), rng.choice([REACTANTS, PRODUCTS]))
+
+            _, rows = balancer.composition_matrix(session.reactants, session.products)
+            expected = balancer.nullspace(rows, len(session))
+            basis = session.nullspace()
+            self.assertEqual(len(basis), len(expected))
+            self.assertTrue(all(_in_nullspace(session, vec) for vec in basis))
+            self.assertEqual(session.rank, len(session) - len(basis))
+
+
+if __name__ == '__main__':
+    unittest.main()
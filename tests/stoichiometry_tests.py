@@ -0,0 +1,77 @@
+import unittest
+
+from chempy import Equation, ptable
+
+try:
+    import numpy as np
+    from chempy.stoichiometry import GRAMS, Stoichiometry
+except ImportError:
+    np = None
+
+
+@unittest.skipIf(np is None, 'numpy is not installed')
+class StoichiometryTests(unittest.TestCase):
+    def setUp(self):
+        self.stoich = Stoichiometry('2H2 + O2 = 2H2O')
+
+    def test_limiting(self):
+        result = self.stoich.limiting([[4, 1], [1, 4], [2, 1]])
+        np.testing.assert_array_equal(result.limiting, [1, 0, 0])
+        np.testing.assert_allclose(result.extent, [1, 0.5, 1])
+        np.testing.assert_allclose(result.products, [[2], [1], [2]])
+        np.testing.assert_allclose(result.consumed, [[2, 1], [1, 0.5], [2, 1]])
+        np.testing.assert_allclose(result.excess, [[2, 0], [0, 3.5], [0, 0]])
+
+    def test_matches_loop(self):
+        stoich = Stoichiometry(Equation.from_str('C3H8 + O2 = CO2 + H2O').balance())
+        feeds = np.random.default_rng(3).uniform(0, 10, (500, 2))
+        result = stoich.limiting(feeds)
+        coeffs = [float(sp.coeff) for sp in stoich.equation.reactants]
+        for feed, limiting, extent in zip(feeds, result.limiting, result.extent):
+            runs = [x / c for x, c in zip(feed, coeffs)]
+            self.assertEqual(limiting, runs.index(min(runs)))
+            self.assertAlmostEqual(extent, min(runs))
+        self.assertEqual(result.products.shape, (500, 2))
+        self.assertTrue((result.excess >= 0).all())
+
+    def test_batch_shape(self):
+        result = self.stoich.limiting(np.ones((3, 4, 2)))
+        self.assertEqual(result.extent.shape, (3, 4))
+        self.assertEqual(result.products.shape, (3, 4, 1))
+        self.assertEqual(self.stoich.limiting([2, 2]).limiting, 0)
+
+    def test_grams(self):
+        h2, o2, h2o = (ptable.molar_mass(mol) for mol in self.stoich.reactants + self.stoich.products)
+        result = self.stoich.limiting([[4 * h2, 32.0]], unit=GRAMS)
+        self.assertEqual(result.limiting[0], 1)
+        np.testing.assert_allclose(result.extent, [32 / o2])
+        np.testing.assert_allclose(result.products, [[2 * 32 / o2 * h2o]])
+        np.testing.assert_allclose(result.consumed + result.excess, [[4 * h2, 32]])
+        np.testing.assert_allclose(self.stoich.required([1], unit=GRAMS), [[2 * h2, o2]])
+
+    def test_amounts(self):
+        np.testing.assert_array_equal(self.stoich.amounts({'O2': 3}), [0, 3])
+        self.assertRaises(ValueError, self.stoich.amounts, {'H2O': 1})
+        stoich = Stoichiometry('Fe2(SO4)3 + 6KOH = 3K2SO4 + 2Fe(OH)3')
+        np.testing.assert_array_equal(stoich.amounts({'Fe2(SO4)3': 2, 'KOH': 3}), [2, 3])
+        self.assertRaises(ValueError, stoich.amounts, {'Fe(OH)3': 1})
+
+        stoich = Stoichiometry('H2 + O2 + H2 = 2H2O')
+        np.testing.assert_array_equal(stoich.amounts({0: 1, 'O2': 2, 2: 3}), [1, 2, 3])
+        self.assertRaises(ValueError, stoich.amounts, {'H2': 1})
+        self.assertRaises(ValueError, stoich.amounts, {3: 1})
+
+    def test_errors(self):
+        self.assertRaises(ValueError, Stoichiometry, 'H2 + O2 = H2O')
+        self.assertRaises(ValueError, self.stoich.limiting, [[1, 2, 3]])
+        self.assertRaises(ValueError, self.stoich.limiting, [[-1, 2]])
+        for value in (np.nan, np.inf, -np.inf):
+            self.assertRaises(ValueError, self.stoich.limiting, [[1, 2], [value, 2]])
+        self.assertRaises(ValueError, self.stoich.limiting, [[1, 2]], unit='kg')
+        stoich = Stoichiometry('Qq2 = 2Qq')
+        np.testing.assert_allclose(stoich.limiting([[1]]).products, [[2]])
+        self.assertRaises(ValueError, stoich.limiting, [[1]], unit=GRAMS)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import os
+import tempfile
+import unittest
+
+from chempy import Equation
+from chempy.store import ReactionStore, StoreWriter
+
+equations = ['2H2 + O2 = 2H2O', 'Cu+2(aq) + 2e- = Cu(s)', '1/2N2 + 3/2H2 = NH3', 'Fe2(SO4)3 + KOH = K2SO4 + Fe(OH)3',
+             'H2O = H2 + 1/2O2', '2H2O = 2H2 + O2']
+
+
+class ReactionStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'reactions.rxs')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_round_trip(self):
+        with ReactionStore.write(self.path, iter(equations)) as store:
+            self.assertEqual(len(store), len(equations))
+            self.assertEqual([str(eq) for eq in store], equations)
+            self.assertEqual(str(store[-1]), equations[-1])
+            self.assertEqual(store[2].reactants[0].coeff, Equation.from_str(equations[2]).reactants[0].coeff)
+            self.assertRaises(IndexError, lambda: store[len(equations)])
+            self.assertEqual(store.molecule_count, 12)
+            self.assertIs(store[0].products[0].molecule, store[5].reactants[0].molecule)
+
+    def test_writer(self):
+        with StoreWriter(self.path) as writer:
+            self.assertEqual(writer.add(equations[0]), 0)
+            self.assertEqual(writer.add(Equation.from_str(equations[1])), 1)
+        with ReactionStore(self.path) as store:
+            self.assertEqual([str(eq) for eq in store], equations[:2])
+
+    def test_failed_write(self):
+        with self.assertRaises(OverflowError):
+            with StoreWriter(self.path) as writer:
+                writer.add(Equation.from_str('H2 = H2') * 2 ** 70)
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_empty(self):
+        with ReactionStore.write(self.path, []) as store:
+            self.assertEqual(list(store), [])
+
+    def test_invalid_file(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'\0' * 64)
+        self.assertRaises(ValueError, lambda: ReactionStore(self.path))
+        for size in (0, 10):
+            with open(self.path, 'wb') as f:
+                f.write(b'\0' * size)
+            self.assertRaises(ValueError, lambda: ReactionStore(self.path))
+
+
+if __name__ == '__main__':
+    unittest.main()
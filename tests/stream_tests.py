@@ -0,0 +1,117 @@
+import io
+import random
+import unittest
+from collections import Counter
+
+from chempy import Equation, Molecule, equation, stream, util
+
+
+def _outcome(parse, src):
+    try:
+        eq = parse(src)
+    except util.ParseError as e:
+        return e.message, e.position
+    return [(sp.molecule, sp.coeff) for sp in eq.reactants], [(sp.molecule, sp.coeff) for sp in eq.products]
+
+
+class StreamTests(unittest.TestCase):
+    def test_iter_tokens(self):
+        rng = random.Random(1)
+        alphabet = 'HCONaClSFe0123456789()+-=/.,[] \t\neg'
+        for chars in (alphabet, alphabet + 'ÅéΩ½²'):
+            for _ in range(1000):
+                src = ''.join(rng.choice(chars) for _ in range(rng.randint(0, 30)))
+                for chunk_size in (1, 3, 64):
+                    toks = list(stream.iter_tokens(io.StringIO(src), chunk_size))
+                    self.assertEqual([text for _, text, _ in toks], util.tokenize(src), repr(src))
+                    self.assertTrue(all(src[pos] == text[0] for _, text, pos in toks))
+
+        for chars in ('e ', '12 ', 'eé ', '1² '):  # tokens much longer than a chunk
+            for _ in range(100):
+                src = 'H' + ''.join(rng.choice(chars) for _ in range(rng.randint(0, 200))) + rng.choice(['', '+O', 'é'])
+                for chunk_size in (1, 3, 7):
+                    toks = list(stream.iter_tokens(io.StringIO(src), chunk_size))
+                    self.assertEqual([text for _, text, _ in toks], util.tokenize(src), repr(src))
+
+        toks = list(stream.iter_tokens('2 Fe2 (S O4) 3', 2))
+        self.assertEqual(toks[:3], [(util.NUMBER, '2', 0), (util.ALPHA, 'Fe', 2), (util.NUMBER, '2', 4)])
+        self.assertEqual(toks[-2:], [(util.SYMBOL, ')', 11), (util.NUMBER, '3', 13)])
+
+    def test_read_equation(self):
+        cases = ['H2 + O2 = H2O', '2H2+O2=2H2O', '1.5H2 + 3/4 O2 = H2O(l)', 'Na+(aq) + Cl-(aq) = NaCl(s)',
+                 'Cu+2 + 2e- = Cu(s)', 'Mg+2(aq)+2e-=Mg(s)', 'HgS(s, red) = Hg(l) + S', 'H2 + O2',
+                 '(NH4)2SO4 + Fe2(SO4)3 = X', 'Fe+3 + H2O = Fe(OH)3(s) + H+']
+        for src in cases:
+            for chunk_size in (1, 2, 5, stream.CHUNK_SIZE):
+                self.assertEqual(str(stream.read_equation(io.StringIO(src), chunk_size)), str(Equation.from_str(src)))
+        eq = stream.read_equation('Cu+2(aq) + 2e- = Cu(s)')
+        self.assertIs(eq.reactants[0].molecule, Molecule.complete_formula('Cu+2(aq)'))
+
+    def test_errors(self):
+        cases = [
+            ('H2 + O2 = = H2O', 10),
+            ('H2 + O2 = H2O = O2', 14),
+            ('H2 . O2', 3),
+            ('2 = H2', 2),
+            ('H2 + (O2 = H2O', 5),
+            ('H2 + O2 = H2O)', 10),
+            ('H2O(aq', 3),
+            ('H2 = ', 5),
+            ('= H2', 0),
+            ('', 0),
+        ]
+        for src, position in cases:
+            for chunk_size in (1, stream.CHUNK_SIZE):
+                with self.assertRaises(util.ParseError) as ctx:
+                    stream.read_equation(io.StringIO(src), chunk_size)
+                self.assertEqual(ctx.exception.position, position, src)
+        self.assertRaises(TypeError, stream.read_equation, b'H2 = H2')
+        self.assertRaises(TypeError, stream.read_equation, io.BytesIO(b'H2 = H2'))
+
+    def test_matches_from_str(self):
+        rng = random.Random(2)
+        parts = ['H2O', '(NH4)2SO4', 'Fe+3', 'e-', 'SO4-2(aq)', '(CH2)12', 'HgS(s, red)', '3/2O2', '1.5 H2', ' + ',
+                 ' = ', '+', '(', ')(', ' ', 'Na+(aq)', '((CH3)3C)2O', '-', '2', 'é', ',', '.']
+        for _ in range(3000):
+            src = ''.join(rng.choice(parts) for _ in range(rng.randint(0, 10)))
+            self.assertEqual(_outcome(lambda s: stream.read_equation(s, rng.choice([1, 4, 64])), src),
+                             _outcome(equation._parse_equation, src), repr(src))
+
+    def test_iter_species(self):
+        species = list(stream.iter_species(io.StringIO('2H2 + O2 = 2H2O')))
+        self.assertEqual([(side, str(sp)) for side, sp in species],
+                         [(stream.REACTANTS, '2H2'), (stream.REACTANTS, 'O2'), (stream.PRODUCTS, '2H2O')])
+
+        # Species before an error are produced as they are parsed
+        it = stream.iter_species('H2 + O2 = H2O = O2')
+        self.assertEqual([str(sp) for _, sp in (next(it), next(it), next(it))], ['H2', 'O2', 'H2O'])
+        self.assertRaises(util.ParseError, next, it)
+
+    def test_read_molecule(self):
+        mol = stream.read_molecule(io.StringIO('(' * 500 + 'CH2' + ')2' * 500 + '-2(aq)'), 7)
+        self.assertEqual(mol.elements, Counter({'C': 2 ** 500, 'H': 2 ** 501}))
+        self.assertEqual((mol.charge, mol.states), (-2, ['aq']))
+        self.assertIs(stream.read_molecule('SO4-2(aq)'), Molecule.complete_formula('SO4-2(aq)'))
+        self.assertRaises(util.ParseError, stream.read_molecule, 'H2O + H2')
+        self.assertRaises(util.ParseError, stream.read_molecule, '2H2O')
+
+    def test_long_input(self):
+        src = 'C2H4' * 100000 + '(s) + O2 = CO2 + H2O'
+        eq = stream.read_equation(io.StringIO(src), 1000)
+        self.assertEqual(eq.reactants[0].molecule.elements, Counter({'C': 200000, 'H': 400000}))
+        self.assertEqual(str(eq.balance()), str(equation._parse_equation(src).balance()))
+        self.assertEqual(list(stream.iter_tokens('C' + 'a' * 2000000 + '2', 1000)),
+                         [(util.ALPHA, 'C' + 'a' * 2000000, 0), (util.NUMBER, '2', 2000001)])
+
+        old, equation._STREAM_LENGTH = equation._STREAM_LENGTH, 100
+        try:
+            self.assertEqual(str(Equation.from_str(src[-300:])), str(equation._parse_equation(src[-300:])))
+            with self.assertRaises(util.ParseError) as ctx:
+                Equation.from_str('H2 + ' * 30 + '= = H2')
+            self.assertEqual(ctx.exception.position, 152)
+        finally:
+            equation._STREAM_LENGTH = old
+
+
+if __name__ == '__main__':
+    unittest.main()
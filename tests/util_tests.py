@@ -1,8 +1,33 @@
+import random
 import unittest
 
 import chempy.util as util
 
 
+def reference_tokenize(src: str):
+    # The original character by character tokenizer, kept to check the compiled one against
+    src = ''.join(src.split())
+    tokens = []
+    reserve = ''
+
+    for c in src:
+        if c.isalpha():
+            if not reserve.isalpha() or c.isupper():
+                tokens.append(reserve)
+                reserve = ''
+        elif c.isnumeric():
+            if not reserve.isnumeric():
+                tokens.append(reserve)
+                reserve = ''
+        else:
+            tokens.append(reserve)
+            reserve = ''
+        reserve += c
+    tokens.append(reserve)
+
+    return [tok for tok in tokens if tok != '']
+
+
 class UtilTests(unittest.TestCase):
     def test_tokenize(self):
         self.assertEqual(util.tokenize('1'), ['1'])
@@ -33,6 +58,62 @@ class UtilTests(unittest.TestCase):
                          ['23', '.', '3', '/', '3', 'syms', ':', '!', '#', '&', '^', 'asd', '(', '|', ']', '[', '?',
                           '$', '%', '=', '*', '%', '{', ';', 'Tok', '?', '$', ',', ')'])
 
+    def test_tokenize_equivalence(self):
+        rng = random.Random(0)
+        alphabet = 'HCONaClSFe0123456789()+-=/.,[] \t\neg'
+        unicode_alphabet = alphabet + 'ÅéΩ½²'
+        for chars in (alphabet, unicode_alphabet):
+            for _ in range(2000):
+                src = ''.join(rng.choice(chars) for _ in range(rng.randint(0, 30)))
+                self.assertEqual(util.tokenize(src), reference_tokenize(src), repr(src))
+
+    def test_token_spans(self):
+        src = ' 2 Fe2(SO4)3 (aq) + H e- = camelCase 1 2'
+        spans = list(util.token_spans(src))
+        self.assertEqual([''.join(src[start:end].split()) for _, start, end in spans], util.tokenize(src))
+        self.assertEqual(spans[:4], [(util.NUMBER, 1, 2), (util.ALPHA, 3, 5), (util.NUMBER, 5, 6), (util.SYMBOL, 6, 7)])
+        self.assertEqual(spans[-1], (util.NUMBER, len(src) - 3, len(src)))
+
+        src = '2Ω½ + Åé'
+        spans = list(util.token_spans(src))
+        self.assertEqual([''.join(src[start:end].split()) for _, start, end in spans], reference_tokenize(src))
+        self.assertEqual([kind for kind, _, _ in spans],
+                         [util.NUMBER, util.ALPHA, util.NUMBER, util.SYMBOL, util.ALPHA])
+
+
+class LRUCacheTests(unittest.TestCase):
+    def test_get_put(self):
+        cache = util.LRUCache(maxsize=2)
+        self.assertIsNone(cache.get('a'))
+        cache.put('a', 1)
+        cache.put('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.put('c', 3)  # evicts 'b', the least recently used
+        self.assertNotIn('b', cache)
+        self.assertIn('a', cache)
+        self.assertEqual(cache.info(), util.CacheInfo(hits=1, misses=1, evictions=1, maxsize=2, currsize=2))
+
+    def test_setdefault(self):
+        cache = util.LRUCache(maxsize=2)
+        self.assertEqual(cache.setdefault('a', 1), 1)
+        self.assertEqual(cache.setdefault('a', 2), 1)
+        self.assertEqual(cache.info().hits + cache.info().misses, 0)
+
+    def test_resize_clear(self):
+        cache = util.LRUCache(maxsize=None)
+        for i in range(10):
+            cache.put(i, i)
+        self.assertEqual(len(cache), 10)
+        cache.resize(3)
+        self.assertEqual(cache.info().currsize, 3)
+        self.assertEqual(cache.info().evictions, 7)
+        self.assertRaises(ValueError, lambda: cache.resize(-1))
+        cache.resize(0)
+        cache.put('a', 1)
+        self.assertEqual(len(cache), 0)
+        cache.clear()
+        self.assertEqual(cache.info(), util.CacheInfo(0, 0, 0, 0, 0))
+
 
 if __name__ == '__main__':
     unittest.main()